@@ -1,17 +1,13 @@
 from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
+from app.services.json_repair import RepairingOutputParser
+from app.services.llm_clients import get_chain, get_chat_model
+from app.services.prompt_payload import format_hint
 from config.Settings import settings
 from app.models.feedback_model import EnhanceFeedbackRequest,EnhanceFeedbackResponse
 
-llm = ChatOpenAI(
-    model=settings.model,
-    api_key=settings.openai_api_key,
-    temperature=settings.temperature,
-    max_tokens=settings.max_output_tokens
-)
+llm = get_chat_model(agent="ai_feedback", json_mode=True)
 
-parser = PydanticOutputParser(pydantic_object=EnhanceFeedbackResponse)
+parser = RepairingOutputParser(pydantic_object=EnhanceFeedbackResponse, agent="ai_feedback")
 
 
 template = """
@@ -44,7 +40,7 @@ Answer strictly in JSON.
 prompt = PromptTemplate(
     input_variables=["text", "context"],
     template=template,
-    partial_variables={"format_instructions": parser.get_format_instructions()}
+    partial_variables={"format_instructions": format_hint(parser.pydantic_object)}
 )
 
 
@@ -52,11 +48,23 @@ prompt = PromptTemplate(
 chain = prompt | llm | parser
 
 
+def _feedback_inputs(request: EnhanceFeedbackRequest) -> dict:
+    return {
+        "text": request.text,
+        "context": request.context or "general"
+    }
+
+
 def enhance_feedback(request: EnhanceFeedbackRequest) -> EnhanceFeedbackResponse:
     if not request.text or not request.text.strip():
         return EnhanceFeedbackResponse(enhanced="")
 
-    return chain.invoke({
-        "text": request.text,
-        "context": request.context or "general"
-    })
\ No newline at end of file
+    return chain.invoke(_feedback_inputs(request))
+
+
+async def aenhance_feedback(request: EnhanceFeedbackRequest) -> EnhanceFeedbackResponse:
+    if not request.text or not request.text.strip():
+        return EnhanceFeedbackResponse(enhanced="")
+
+    chain = get_chain("ai_feedback", lambda llm: prompt | llm | parser, agent="ai_feedback", json_mode=True)
+    return await chain.ainvoke(_feedback_inputs(request))
\ No newline at end of file
@@ -1,9 +1,10 @@
-import re
-import json
 from fastapi import APIRouter, HTTPException
-from langchain_openai import ChatOpenAI
+from langchain_core.exceptions import OutputParserException
+from app.services.json_repair import parse_json
+from app.services.llm_clients import get_chat_model
+from app.services.rate_limiter import quota_http_exception
 import logging
-from config.Settings import settings
+from config.Settings import settings, QuotaLimitError
 from app.models.resume_analyze_model import AIPromptQuestionRequest, AIPromptQuestionResponse
 
 logger = logging.getLogger(__name__)
@@ -11,23 +12,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def clean_llm_output(output_text: str) -> str:
-    """Clean and extract JSON from LLM output."""
-    if not output_text:
-        return ""
-    
-    # Remove markdown code blocks
-    output_text = re.sub(r"^```(?:json)?\s*", "", output_text.strip())
-    output_text = re.sub(r"\s*```$", "", output_text.strip())
-    
-    # Find JSON object
-    json_match = re.search(r'\{[\s\S]*\}', output_text)
-    if json_match:
-        return json_match.group(0)
-    
-    return output_text.strip()
-
-
 def generate_prompt_based_questions(request: AIPromptQuestionRequest) -> AIPromptQuestionResponse:
     """Generate interview questions based on user prompt."""
     
@@ -36,14 +20,45 @@ def generate_prompt_based_questions(request: AIPromptQuestionRequest) -> AIPromp
         return AIPromptQuestionResponse(questions_to_ask=[])
     
     # Initialize model
-    llm = ChatOpenAI(
-        model=settings.model,
-        api_key=settings.openai_api_key,
-        temperature=settings.temperature,
-        max_tokens=settings.max_output_tokens
-    )
+    llm = get_chat_model(agent="ai_prompt_question", json_mode=True)
     
-    prompt = f"""You are an interview question generator.
+    try:
+        response = llm.invoke(_question_prompt(request))
+        return _questions_response(response)
+        
+    except QuotaLimitError:
+        raise
+    except OutputParserException as e:
+        logger.error(f"JSON Error: {e}")
+        return AIPromptQuestionResponse(questions_to_ask=[])
+        
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return AIPromptQuestionResponse(questions_to_ask=[])
+
+
+async def agenerate_prompt_based_questions(request: AIPromptQuestionRequest) -> AIPromptQuestionResponse:
+    """Async generate_prompt_based_questions."""
+    if not request.prompt or request.prompt.strip() == "":
+        return AIPromptQuestionResponse(questions_to_ask=[])
+
+    try:
+        response = await get_chat_model(agent="ai_prompt_question", json_mode=True).ainvoke(_question_prompt(request))
+        return _questions_response(response)
+
+    except QuotaLimitError:
+        raise
+    except OutputParserException as e:
+        logger.error(f"JSON Error: {e}")
+        return AIPromptQuestionResponse(questions_to_ask=[])
+
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return AIPromptQuestionResponse(questions_to_ask=[])
+
+
+def _question_prompt(request: AIPromptQuestionRequest) -> str:
+    return f"""You are an interview question generator.
 
 USER PROMPT: {request.prompt}
 
@@ -63,34 +78,25 @@ If invalid prompt, return:
 
 Return ONLY JSON, nothing else."""
 
-    try:
-        response = llm.invoke(prompt)
-        
-        if not response or not response.content:
-            return AIPromptQuestionResponse(questions_to_ask=[])
-        
-        output_text = clean_llm_output(response.content)
-        
-        if not output_text:
-            return AIPromptQuestionResponse(questions_to_ask=[])
-        
-        response_data = json.loads(output_text)
-        return AIPromptQuestionResponse(**response_data)
-        
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON Error: {e}")
+
+def _questions_response(response) -> AIPromptQuestionResponse:
+    if not response or not response.content:
         return AIPromptQuestionResponse(questions_to_ask=[])
-        
-    except Exception as e:
-        logger.error(f"Error: {str(e)}")
+    
+    if not response.content.strip():
         return AIPromptQuestionResponse(questions_to_ask=[])
+    
+    response_data = parse_json(response.content, "ai_prompt_question")
+    return AIPromptQuestionResponse(**response_data)
 
 
 @router.post("/generate-prompt-questions", response_model=AIPromptQuestionResponse)
-def ai_prompt_question_generator(request: AIPromptQuestionRequest):
+async def ai_prompt_question_generator(request: AIPromptQuestionRequest):
     """Generate interview questions from user prompt."""
     try:
-        return generate_prompt_based_questions(request)
+        return await agenerate_prompt_based_questions(request)
+    except QuotaLimitError as qe:
+        raise quota_http_exception(qe)
     except Exception as e:
         logger.error(f"Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,33 +1,29 @@
-import re
 from pydantic import BaseModel
 from typing import List, Dict
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-import json
+from langchain_core.exceptions import OutputParserException
+from app.services.json_repair import parse_json
+from app.services.llm_clients import get_chain
+from app.services.prompt_payload import compact_prompt, format_hint, render_inputs
 from app.models.resume_analyze_model import AIQuestionRequest, AIQuestionResponse
-from config.Settings import settings
+from config.Settings import settings, QuotaLimitError
+import logging
 
-def escape_prompt(text: str) -> str:
+logger = logging.getLogger(__name__)
+
+def escape_prompt(text: str, variables=("input_data",)) -> str:
     """
-    Escapes all { } except for {input_data}
-    which LangChain should keep as a variable.
+    Escapes all { } except for the given variables (default {input_data})
+    which LangChain should keep as variables.
     """
     text = text.replace("{", "{{").replace("}", "}}")
-    text = text.replace("{{input_data}}", "{input_data}")
+    for variable in variables:
+        text = text.replace("{{" + variable + "}}", "{" + variable + "}")
     return text
 
 
-def generate_interview_questions(request: AIQuestionRequest) -> AIQuestionResponse:
-    llm = ChatOpenAI(
-        model=settings.model,
-        api_key=settings.openai_api_key,
-        temperature=settings.temperature,
-        max_tokens=settings.max_output_tokens
-    )
-    
-    
-    original_prompt = """
+QUESTION_PROMPT = PromptTemplate.from_template(escape_prompt(compact_prompt("""
     You are a professional technical interviewer conducting a structured analysis.
 
     **CRITICAL RULES:**
@@ -90,27 +86,8 @@ def generate_interview_questions(request: AIQuestionRequest) -> AIQuestionRespon
     - Can the candidate answer this based on their stated experience? → If NO, rephrase or remove it
 
     **OUTPUT FORMAT:**
-    Return ONLY a valid JSON object with this exact structure (no additional text, markdown, or code blocks):
-    {
-        "ai_score": <integer 0-100>,
-        "summary": {
-            "experience_match": {
-                "years_requirement_met": <boolean>,
-                "experience_level_fit": "<string>"
-            },
-            "overall_match": "<string>",
-            "skill_match": {
-                "matched_skills": ["<skill1>", "<skill2>", ...],
-                "missing_skills": ["<skill1>", "<skill2>", ...],
-                "skill_gap_percentage": <integer>
-            }
-        },
-        "advice": {
-            "interview_focus_areas": ["<area1>", "<area2>", "<area3>", ...],
-            "next_steps": ["<step1>", "<step2>", "<step3>", ...],
-            "questions_to_ask": ["<question1>", "<question2>", "<question3>", ...]
-        }
-    }
+    {format_instructions}
+    No additional text, markdown, or code blocks.
 
     **CRITICAL REMINDERS:**
     - Return ONLY valid JSON with no additional text
@@ -118,38 +95,57 @@ def generate_interview_questions(request: AIQuestionRequest) -> AIQuestionRespon
     - Focus on the intersection of job requirements and candidate capabilities
     - Generate questions based FIRST on candidate profile and THEN ensure alignment with job requirements
     - Adapt your language and focus to match the domain of the job role
-    """
+    """), ("input_data", "format_instructions"))).partial(format_instructions=format_hint(AIQuestionResponse))
 
-    prompt = escape_prompt(original_prompt)
 
-    chain = LLMChain(
-        llm=llm,
-        prompt=PromptTemplate.from_template(prompt)
+def _question_chain(request: AIQuestionRequest):
+    chain = get_chain(
+        "ai_question_generate",
+        lambda llm: LLMChain(llm=llm, prompt=QUESTION_PROMPT),
+        agent="ai_question_generate",
+        json_mode=True
     )
+    input_data = render_inputs("ai_question_generate", {"input_data": request})
+    logger.debug(f"Input to chain.invoke: {input_data}")
+    return chain, input_data
+
+
+def _questions_response(raw_output) -> AIQuestionResponse:
+    output_text = raw_output["text"] if isinstance(raw_output, dict) else raw_output
+    
+    logger.debug(f"Raw LLM output: {output_text}")
+    
+    response_data = parse_json(output_text, "ai_question_generate")
+    
+    validated_response = AIQuestionResponse(**response_data)
+    logger.debug(f"Successfully generated response with AI score: {validated_response.ai_score}")
+    
+    return validated_response
+
+
+def generate_interview_questions(request: AIQuestionRequest) -> AIQuestionResponse:
+    try:
+        chain, input_data = _question_chain(request)
+        return _questions_response(chain.invoke(input_data))
+    except QuotaLimitError:
+        raise
+    except OutputParserException as e:
+        logger.error(f"JSON Decode Error: {e}")
+        raise ValueError(f"Failed to parse LLM output as JSON: {e}")
+    except Exception as e:
+        logger.error(f"General Error: {str(e)}")
+        raise ValueError(f"Failed to process LLM request: {e}")
+
 
+async def agenerate_interview_questions(request: AIQuestionRequest) -> AIQuestionResponse:
     try:
-        input_data = {"input_data": request.dict()}
-        print(f"Input to chain.invoke: {json.dumps(input_data, indent=2)}")
-        
-        raw_output = chain.invoke(input_data)
-        output_text = raw_output["text"] if isinstance(raw_output, dict) else raw_output
-        
-        
-        output_text = re.sub(r"^```(?:json)?\s*|\s*```$", "", output_text.strip(), flags=re.DOTALL)
-        
-        print(f"Raw LLM output: {output_text}")
-        
-        response_data = json.loads(output_text)
-        
-        validated_response = AIQuestionResponse(**response_data)
-        print(f"Successfully generated response with AI score: {validated_response.ai_score}")
-        
-        return validated_response
-        
-    except json.JSONDecodeError as e:
-        print(f"JSON Decode Error: {e}")
-        print(f"Failed output text: {output_text}")
+        chain, input_data = _question_chain(request)
+        return _questions_response(await chain.ainvoke(input_data))
+    except QuotaLimitError:
+        raise
+    except OutputParserException as e:
+        logger.error(f"JSON Decode Error: {e}")
         raise ValueError(f"Failed to parse LLM output as JSON: {e}")
     except Exception as e:
-        print(f"General Error: {str(e)}")
+        logger.error(f"General Error: {str(e)}")
         raise ValueError(f"Failed to process LLM request: {e}")
@@ -1,17 +1,13 @@
 from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
+from app.services.json_repair import RepairingOutputParser
+from app.services.llm_clients import get_chain, get_chat_model
+from app.services.prompt_payload import format_hint
 from config.Settings import settings
 from app.models.evaluation_model import InterviewSummaryRequest, EvaluationResponse
 
-llm = ChatOpenAI(
-    model=settings.model,
-    api_key=settings.openai_api_key,
-    temperature=settings.temperature,
-    max_tokens=settings.max_output_tokens
-)
+llm = get_chat_model(agent="evaluation_agent", json_mode=True)
 
-parser = PydanticOutputParser(pydantic_object=EvaluationResponse)
+parser = RepairingOutputParser(pydantic_object=EvaluationResponse, agent="evaluation_agent")
 
 
 template = """
@@ -47,21 +43,30 @@ prompt = PromptTemplate(
         "additional_observations"
     ],
     template=template,
-    partial_variables={"format_instructions": parser.get_format_instructions()}
+    partial_variables={"format_instructions": format_hint(parser.pydantic_object)}
 )
 
 chain = prompt | llm | parser
 
 
-def evaluate_interview(request: InterviewSummaryRequest) -> EvaluationResponse:
+def _evaluation_inputs(request: InterviewSummaryRequest) -> dict:
     def safe_text(value: str, default: str = "No information provided") -> str:
         return value.strip() if value and value.strip() else default
     
-    return chain.invoke({
+    return {
         "technical_skills": safe_text(request.technicalSkills),
         "communication_collaboration": safe_text(request.communicationCollaboration),
         "cultural_fit_values": safe_text(request.culturalFitValues),
         "problem_solving": safe_text(request.problemSolvingCriticalThinking),
         "key_strengths": safe_text(request.keyStrengthsHighlights),
         "additional_observations": safe_text(request.additionalObservations)
-    })
\ No newline at end of file
+    }
+
+
+def evaluate_interview(request: InterviewSummaryRequest) -> EvaluationResponse:
+    return chain.invoke(_evaluation_inputs(request))
+
+
+async def aevaluate_interview(request: InterviewSummaryRequest) -> EvaluationResponse:
+    chain = get_chain("evaluation_agent", lambda llm: prompt | llm | parser, agent="evaluation_agent", json_mode=True)
+    return await chain.ainvoke(_evaluation_inputs(request))
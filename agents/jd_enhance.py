@@ -3,25 +3,21 @@ from langchain.prompts import PromptTemplate
 import os
 from dotenv import load_dotenv
 from agents.types import JobDescriptionTitleAISuggest
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
+from app.services.json_repair import RepairingOutputParser
+from app.services.llm_clients import get_chat_model
+from app.services.prompt_payload import compact_prompt, format_hint
 from agents.types import Enhancecertifications, Enhanceeducation, EnhancekeyResponsibilities, EnhanceniceToHave, EnhancesoftSkills, EnhancetechnicalSkills
 from config.Settings import settings
 
 load_dotenv()
 
-llm = ChatOpenAI(
-    model=settings.model,
-    api_key=settings.openai_api_key,
-    temperature=settings.temperature,
-    max_tokens=settings.max_output_tokens
-)
+llm = get_chat_model(agent="jd_enhance", json_mode=True)
 
 # Key Responsibilities Chain
-key_resp_parser = PydanticOutputParser(pydantic_object=EnhancekeyResponsibilities)
+key_resp_parser = RepairingOutputParser(pydantic_object=EnhancekeyResponsibilities, agent="jd_enhance")
 key_resp_prompt = PromptTemplate(
     input_variables=["title", "experienceRange", "department", "subDepartment", "keyResponsibilities"],
-    template="""
+    template=compact_prompt("""
     You are an expert HR assistant AI. Refine and enhance the list of key responsibilities for the following role to make them clear, professional, and aligned with industry standards. Ensure the responsibilities are tailored to the specified experience range, avoiding repetition of the input and adding value where possible (e.g., specificity, actionable language, or additional relevant duties).
     If title ,experincerange,department,subdepartment as not valid so return response in all field empty.
     Title: {title}
@@ -33,16 +29,16 @@ key_resp_prompt = PromptTemplate(
     {keyResponsibilities}
 
     {format_instructions}
-    """,
-    partial_variables={"format_instructions": key_resp_parser.get_format_instructions()},
+    """),
+    partial_variables={"format_instructions": format_hint(key_resp_parser.pydantic_object)},
 )
 key_resp_chain = LLMChain(llm=llm, prompt=key_resp_prompt, output_parser=key_resp_parser)
 
 # Soft Skills Chain
-soft_parser = PydanticOutputParser(pydantic_object=EnhancesoftSkills)
+soft_parser = RepairingOutputParser(pydantic_object=EnhancesoftSkills, agent="jd_enhance")
 soft_prompt = PromptTemplate(
     input_variables=["title", "experienceRange", "department", "subDepartment", "softSkills"],
-    template="""
+    template=compact_prompt("""
     You are an expert HR AI. Enhance the list of soft skills for the specified role by:
     - Rephrasing each skill to be professional, impactful, and tailored to the role’s context, department, and experience level.
     - Expanding the list with additional relevant soft skills that align with the department and sub-department, avoiding generic additions.
@@ -57,16 +53,16 @@ soft_prompt = PromptTemplate(
     {softSkills}
 
     {format_instructions}
-    """,
-    partial_variables={"format_instructions": soft_parser.get_format_instructions()},
+    """),
+    partial_variables={"format_instructions": format_hint(soft_parser.pydantic_object)},
 )
 soft_chain = LLMChain(llm=llm, prompt=soft_prompt, output_parser=soft_parser)
 
 # Technical Skills Chain
-tech_parser = PydanticOutputParser(pydantic_object=EnhancetechnicalSkills)
+tech_parser = RepairingOutputParser(pydantic_object=EnhancetechnicalSkills, agent="jd_enhance")
 tech_prompt = PromptTemplate(
     input_variables=["title", "experienceRange", "department", "subDepartment", "technicalSkills"],
-    template="""
+    template=compact_prompt("""
     You are a technical recruiter AI. Refine and enhance the technical skills section for the following role by:
     - Rephrasing each skill to be precise, professional, and aligned with industry standards.
     - Adding relevant technical skills that complement the role, department, and experience level, if applicable.
@@ -82,16 +78,16 @@ tech_prompt = PromptTemplate(
     {technicalSkills}
 
     {format_instructions}
-    """,
-    partial_variables={"format_instructions": tech_parser.get_format_instructions()},
+    """),
+    partial_variables={"format_instructions": format_hint(tech_parser.pydantic_object)},
 )
 tech_chain = LLMChain(llm=llm, prompt=tech_prompt, output_parser=tech_parser)
 
 # Education Chain
-edu_parser = PydanticOutputParser(pydantic_object=Enhanceeducation)
+edu_parser = RepairingOutputParser(pydantic_object=Enhanceeducation, agent="jd_enhance")
 edu_prompt = PromptTemplate(
     input_variables=["title", "experienceRange", "department", "subDepartment", "education"],
-    template="""
+    template=compact_prompt("""
     You are an AI HR content enhancer. Refine and format the education requirements for the following role by:
     - Clarifying degree types, fields of study, or alternative qualifications (e.g., equivalent experience) to align with the role, department, and experience level.
     - Ensuring requirements are professional, specific, and relevant to the department and sub-department.
@@ -106,16 +102,16 @@ edu_prompt = PromptTemplate(
     {education}
 
     {format_instructions}
-    """,
-    partial_variables={"format_instructions": edu_parser.get_format_instructions()},
+    """),
+    partial_variables={"format_instructions": format_hint(edu_parser.pydantic_object)},
 )
 edu_chain = LLMChain(llm=llm, prompt=edu_prompt, output_parser=edu_parser)
 
 # Certifications Chain
-cert_parser = PydanticOutputParser(pydantic_object=Enhancecertifications)
+cert_parser = RepairingOutputParser(pydantic_object=Enhancecertifications, agent="jd_enhance")
 cert_prompt = PromptTemplate(
     input_variables=["title", "experienceRange", "department", "subDepartment", "certifications"],
-    template="""
+    template=compact_prompt("""
     You are an AI assistant for job description writing. Refine and enhance the certifications for the following role by:
     - Rephrasing certifications to be clear, professional, and relevant to the role, department, and experience level.
     - Adding relevant certifications that align with the department and sub-department, if applicable, ensuring they are current and industry-recognized.
@@ -130,16 +126,16 @@ cert_prompt = PromptTemplate(
     {certifications}
 
     {format_instructions}
-    """,
-    partial_variables={"format_instructions": cert_parser.get_format_instructions()},
+    """),
+    partial_variables={"format_instructions": format_hint(cert_parser.pydantic_object)},
 )
 cert_chain = LLMChain(llm=llm, prompt=cert_prompt, output_parser=cert_parser)
 
 # Nice-to-Have Skills Chain
-nice_parser = PydanticOutputParser(pydantic_object=EnhanceniceToHave)
+nice_parser = RepairingOutputParser(pydantic_object=EnhanceniceToHave, agent="jd_enhance")
 nice_prompt = PromptTemplate(
     input_variables=["title", "experienceRange", "department", "subDepartment", "niceToHave"],
-    template="""
+    template=compact_prompt("""
     You are an AI that improves job description content. Refine and enhance the list of 'Nice-to-Have' skills for the following role by:
     - Rephrasing skills to be clear, professional, and aligned with the role, department, and experience level.
     - Adding relevant nice-to-have skills that complement the role and department, ensuring they are desirable but not essential and distinct from required skills.
@@ -154,7 +150,7 @@ nice_prompt = PromptTemplate(
     {niceToHave}
 
     {format_instructions}
-    """,
-    partial_variables={"format_instructions": nice_parser.get_format_instructions()},
+    """),
+    partial_variables={"format_instructions": format_hint(nice_parser.pydantic_object)},
 )
 nice_chain = LLMChain(llm=llm, prompt=nice_prompt, output_parser=nice_parser)
\ No newline at end of file
@@ -1,12 +1,12 @@
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 from agents.types import JobDescriptionOutline
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
+from app.services.json_repair import RepairingOutputParser
+from app.services.llm_clients import get_chain
+from app.services.prompt_payload import compact_prompt
 from config.Settings import settings
 
-def return_jd(title, experienceRange, department, subDepartment):
-    template = """
+template = """
     You are a professional HR and job description expert.
 
     You are given the basic job information:
@@ -28,30 +28,30 @@ def return_jd(title, experienceRange, department, subDepartment):
     Return **only valid JSON**, do not include explanations.
     """
 
-    prompt = PromptTemplate(
-        input_variables=["title", "experienceRange", "department", "subDepartment"],
-        template=template
-    )
+prompt = PromptTemplate(
+    input_variables=["title", "experienceRange", "department", "subDepartment"],
+    template=compact_prompt(template)
+)
 
-    parser = PydanticOutputParser(pydantic_object=JobDescriptionOutline)
+parser = RepairingOutputParser(pydantic_object=JobDescriptionOutline, agent="jd_genrator")
 
 
-    llm = ChatOpenAI(
-        model=settings.model,
-        api_key=settings.openai_api_key,
-        temperature=settings.temperature,
-        max_tokens=settings.max_output_tokens
+def _jd_chain(title, experienceRange, department, subDepartment):
+    chain = get_chain(
+        "jd_genrator",
+        lambda llm: LLMChain(llm=llm,prompt=prompt,verbose=True,output_parser=parser),
+        agent="jd_genrator",
+        json_mode=True
     )
-
-    chain = LLMChain(llm=llm,prompt=prompt,verbose=True,output_parser=parser)
-    raw_output = chain.invoke({
+    return chain, {
         "title": title,
         "experienceRange": experienceRange,
         "department": department,
         "subDepartment": subDepartment or ""
-    })
+    }
 
 
+def _jd_fields(raw_output):
     if isinstance(raw_output, dict) and "text" in raw_output:
         parsed = raw_output["text"]
     else:
@@ -68,3 +68,13 @@ def return_jd(title, experienceRange, department, subDepartment):
         ]
         return {k: parsed.get(k) for k in job_fields}
     return parsed
+
+
+def return_jd(title, experienceRange, department, subDepartment):
+    chain, inputs = _jd_chain(title, experienceRange, department, subDepartment)
+    return _jd_fields(chain.invoke(inputs))
+
+
+async def areturn_jd(title, experienceRange, department, subDepartment):
+    chain, inputs = _jd_chain(title, experienceRange, department, subDepartment)
+    return _jd_fields(await chain.ainvoke(inputs))
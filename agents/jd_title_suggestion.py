@@ -1,26 +1,26 @@
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
+from app.services.json_repair import RepairingOutputParser
+from app.services.llm_clients import get_chain
+from app.services.prompt_payload import compact_prompt
 from agents.types import JobDescriptionTitleAISuggest
 from app.models.jd_model import JobTitleAISuggestInput
 from config.Settings import settings
 
-def title_suggests(job:JobTitleAISuggestInput):
-    job_title_prompt = PromptTemplate(
-        input_variables=[
-            "title",
-            "experienceRange",
-            "department",
-            "subDepartment",
-            "keyResponsibilities",
-            "softSkills",
-            "technicalSkills",
-            "education",
-            "certifications",
-            "niceToHave",
-        ],
-        template="""
+job_title_prompt = PromptTemplate(
+    input_variables=[
+        "title",
+        "experienceRange",
+        "department",
+        "subDepartment",
+        "keyResponsibilities",
+        "softSkills",
+        "technicalSkills",
+        "education",
+        "certifications",
+        "niceToHave",
+    ],
+    template=compact_prompt("""
     You are an AI that suggests job titles based on the following job information:
 
     - Current Job Title: {title}
@@ -37,23 +37,20 @@ def title_suggests(job:JobTitleAISuggestInput):
     Return a JSON list of 5-10 suitable alternative job titles, in the following format:
 
     {{"title": ["title1", "title2", "title3", ...]}}
-    """
-    )
+    """)
+)
 
-    parser = PydanticOutputParser(pydantic_object=JobDescriptionTitleAISuggest)
+parser = RepairingOutputParser(pydantic_object=JobDescriptionTitleAISuggest, agent="jd_title_suggestion")
 
 
-    llm = ChatOpenAI(
-        model=settings.model,
-        api_key=settings.openai_api_key,
-        temperature=settings.temperature,
-        max_tokens=settings.max_output_tokens
+def _title_chain(job:JobTitleAISuggestInput):
+    chain = get_chain(
+        "jd_title_suggestion",
+        lambda llm: LLMChain(llm=llm,prompt=job_title_prompt,verbose=True,output_parser=parser),
+        agent="jd_title_suggestion",
+        json_mode=True
     )
-
-    chain = LLMChain(llm=llm,prompt=job_title_prompt,verbose=True,output_parser=parser)
-
-
-    raw_output = chain.invoke({
+    return chain, {
         "title": job.title,
         "experienceRange": job.experienceRange,
         "department": job.department,
@@ -64,9 +61,22 @@ def title_suggests(job:JobTitleAISuggestInput):
         "education": job.education,
         "certifications": job.certifications or [],
         "niceToHave": job.niceToHave or []
-    })
+    }
+
+
+def _title_output(raw_output):
     if isinstance(raw_output, dict) and "text" in raw_output:
         parsed = raw_output["text"]
     else:
         parsed = raw_output
     return parsed
+
+
+def title_suggests(job:JobTitleAISuggestInput):
+    chain, inputs = _title_chain(job)
+    return _title_output(chain.invoke(inputs))
+
+
+async def atitle_suggests(job:JobTitleAISuggestInput):
+    chain, inputs = _title_chain(job)
+    return _title_output(await chain.ainvoke(inputs))
@@ -1,14 +1,12 @@
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 from agents.types import JobTagsOutput
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
+from app.services.json_repair import RepairingOutputParser
+from app.services.llm_clients import get_chain
+from app.services.prompt_payload import compact_prompt
 from config.Settings import settings
 
-def return_jd(title, experienceRange, job_description, key_responsibility,
-              technical_skill, soft_skill, education, nice_to_have):
-    
-    template = """
+template = """
     You are a professional job tag generator expert specializing in creating precise, role-specific tags for job postings.
 
     You are given the basic job information:
@@ -78,26 +76,25 @@ def return_jd(title, experienceRange, job_description, key_responsibility,
     Generate 8-15 tags that accurately represent this job role and requirements.
     """
 
-    
-    prompt = PromptTemplate(
-        input_variables=["title", "experienceRange", "job_description",
-                         "key_responsibility", "technical_skill",
-                         "soft_skill", "education", "nice_to_have"],
-        template=template
-    )
-
-    parser = PydanticOutputParser(pydantic_object=JobTagsOutput)
+prompt = PromptTemplate(
+    input_variables=["title", "experienceRange", "job_description",
+                     "key_responsibility", "technical_skill",
+                     "soft_skill", "education", "nice_to_have"],
+    template=compact_prompt(template)
+)
 
-    llm = ChatOpenAI(
-        model=settings.model,
-        api_key=settings.openai_api_key,
-        temperature=settings.temperature,
-        max_tokens=settings.max_output_tokens
-    )
+parser = RepairingOutputParser(pydantic_object=JobTagsOutput, agent="job_taging")
 
-    chain = LLMChain(llm=llm, prompt=prompt, verbose=True, output_parser=parser)
 
-    raw_output = chain.invoke({
+def _tags_chain(title, experienceRange, job_description, key_responsibility,
+                technical_skill, soft_skill, education, nice_to_have):
+    chain = get_chain(
+        "job_taging",
+        lambda llm: LLMChain(llm=llm, prompt=prompt, verbose=True, output_parser=parser),
+        agent="job_taging",
+        json_mode=True
+    )
+    return chain, {
         "title": title,
         "experienceRange": experienceRange,
         "job_description": job_description,
@@ -106,8 +103,10 @@ def return_jd(title, experienceRange, job_description, key_responsibility,
         "soft_skill": soft_skill,
         "education": education,
         "nice_to_have": nice_to_have
-    })
+    }
 
+
+def _tags_output(raw_output):
     if isinstance(raw_output, dict):
         if "tags" in raw_output:
             return raw_output
@@ -122,3 +121,16 @@ def return_jd(title, experienceRange, job_description, key_responsibility,
     else:
         raise ValueError(f"Unexpected output format: {raw_output}")
 
+
+def return_jd(title, experienceRange, job_description, key_responsibility,
+              technical_skill, soft_skill, education, nice_to_have):
+    chain, inputs = _tags_chain(title, experienceRange, job_description, key_responsibility,
+                                technical_skill, soft_skill, education, nice_to_have)
+    return _tags_output(chain.invoke(inputs))
+
+
+async def areturn_jd(title, experienceRange, job_description, key_responsibility,
+                     technical_skill, soft_skill, education, nice_to_have):
+    chain, inputs = _tags_chain(title, experienceRange, job_description, key_responsibility,
+                                technical_skill, soft_skill, education, nice_to_have)
+    return _tags_output(await chain.ainvoke(inputs))
@@ -1,12 +1,22 @@
-import re
 import json
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-from app.models.batch_analyze_model import JobCandidateData, CandidateAnalysisResponse
-from config.Settings import settings
+from langchain_core.output_parsers import StrOutputParser
+from app.services.json_repair import parse_json
+from app.services.llm_clients import get_chain
+from app.services.prompt_payload import compact_prompt, render_inputs
+from app.models.batch_analyze_model import (
+    AIInsights,
+    CandidateAnalysisResponse,
+    CandidateRequest,
+    JobCandidateData,
+    JobRequest,
+    SkillMatch,
+)
+from config.Settings import settings, QuotaLimitError
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import logging
@@ -20,17 +30,56 @@ def generate_batch_analysis(request: JobCandidateData) -> List[CandidateAnalysis
 
 async def generate_batch_analysis_async(request: JobCandidateData) -> List[CandidateAnalysisResponse]:
     """Async batch analysis with concurrent processing"""
-    max_concurrent = settings.batch_concurrent_limit
+    return await generate_pipeline_analysis_async(
+        [(job, request.candidates or []) for job in request.jobs or []],
+        threshold=request.threshold,
+        max_concurrent=settings.batch_concurrent_limit
+    )
+
+
+SKILL_ALIGNMENT_SCHEMA = {
+    "skillMatches": [
+        {"jobRequirement": "string", "candidateSkill": "string", "matchStrength": "string", "confidenceScore": 0}
+    ],
+    "skillGaps": ["string"],
+}
+
 
-    raw_prompt = """
+def _output_schema(include_skill_alignment: bool) -> dict:
+    """
+    Example of the expected JSON; skillMatches/skillGaps only with skill
+    alignment. Identity fields the model would only copy from the candidate
+    (id, name, email, phone, title), job_id, lastAnalyzedAt and each skill's
+    isVerified are filled in by _analysis_response.
+    """
+    return {
+        "experienceYears": "number",
+        "skills": [{"name": "string", "level": "string", "yearsOfExperience": 0}],
+        "availability": "string",
+        "matchScore": 0,
+        "aiInsights": {
+            "coreSkillsScore": 0,
+            "experienceScore": 0,
+            "culturalFitScore": 0,
+            "strengths": [{"category": "string", "point": "string", "impact": "string", "weight": 0}],
+            "concerns": ["string"],
+            "uniqueQualities": ["string"],
+            **(SKILL_ALIGNMENT_SCHEMA if include_skill_alignment else {}),
+            "recommendation": "string",
+            "confidenceLevel": 0,
+            "reasoningSummary": "string",
+        },
+        "notes": ["string"],
+    }
+
+
+ANALYSIS_PROMPT = """
     You are an expert AI recruiter analyzing candidate-job fit across all industries and roles.
 
     Evaluate this ONE candidate against this ONE job with precision and nuance.
     DIFFERENTIATE between candidates - avoid identical scores unless truly equivalent.
 
-    ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    UNIVERSAL SCORING FRAMEWORK
-    ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # UNIVERSAL SCORING FRAMEWORK
 
     ## 1. SKILLS MATCH SCORE (0-100) — Weight: 50%
 
@@ -104,18 +153,14 @@ async def generate_batch_analysis_async(request: JobCandidateData) -> List[Candi
     - 45-54: Questionable fit, some concerns
     - Below 45: Poor fit, red flags
 
-    ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    FINAL MATCH SCORE CALCULATION
-    ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # FINAL MATCH SCORE CALCULATION
 
     matchScore =
         (coreSkillsScore × 0.50) +
         (experienceScore × 0.30) +
         (culturalFitScore × 0.20)
 
-    ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    CRITICAL RULES
-    ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # CRITICAL RULES
 
     1. Calculate each component independently and precisely
     2. Use specific evidence from candidate data
@@ -134,72 +179,17 @@ async def generate_batch_analysis_async(request: JobCandidateData) -> List[Candi
        - End with clear hiring recommendation: "Recommended for interview" / "Consider for phone screen" / "May need additional training" / "Not recommended at this time"
        - Keep it concise (3-5 sentences max) but informative
 
-    ━━━━━━━━━━━
-    OUTPUT REQUIREMENTS
-    ━━━━━━━━━━━
+    # OUTPUT REQUIREMENTS
 
     Return ONLY valid JSON.
     No markdown. No explanations.
 
-    ━━━━━━━━━━━
-    JSON SCHEMA (STRICT)
-    ━━━━━━━━━━━
-
-    {{
-    "job_id": "string",
-    "id": "string",
-    "firstName": "string",
-    "lastName": "string",
-    "email": "string",
-    "phone": "string",
-    "currentTitle": "string",
-    "experienceYears": float,
-    "skills": [
-        {{
-        "name": "string",
-        "level": "string",
-        "yearsOfExperience": 0,
-        "isVerified": false
-        }}
-    ],
-    "availability": "string",
-    "matchScore": 0,
-    "aiInsights": {{
-        "coreSkillsScore": 0,
-        "experienceScore": 0,
-        "culturalFitScore": 0,
-        "strengths": [
-        {{
-            "category": "string",
-            "point": "string",
-            "impact": "string",
-            "weight": 0
-        }}
-        ],
-        "concerns": ["string"],
-        "uniqueQualities": ["string"],
-        "skillMatches": [
-        {{
-            "jobRequirement": "string",
-            "candidateSkill": "string",
-            "matchStrength": "string",
-            "confidenceScore": 0
-        }}
-        ],
-        "skillGaps": ["string"],
-        "recommendation": "string",
-        "confidenceLevel": 0,
-        "reasoningSummary": "string"
-    }},
-    "lastAnalyzedAt": "string (ISO datetime)",
-    "notes": ["string"]
-    }}
-
-    ━━━━━━━━━━━
-    DATA
-    ━━━━━━━━━━━
-
-    ### Data for Evaluation:
+    # JSON SCHEMA (STRICT)
+
+    {output_schema}
+
+    # DATA
+
     Job Information:
     {job_json}
 
@@ -208,97 +198,167 @@ async def generate_batch_analysis_async(request: JobCandidateData) -> List[Candi
 
     """
 
-    prompt_template = PromptTemplate.from_template(raw_prompt)
 
-    # Create list of all job-candidate pairs to process
-    tasks = []
-    for job in request.jobs or []:
-        for candidate in request.candidates or []:
-            tasks.append((job, candidate, prompt_template))
+@lru_cache(maxsize=None)
+def _build_prompt_template(include_skill_alignment: bool = True) -> PromptTemplate:
+    """
+    Candidate-vs-job analysis prompt, parsed once per variant. Without skill
+    alignment the schema omits skillMatches/skillGaps, which are then filled
+    locally from tag similarity.
+    """
+    return PromptTemplate.from_template(compact_prompt(ANALYSIS_PROMPT)).partial(
+        output_schema=json.dumps(_output_schema(include_skill_alignment), separators=(",", ":"))
+    )
+
+
+async def generate_pipeline_analysis_async(
+    job_candidates: List[Tuple[JobRequest, List[CandidateRequest]]],
+    threshold: Optional[int] = None,
+    max_concurrent: Optional[int] = None,
+    local_alignment: Optional[Callable[[JobRequest, CandidateRequest], Optional[Tuple[List[SkillMatch], List[str]]]]] = None
+) -> List[CandidateAnalysisResponse]:
+    """
+    Analyze (job, eligible candidates) batches for many jobs through one shared
+    work queue, so LLM slots stay saturated across job boundaries.
 
-    logger.info(f"Processing {len(tasks)} job-candidate pairs concurrently (max {max_concurrent} at a time)")
+    Raises QuotaLimitError if any pair was rejected because every API key
+    was cooling down.
 
-    # Process tasks concurrently with semaphore for rate limiting
-    semaphore = asyncio.Semaphore(max_concurrent)
+    ``local_alignment(job, candidate)`` may return (skillMatches, skillGaps)
+    computed from tag similarity; those pairs use a prompt without the two
+    sections and get the local values instead. Pairs it returns None for use
+    the full prompt.
 
-    async def process_single_analysis(job, candidate, prompt_template):
-        async with semaphore:
+    Results are returned grouped by job, in the order the jobs were given.
+    """
+    max_concurrent = max_concurrent or settings.batch_concurrent_limit
+    prompt_template = _build_prompt_template()
+    compact_template = _build_prompt_template(include_skill_alignment=False) if local_alignment else None
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrent * 2)
+    results: Dict[int, CandidateAnalysisResponse] = {}
+    quota_errors: List[QuotaLimitError] = []
+    total_pairs = sum(len(candidates) for _, candidates in job_candidates)
+
+    logger.info(f"Processing {total_pairs} job-candidate pairs across {len(job_candidates)} jobs "
+                f"(max {max_concurrent} at a time)")
+
+    async def produce():
+        seq = 0
+        for job, candidates in job_candidates:
+            for candidate in candidates:
+                await queue.put((seq, job, candidate))
+                seq += 1
+        for _ in range(max_concurrent):
+            await queue.put(None)
+
+    async def work():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            seq, job, candidate = item
             try:
-                return await asyncio.to_thread(_analyze_candidate_for_job, job, candidate, prompt_template)
+                alignment = local_alignment(job, candidate) if local_alignment else None
+                template = compact_template if alignment is not None else prompt_template
+                result = await _aanalyze_candidate_for_job(job, candidate, template)
+                if alignment is not None:
+                    result.aiInsights = result.aiInsights or AIInsights()
+                    result.aiInsights.skillMatches, result.aiInsights.skillGaps = alignment
+                results[seq] = result
+            except QuotaLimitError as e:
+                quota_errors.append(e)
             except Exception as e:
-                logger.error(f"Error processing candidate {getattr(candidate, 'candidateId', 'unknown')}: {str(e)}")
-                return None
+                logger.error(f"Error processing candidate {getattr(candidate, 'candidateId', 'unknown')} "
+                             f"for job {getattr(job, 'job_id', 'unknown')}: {str(e)}")
 
-    # Run all tasks concurrently
-    results = await asyncio.gather(
-        *[process_single_analysis(job, candidate, prompt_template) for job, candidate, prompt_template in tasks],
-        return_exceptions=True
-    )
+    await asyncio.gather(produce(), *[work() for _ in range(max_concurrent)])
+    if quota_errors:
+        # Every key is cooling down or the rate limiter refused: fail the batch rather than return it incomplete
+        logger.error(f"{len(quota_errors)} of {total_pairs} pairs rejected by the API quota")
+        raise quota_errors[0]
 
-    # Filter out None and exception results
-    all_results = [r for r in results if r is not None and isinstance(r, CandidateAnalysisResponse)]
+    # seq follows job order, so sorting keeps results grouped by job
+    all_results = [results[seq] for seq in sorted(results) if isinstance(results[seq], CandidateAnalysisResponse)]
 
     filtered_results = [
         candidate for candidate in all_results
-        if (candidate.matchScore or 0) >= (request.threshold or 0)
+        if (candidate.matchScore or 0) >= (threshold or 0)
     ]
 
     logger.info(f"Completed batch analysis: {len(all_results)} processed, {len(filtered_results)} passed threshold")
     return filtered_results
 
 
+def _extra_tags(tags: Optional[List[str]], skills: Optional[List[str]], title: Optional[str]) -> List[str]:
+    """Tags not already given as a skill or the title (tags are mostly generated from them)."""
+    listed = {value.lower() for value in (skills or []) + [title or ""]}
+    return [tag for tag in tags or [] if tag.lower() not in listed]
+
+
+def _analysis_inputs(job, candidate) -> Dict[str, str]:
+    job_data = {**job.dict(), "job_tag": _extra_tags(job.job_tag, job.technical_skills, job.title)}
+    candidate_data = {**candidate.dict(), "candidate_tag": _extra_tags(
+        candidate.candidate_tag, candidate.technical_skills, candidate.currentTitle
+    )}
+    return render_inputs("resume_analyze", {"job_json": job_data, "candidate_json": candidate_data})
+
+
+def _analysis_chain(prompt_template, build, kind: str = "llmchain"):
+    """The shared chain for ``prompt_template``, built on first use (it holds the template, so its id stays unique)."""
+    return get_chain(f"resume_analyze:{kind}:{id(prompt_template)}", build,
+                     temperature=0.4, agent="resume_analyze", json_mode=True)  # Higher temp for better score variation and differentiation
+
+
 def _analyze_candidate_for_job(job, candidate, prompt_template) -> CandidateAnalysisResponse:
-    """Process a single candidate-job pair (runs in thread pool)"""
+    """Process a single candidate-job pair (blocking)"""
     try:
-        # Create completely fresh LLM and chain for each call - no shared state
-        llm = ChatOpenAI(
-            model=settings.model,
-            api_key=settings.openai_api_key,
-            temperature=0.4,  # Higher temp for better score variation and differentiation
-            max_tokens=settings.max_output_tokens
-        )
-        chain = LLMChain(llm=llm, prompt=prompt_template)
-
-        job_json = json.dumps(job.dict(exclude_none=True), indent=2)
-        candidate_json = json.dumps(candidate.dict(exclude_none=True), indent=2)
-
-        raw_output = chain.invoke({"job_json": job_json, "candidate_json": candidate_json})
-        output_text = raw_output["text"] if isinstance(raw_output, dict) else raw_output
-        output_text = re.sub(r"^```(?:json)?\s*|\s*```$", "", output_text.strip(), flags=re.DOTALL)
+        chain = _analysis_chain(prompt_template, lambda llm: LLMChain(llm=llm, prompt=prompt_template))
+        return _analysis_response(chain.invoke(_analysis_inputs(job, candidate)), job, candidate)
+    except Exception as e:
+        logger.error(f"Error in _analyze_candidate_for_job: {str(e)}")
+        raise
 
+
+async def _aanalyze_candidate_for_job(job, candidate, prompt_template) -> CandidateAnalysisResponse:
+    """Process a single candidate-job pair on the running loop's pooled client"""
+    try:
+        chain = _analysis_chain(prompt_template, lambda llm: prompt_template | llm | StrOutputParser(), "lcel")
+        raw_output = await chain.ainvoke(_analysis_inputs(job, candidate))
+        return _analysis_response(raw_output, job, candidate)
+    except Exception as e:
+        logger.error(f"Error in _aanalyze_candidate_for_job: {str(e)}")
+        raise
+
+
+def _analysis_response(raw_output, job, candidate) -> CandidateAnalysisResponse:
+    """Parse the model's JSON (repaired locally if needed) and fill fields it left out from the request."""
+    output_text = raw_output["text"] if isinstance(raw_output, dict) else raw_output
+    response = parse_json(output_text, "resume_analyze")
+
+    response["job_id"] = job.job_id or ""
+    response["id"] = response.get("id") or getattr(candidate, "candidateId", "") or ""
+    response["firstName"] = response.get("firstName") or getattr(candidate, "name", "").split()[0] if getattr(candidate, "name", None) else ""
+    response["lastName"] = response.get("lastName") or " ".join(getattr(candidate, "name", "").split()[1:]) if getattr(candidate, "name", None) else ""
+    response["email"] = response.get("email") or getattr(candidate, "email", "") or ""
+    response["phone"] = response.get("phone") or getattr(candidate, "phone", "") or ""
+    response["currentTitle"] = response.get("currentTitle") or getattr(candidate, "currentTitle", "") or ""
+    response["experienceYears"] = response.get("experienceYears") or getattr(candidate, "experience_year", 0) or 0
+    response["availability"] = response.get("availability") or "2 weeks"
+    response["lastAnalyzedAt"] = datetime.now().isoformat()
+    response["notes"] = response.get("notes") or []
+
+    for s in response.get("skills", []):
+        if not isinstance(s.get("level"), str):
+            s["level"] = "Intermediate"
+        if not isinstance(s.get("yearsOfExperience"), (int, float)):
+            s["yearsOfExperience"] = 0
+        if "isVerified" not in s:
+            s["isVerified"] = False
+
+    for s in response.get("aiInsights", {}).get("strengths", []):
         try:
-            response = json.loads(output_text)
+            s["weight"] = float(s.get("weight", 0))
         except Exception:
-            cleaned = re.search(r"\{.*\}", output_text, re.DOTALL)
-            response = json.loads(cleaned.group(0)) if cleaned else {}
-
-        response["job_id"] = job.job_id or ""
-        response["id"] = response.get("id") or getattr(candidate, "candidateId", "") or ""
-        response["firstName"] = response.get("firstName") or getattr(candidate, "name", "").split()[0] if getattr(candidate, "name", None) else ""
-        response["lastName"] = response.get("lastName") or " ".join(getattr(candidate, "name", "").split()[1:]) if getattr(candidate, "name", None) else ""
-        response["email"] = response.get("email") or getattr(candidate, "email", "") or ""
-        response["phone"] = response.get("phone") or getattr(candidate, "phone", "") or ""
-        response["currentTitle"] = response.get("currentTitle") or getattr(candidate, "currentTitle", "") or ""
-        response["experienceYears"] = response.get("experienceYears") or getattr(candidate, "experience_year", 0) or 0
-        response["availability"] = response.get("availability") or "2 weeks"
-        response["lastAnalyzedAt"] = datetime.now().isoformat()
-        response["notes"] = response.get("notes") or []
-
-        for s in response.get("skills", []):
-            if not isinstance(s.get("level"), str):
-                s["level"] = "Intermediate"
-            if not isinstance(s.get("yearsOfExperience"), (int, float)):
-                s["yearsOfExperience"] = 0
-            if "isVerified" not in s:
-                s["isVerified"] = False
-
-        for s in response.get("aiInsights", {}).get("strengths", []):
-            try:
-                s["weight"] = float(s.get("weight", 0))
-            except Exception:
-                s["weight"] = 0.5
+            s["weight"] = 0.5
 
-        return CandidateAnalysisResponse(**response)
-    except Exception as e:
-        logger.error(f"Error in _analyze_candidate_for_job: {str(e)}")
-        raise
\ No newline at end of file
+    return CandidateAnalysisResponse(**response)
@@ -1,24 +1,23 @@
+import asyncio
 import json
 import time
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain.output_parsers import PydanticOutputParser
+from app.services.json_repair import RepairingOutputParser, parse_json, record_reask
+from app.services.llm_clients import get_chain, get_chat_model
+from app.services.prompt_payload import render_inputs
 from agents.types import CandidateAllInOne
 from app.services.text_extract import pdf_to_text
-from config.Settings import settings
+from config.Settings import settings, QuotaLimitError
 from datetime import datetime
+import logging
 
+logger = logging.getLogger(__name__)
 
 
-llm = ChatOpenAI(
-    model=settings.model,
-    api_key=settings.openai_api_key,
-    temperature=settings.temperature,
-    max_tokens=settings.max_output_tokens
-)
+llm = get_chat_model(agent="resume_extractor", json_mode=True)
 
-parser = PydanticOutputParser(pydantic_object=CandidateAllInOne)
+parser = RepairingOutputParser(pydantic_object=CandidateAllInOne, agent="resume_extractor")
 
 prompt = PromptTemplate(
     input_variables=["text","month","year"],
@@ -200,24 +199,18 @@ candidate_extraction_chain = LLMChain(
     verbose=True
 )
 
-def resume_extract_info(pdf_path):
-    input_text = pdf_to_text(pdf_path)
-    
-    # Get current month and year using time library
-    current_time = time.localtime()
-    month = current_time.tm_mon
-    year = current_time.tm_year
-    
+
+REASK_PROMPT = "Extract JSON only from this text:\n{text}"
+
+
+def _parse_fallback_output(raw_output: str) -> dict:
     try:
-        candidate = candidate_extraction_chain.run(text=input_text, month=month, year=year)
-        result = json.loads(candidate.json())  # Parse the JSON string into a dictionary
-    except Exception:
-        raw_output = llm.invoke(f"Extract JSON only from this text:\n{input_text}").content
-        try:
-            result = json.loads(raw_output)  # Ensure this is a dictionary
-        except json.JSONDecodeError as json_err:
-            raise Exception(f"Failed to parse extracted JSON: {str(json_err)}")
+        return parse_json(raw_output, "resume_extractor")
+    except ValueError as json_err:
+        raise Exception(f"Failed to parse extracted JSON: {str(json_err)}")
+
 
+def _add_experience_level(result: dict) -> dict:
     # Manually add Experience Level Tag based on experience_year
     if result.get('ai_analysis') and result['ai_analysis'].get('experience_year') is not None:
         exp_year = result['ai_analysis']['experience_year']
@@ -241,5 +234,51 @@ def resume_extract_info(pdf_path):
         if level_tag:
             result['ai_analysis']['experience_level'] = level_tag
 
-    print(result)
-    return result
\ No newline at end of file
+    logger.debug(f"Extracted resume data: {result}")
+    return result
+
+
+def resume_extract_info(pdf_path):
+    input_text = render_inputs("resume_extractor", {"text": pdf_to_text(pdf_path)})["text"]
+    
+    # Get current month and year using time library
+    current_time = time.localtime()
+    month = current_time.tm_mon
+    year = current_time.tm_year
+    
+    try:
+        candidate = candidate_extraction_chain.run(text=input_text, month=month, year=year)
+        result = json.loads(candidate.json())  # Parse the JSON string into a dictionary
+    except QuotaLimitError:
+        raise
+    except Exception:
+        # The parser already repaired what it could locally; only an unusable answer gets a second call
+        record_reask("resume_extractor")
+        raw_output = llm.invoke(REASK_PROMPT.format(text=input_text)).content
+        result = _parse_fallback_output(raw_output)
+
+    return _add_experience_level(result)
+
+
+async def aresume_extract_info(pdf_path):
+    """Async resume_extract_info: text extraction runs in a thread, the model calls are awaited."""
+    input_text = render_inputs("resume_extractor", {"text": await asyncio.to_thread(pdf_to_text, pdf_path)})["text"]
+
+    current_time = time.localtime()
+    month = current_time.tm_mon
+    year = current_time.tm_year
+
+    llm = get_chat_model(agent="resume_extractor", json_mode=True)
+    try:
+        chain = get_chain("resume_extractor", lambda model: prompt | model | parser, agent="resume_extractor",
+                          json_mode=True)
+        candidate = await chain.ainvoke({"text": input_text, "month": month, "year": year})
+        result = json.loads(candidate.json())
+    except QuotaLimitError:
+        raise
+    except Exception:
+        record_reask("resume_extractor")
+        raw_output = (await llm.ainvoke(REASK_PROMPT.format(text=input_text))).content
+        result = _parse_fallback_output(raw_output)
+
+    return _add_experience_level(result)
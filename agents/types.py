@@ -99,7 +99,13 @@ class JobDescriptionInput(BaseModel):
     soft_skill: Optional[List[str]]
     education: Optional[List[str]]
     nice_to_have: Optional[List[str]]
+    job_id: Optional[str] = None
+    return_vector_handle: bool = False
 
 
 class JobTagsOutput(BaseModel):
-    tags: Optional[List[str]]
\ No newline at end of file
+    tags: Optional[List[str]]
+
+
+class JobTagsResponse(JobTagsOutput):
+    vector_handle: Optional[str] = None
\ No newline at end of file
@@ -1,8 +1,11 @@
 from fastapi import FastAPI, Request, HTTPException
-from app.routes import feedback_operation, jd_operation, jd_refine, resume_data, chatbot
+from fastapi.responses import PlainTextResponse
+from app.routes import feedback_operation, jd_operation, jd_refine, resume_data, chatbot, candidate_search
 from fastapi.middleware.cors import CORSMiddleware
 from config.logging import setup_logging
 from config.Settings import settings
+from app.services.llm_clients import get_client_registry
+from app.services.llm_metrics import get_llm_metrics
 from starlette.middleware.base import BaseHTTPMiddleware
 
 setup_logging()
@@ -32,6 +35,7 @@ app.include_router(jd_refine.router, prefix=api_v1, tags=["Job Refinement"])
 app.include_router(resume_data.router, prefix=api_v1, tags=["Resume Processing"])
 app.include_router(feedback_operation.router, prefix=api_v1, tags=["Feedback Processing"])
 app.include_router(chatbot.router, prefix=api_v1, tags=["Chatbot"])
+app.include_router(candidate_search.router, prefix=api_v1, tags=["Candidate Search"])
 
 
 app.add_middleware(
@@ -47,6 +51,17 @@ app.add_middleware(
 def health_check():
     return {"status": "healthy", "service": "TalentPulse-AI"}
 
+
+@app.get("/health/clients")
+def client_pool_stats():
+    return get_client_registry().stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def llm_metrics():
+    """Per-agent LLM tokens, cost, latency and retries in the Prometheus text format."""
+    return PlainTextResponse(get_llm_metrics().render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
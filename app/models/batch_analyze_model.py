@@ -1,5 +1,5 @@
-from typing import List, Optional
-from pydantic import BaseModel, EmailStr
+from typing import Dict, List, Optional
+from pydantic import BaseModel, EmailStr, Field, validator
 
 class JobRequest(BaseModel):
     job_id: Optional[str]
@@ -26,10 +26,75 @@ class CandidateRequest(BaseModel):
     qualification: Optional[List[str]]
     candidate_tag: Optional[List[str]]
 
+class MatchMetrics(BaseModel):
+    """Every prefilter metric derived from one candidate-tag x job-tag similarity matrix"""
+    max_similarity: float = Field(0.0, description="Best single tag-pair cosine similarity (0-1)")
+    top_k_mean: float = Field(0.0, description="Mean of the top-3 best-per-job-tag similarities (0-1)")
+    coverage_ratio: float = Field(0.0, description="Share of job tags with a decent (>= 0.45) match (0-1)")
+    avg_quality: float = Field(0.0, description="Mean best-per-job-tag similarity (0-1)")
+    domain_relevance: float = Field(0.0, description="check_domain_relevance score (0-100)")
+    strict_relevance: float = Field(0.0, description="check_domain_relevance_strict score (0-100)")
+    weighted_coverage: float = Field(0.0, description="calculate_weighted_coverage_score score (0-100)")
+
+
 class JobCandidateData(BaseModel):
     jobs: Optional[List[JobRequest]]
     candidates: Optional[List[CandidateRequest]]
     threshold: Optional[int] = 50
+    eligibility_gates: Optional[Dict[str, float]] = None
+    max_llm_candidates_per_job: Optional[int] = Field(None, ge=1)
+    local_skill_alignment: Optional[bool] = None
+
+    @validator('eligibility_gates')
+    def validate_eligibility_gates(cls, v):
+        unknown = set(v or {}) - set(MatchMetrics.model_fields)
+        if unknown:
+            raise ValueError(f"Unknown eligibility metrics: {', '.join(sorted(unknown))}")
+        return v
+
+
+class PairMatch(BaseModel):
+    job_id: Optional[str] = None
+    candidateId: Optional[str] = None
+    eligible: bool = False
+    metrics: MatchMetrics
+
+class ScreeningResponse(BaseModel):
+    job_ids: List[Optional[str]] = []
+    candidate_ids: List[Optional[str]] = []
+    eligibility_gates: Dict[str, float] = {}
+    min_score: float = 0.0
+    scored_pairs: int = 0
+    unscored_pairs: int = 0
+    lexically_skipped_pairs: int = 0
+    eligible_pairs: int = 0
+    matches: List[PairMatch] = []
+
+
+class CandidateSearchRequest(BaseModel):
+    job: JobRequest
+    top_k: int = Field(50, ge=1, le=5000)
+    n_probe: Optional[int] = Field(None, ge=1, description="Coarse lists to scan; higher = better recall, slower")
+
+class CandidateSearchHit(BaseModel):
+    candidateId: Optional[str] = None
+    score: float
+
+class CandidateSearchResponse(BaseModel):
+    job_id: Optional[str] = None
+    results: List[CandidateSearchHit] = []
+    n_lists: int = 0
+    n_probe: int = 0
+    scanned_candidates: int = 0
+    latency_ms: float = 0.0
+
+class CandidateIndexBuildRequest(BaseModel):
+    candidates: List[CandidateRequest]
+    n_lists: Optional[int] = Field(None, ge=1)
+
+class CandidateIndexBuildResponse(BaseModel):
+    indexed_candidates: int
+    n_lists: int
 
     
 class Strength(BaseModel):
@@ -58,6 +123,7 @@ class AIInsights(BaseModel):
     reasoningSummary: Optional[str] = None
 
 class CandidateAnalysisResponse(BaseModel):
+    job_id: Optional[str] = None
     id: Optional[str] = None
     firstName: Optional[str] = None
     lastName: Optional[str] = None
@@ -68,6 +134,7 @@ class CandidateAnalysisResponse(BaseModel):
     skills: Optional[List[dict]] = []
     availability: Optional[str] = None
     matchScore: Optional[float] = 0.0
+    prefilterScore: Optional[float] = None
     aiInsights: Optional[AIInsights] = AIInsights()
     lastAnalyzedAt: Optional[str] = None
     applicationStatus: Optional[str] = "screening"
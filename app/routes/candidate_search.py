@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from fastapi import APIRouter, HTTPException
+from app.models.batch_analyze_model import (
+    CandidateIndexBuildRequest,
+    CandidateIndexBuildResponse,
+    CandidateSearchHit,
+    CandidateSearchRequest,
+    CandidateSearchResponse,
+)
+from app.services.candidate_index import build_candidate_index, get_candidate_index
+from app.services.embedding_store import get_embeddings
+from app.services.rate_limiter import quota_http_exception
+from app.services.tag_canonicalizer import get_tag_canonicalizer
+from config.Settings import settings, QuotaLimitError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/ai/candidate-index", response_model=CandidateIndexBuildResponse)
+async def build_candidate_index_api(request: CandidateIndexBuildRequest):
+    try:
+        index = await asyncio.to_thread(
+            build_candidate_index,
+            settings.candidate_index_directory,
+            [c.candidateId for c in request.candidates],
+            [c.candidate_tag for c in request.candidates],
+            get_embeddings(),
+            request.n_lists
+        )
+        return CandidateIndexBuildResponse(indexed_candidates=len(index), n_lists=index.n_lists)
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=str(ve))
+    except QuotaLimitError as qe:
+        logger.error(f"Quota limit reached: {str(qe)}")
+        raise quota_http_exception(qe)
+    except Exception as e:
+        logger.error(f"Error building candidate index: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to build candidate index")
+
+
+@router.post("/ai/search-candidates", response_model=CandidateSearchResponse)
+async def search_candidates_api(request: CandidateSearchRequest):
+    if not request.job.job_tag:
+        raise HTTPException(status_code=422, detail="job.job_tag must contain at least one tag")
+
+    index = get_candidate_index()
+    if index is None:
+        raise HTTPException(status_code=404, detail="Candidate index has not been built")
+
+    job_tags = [tag.strip() for tag in request.job.job_tag if isinstance(tag, str) and tag.strip()]
+    if index.meta.get("canonicalized"):
+        job_tags = [tag for tag in map(get_tag_canonicalizer().canonicalize, job_tags) if tag]
+    if not job_tags:
+        # A mean over no job vectors would make every score NaN
+        raise HTTPException(status_code=400, detail="job.job_tag has no non-blank tags")
+
+    try:
+        job_vectors = await get_embeddings().aembed_documents(job_tags)
+        hits, stats = await asyncio.to_thread(index.search, job_vectors, request.top_k, request.n_probe)
+
+        logger.info(f"Candidate search for job {request.job.job_id}: {stats}")
+        return CandidateSearchResponse(
+            job_id=request.job.job_id,
+            results=[CandidateSearchHit(candidateId=cid, score=round(score, 2)) for cid, score in hits],
+            **stats
+        )
+    except QuotaLimitError as qe:
+        logger.error(f"Quota limit reached: {str(qe)}")
+        raise quota_http_exception(qe)
+    except Exception as e:
+        logger.error(f"Error searching candidates: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to search candidates")
@@ -1,9 +1,10 @@
 import logging
 from fastapi import APIRouter, HTTPException
 from app.models.chatbot_model import CandidateMatchingRequest,ChatRequest,ChatResponse
-from agents.ask_ai import ask_ai
+from agents.ask_ai import aask_ai
 import json, os
 from config.Settings import QuotaLimitError
+from app.services.rate_limiter import quota_http_exception
 
 router = APIRouter()
 FILE_PATH = "candidate_data.txt"
@@ -22,14 +23,14 @@ def save_candidate_matching(request: CandidateMatchingRequest):
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_ai(request: ChatRequest):
     try:
-        response = ask_ai(request.question)
+        response = await aask_ai(request.question)
         return ChatResponse(answer=response)
 
     except HTTPException as e:
         raise e
     except QuotaLimitError as qe:
         logging.error(f"Quota limit reached: {str(qe)}")
-        raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+        raise quota_http_exception(qe)
     except Exception as e:
         logging.error(f"Error processing chat request: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to process chat request")
\ No newline at end of file
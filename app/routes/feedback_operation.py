@@ -2,33 +2,34 @@ from fastapi import APIRouter, HTTPException
 from typing import List
 import logging
 from app.models.feedback_model import EnhanceFeedbackRequest, EnhanceFeedbackResponse
-from agents.ai_feedback import enhance_feedback
+from agents.ai_feedback import aenhance_feedback
 from app.models.evaluation_model import InterviewSummaryRequest, EvaluationResponse
-from agents.evaluation_agent import evaluate_interview
+from agents.evaluation_agent import aevaluate_interview
 from config.Settings import QuotaLimitError
+from app.services.rate_limiter import quota_http_exception
 
 router = APIRouter()
 
 @router.post("/evaluate-feedback", response_model=EnhanceFeedbackResponse)
-def analyze_feedback(feedback:EnhanceFeedbackRequest):
+async def analyze_feedback(feedback:EnhanceFeedbackRequest):
     try:
-        response = enhance_feedback(feedback)
+        response = await aenhance_feedback(feedback)
         return response
     except QuotaLimitError as qe:
         logging.error(f"Quota limit reached: {str(qe)}")
-        raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+        raise quota_http_exception(qe)
     except Exception as e:
         logging.error(f"Error evaluating feedback: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to evaluate feedback")
 
 @router.post("/evaluate-interview", response_model=EvaluationResponse)
-def evaluate_interview_feedback(request: InterviewSummaryRequest):
+async def evaluate_interview_feedback(request: InterviewSummaryRequest):
     try:
-        response = evaluate_interview(request)
+        response = await aevaluate_interview(request)
         return response
     except QuotaLimitError as qe:
         logging.error(f"Quota limit reached: {str(qe)}")
-        raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+        raise quota_http_exception(qe)
     except Exception as e:
         logging.error(f"Error evaluating interview: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to evaluate interview")
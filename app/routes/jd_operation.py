@@ -1,20 +1,22 @@
 from fastapi import APIRouter, HTTPException
-from agents.job_taging import return_jd
-from agents.jd_genrator import return_jd as jd
-from agents.jd_title_suggestion import title_suggests
-from agents.types import JobDescriptionInput, JobTagsOutput
+from agents.job_taging import areturn_jd
+from agents.jd_genrator import areturn_jd as ajd
+from agents.jd_title_suggestion import atitle_suggests
+from agents.types import JobDescriptionInput, JobTagsResponse
+from app.services.tag_registry import aembed_ingested_tags
 from app.models.jd_model import JobInput, JobTitleAISuggestInput, JobDescriptionResponse, TitleSuggestionResponse
 import json
 import logging
 from app.models.resume_analyze_model import BatchAnalyzeRequest, BatchAnalyzeResponse
 from config.Settings import QuotaLimitError
+from app.services.rate_limiter import quota_http_exception
 
 router = APIRouter()
 
 @router.post("/generate-job-description", response_model=JobDescriptionResponse)
-def generate_job_description(job: JobInput):
+async def generate_job_description(job: JobInput):
     try:
-        response = jd(
+        response = await ajd(
             title=job.title,
             experienceRange=job.experienceRange,
             department=job.department,
@@ -23,28 +25,28 @@ def generate_job_description(job: JobInput):
         return response
     except QuotaLimitError as e:
         logging.error(f"Quota limit reached: {str(e)}")
-        raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+        raise quota_http_exception(e)
     except Exception as e:
         logging.error(f"Error generating job description: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to generate job description")
 
 @router.post("/generate-AI-titleSuggestion", response_model=TitleSuggestionResponse)
-def job_title_suggestion(job: JobTitleAISuggestInput):
+async def job_title_suggestion(job: JobTitleAISuggestInput):
     try:
-        response = title_suggests(job)
+        response = await atitle_suggests(job)
         return response
     except QuotaLimitError as e:
         logging.error(f"Quota limit reached: {str(e)}")
-        raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+        raise quota_http_exception(e)
     except Exception as e:
         logging.error(f"Error generating title suggestions: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to generate title suggestions")
     
 
-@router.post("/generate-job-tags", response_model=JobTagsOutput)
-def generate_job_tags(job: JobDescriptionInput):
+@router.post("/generate-job-tags", response_model=JobTagsResponse)
+async def generate_job_tags(job: JobDescriptionInput):
     try:
-        response = return_jd(
+        response = await areturn_jd(
             title=job.title,
             experienceRange=job.experienceRange,
             job_description=job.job_description,
@@ -54,10 +56,12 @@ def generate_job_tags(job: JobDescriptionInput):
             education=job.education,
             nice_to_have=job.nice_to_have
         )
-        return JobTagsOutput(tags=response.get("tags", []))
+        tags = response.get("tags", [])
+        vector_handle = await aembed_ingested_tags("job", tags, key=job.job_id)
+        return JobTagsResponse(tags=tags, vector_handle=vector_handle if job.return_vector_handle else None)
     except QuotaLimitError as e:
         logging.error(f"Quota limit reached: {str(e)}")
-        raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+        raise quota_http_exception(e)
     except Exception as e:
         logging.error(f"Error generating job tags: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to generate job tags")
@@ -5,7 +5,9 @@ from agents.jd_regenrate import key_resp_chain_re, soft_chain_re, tech_chain_re,
 from agents.jd_enhance import nice_chain,cert_chain,edu_chain,tech_chain,soft_chain,key_resp_chain
 import logging
 from typing import Dict, Any
+from app.services.llm_clients import ainvoke_chain
 from config.Settings import QuotaLimitError
+from app.services.rate_limiter import quota_http_exception
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
@@ -63,7 +65,7 @@ def prepare_context(job_dict: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 @router.post("/regenerate-job-field")
-def regenerate_job_field(job: JobRefineInput):
+async def regenerate_job_field(job: JobRefineInput):
     """
     Regenerate specific job description fields based on input.
 
@@ -100,7 +102,7 @@ def regenerate_job_field(job: JobRefineInput):
 
                 try:
                     logger.debug(f"Invoking chain for {field_name} with payload: {payload}")
-                    output = chain.invoke(payload)
+                    output = await ainvoke_chain(chain, payload)
                     result = process_field_output(output, field_name)
 
                     logger.info(f"Successfully regenerated {field_name} with {len(result)} items")
@@ -112,7 +114,7 @@ def regenerate_job_field(job: JobRefineInput):
 
                 except QuotaLimitError as qe:
                     logger.error(f"Quota limit reached: {str(qe)}")
-                    raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+                    raise quota_http_exception(qe)
 
                 except Exception as e:
                     logger.error(f"Unexpected error processing {field_name}: {str(e)}", exc_info=True)
@@ -128,7 +130,7 @@ def regenerate_job_field(job: JobRefineInput):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.post("/enhance-job-field")
-def enhance_job_field(job: JobRefineInput):
+async def enhance_job_field(job: JobRefineInput):
     """
     Enhance specific job description fields based on input.
 
@@ -165,7 +167,7 @@ def enhance_job_field(job: JobRefineInput):
 
                 try:
                     logger.debug(f"Invoking chain for {field_name} with payload: {payload}")
-                    output = chain.invoke(payload)
+                    output = await ainvoke_chain(chain, payload)
                     result = process_field_output(output, field_name)
 
                     logger.info(f"Successfully enhanced {field_name} with {len(result)} items")
@@ -177,7 +179,7 @@ def enhance_job_field(job: JobRefineInput):
 
                 except QuotaLimitError as qe:
                     logger.error(f"Quota limit reached: {str(qe)}")
-                    raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+                    raise quota_http_exception(qe)
 
                 except Exception as e:
                     logger.error(f"Unexpected error processing {field_name}: {str(e)}", exc_info=True)
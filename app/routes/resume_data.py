@@ -1,23 +1,41 @@
+import asyncio
 import base64
 import json
 import mimetypes
 import os
-from typing import List, Dict, Any
-from fastapi import APIRouter, HTTPException
+from typing import List, Dict, Any, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, validator
-from agents.ai_prompt_question import generate_prompt_based_questions
-from agents.resume_extractor import resume_extract_info
+from agents.ai_prompt_question import agenerate_prompt_based_questions
+from agents.resume_extractor import aresume_extract_info
 import logging
 import uuid
 from pathlib import Path
 from app.models.resume_analyze_model import AIPromptQuestionRequest, AIPromptQuestionResponse, AIQuestionRequest, AIQuestionResponse
-from app.services.ai_match_score import calculate_weighted_coverage_score, check_domain_relevance, check_domain_relevance_strict
+from app.services.ai_match_score import (
+    MATCH_METRIC_NAMES,
+    abuild_tag_matrix,
+    align_tags,
+    borderline_mask,
+    collect_unique_tags,
+    eligibility_mask,
+    pair_metrics,
+    score_all_pairs,
+    tag_lookup,
+    tag_rows,
+)
+from app.services.embedding_store import get_embeddings
+from app.services.lexical_prefilter import lexical_overlap_mask
+from app.services.local_embeddings import get_local_embeddings
+from app.services.tag_canonicalizer import get_tag_canonicalizer, prefilter_canonicalizer
+from app.services.pair_score_cache import get_pair_score_cache, scoring_scope
+from app.services.rate_limiter import quota_error_detail, quota_http_exception
+from app.services.tag_registry import aembed_ingested_tags, get_tag_registry, tags_fingerprint
 from config.Settings import settings, QuotaLimitError
-from app.models.batch_analyze_model import JobCandidateData, CandidateAnalysisResponse
-from agents.resume_analyze import generate_batch_analysis_async
-from agents.ai_question_generate import generate_interview_questions
+from app.models.batch_analyze_model import JobCandidateData, CandidateAnalysisResponse, PairMatch, ScreeningResponse
+from agents.resume_analyze import generate_pipeline_analysis_async
+from agents.ai_question_generate import agenerate_interview_questions
 from sklearn.metrics.pairwise import cosine_similarity
-from langchain_openai import OpenAIEmbeddings
 from langsmith import traceable
 import numpy as np
 logger = logging.getLogger(__name__)
@@ -27,6 +45,7 @@ router = APIRouter()
 class FilePayload(BaseModel):
     file_name: str
     file_data: str
+    candidate_id: Optional[str] = None
 
     @validator('file_name')
     def validate_file_name(cls, v):
@@ -52,6 +71,7 @@ class FilePayload(BaseModel):
 
 class MultipleFiles(BaseModel):
     files: List[FilePayload]
+    return_vector_handle: bool = False
 
     @validator('files')
     def validate_files_list(cls, v):
@@ -154,10 +174,10 @@ def save_file_temporarily(file_bytes: bytes, file_name: str, request_id: str) ->
         logger.error(f"Failed to save file {file_name}: {str(e)}")
         raise OSError(f"Failed to save file {file_name}: {str(e)}")
 
-def extract_resume_data(file_path: Path, file_name: str) -> Dict[str, Any]:
+async def extract_resume_data(file_path: Path, file_name: str) -> Dict[str, Any]:
     try:
         logger.info(f"Starting resume extraction for file: {file_name}")
-        resume_data = resume_extract_info(str(file_path))
+        resume_data = await aresume_extract_info(str(file_path))
 
         logger.info(f"Successfully extracted resume data from {file_name}")
         return {
@@ -171,7 +191,7 @@ def extract_resume_data(file_path: Path, file_name: str) -> Dict[str, Any]:
         return {
             "file_name": file_name,
             "status": "error",
-            "error": "All API keys have reached their quota limit. Please try again later."
+            "error": quota_error_detail(qe)
         }
     except Exception as e:
         logger.error(f"Resume extraction failed for {file_name}: {str(e)}", exc_info=True)
@@ -190,7 +210,7 @@ def cleanup_file(file_path: Path, file_name: str) -> None:
         logger.warning(f"Failed to cleanup file {file_name}: {str(e)}")
 
 @router.post("/parse-cv", response_model=ResumeExtractionResponse)
-def parse_resumes(payload: MultipleFiles):
+async def parse_resumes(payload: MultipleFiles):
     request_id = uuid.uuid4().hex
     logger.info(f"Starting resume parsing request {request_id} with {len(payload.files)} files")
 
@@ -256,11 +276,16 @@ def parse_resumes(payload: MultipleFiles):
                     failed_extractions += 1
                     continue
 
-                result = extract_resume_data(temp_file_path, file_name)
+                result = await extract_resume_data(temp_file_path, file_name)
                 extracted_data.append(result)
 
                 if result.get("status") == "success":
                     successful_extractions += 1
+                    vector_handle = await aembed_ingested_tags(
+                        "candidate", (result.get("extracted_info") or {}).get("tags"), key=file.candidate_id
+                    )
+                    if payload.return_vector_handle:
+                        result["vector_handle"] = vector_handle
                 else:
                     failed_extractions += 1
 
@@ -294,6 +319,350 @@ def parse_resumes(payload: MultipleFiles):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+def lexical_prefilter(jobs, candidates, canonicalize) -> Optional[np.ndarray]:
+    """
+    jobs x candidates mask of pairs sharing at least one (fuzzy) lexical tag
+    key, or None when LEXICAL_PREFILTER is off.
+    """
+    if not settings.lexical_prefilter:
+        return None
+
+    overlap = lexical_overlap_mask(
+        [job.job_tag for job in jobs],
+        [c.candidate_tag for c in candidates],
+        canonicalize,
+        settings.lexical_fuzzy_threshold or None
+    )
+    skipped_candidates = int((~overlap.any(axis=0)).sum())
+    logger.info(f"Lexical prefilter: skipped {int((~overlap).sum())} of {overlap.size} pairs "
+               f"({(~overlap).mean():.1%}); {skipped_candidates} of {len(candidates)} candidates "
+               f"share no tag with any job and are not embedded")
+    return overlap
+
+
+async def score_pairs_with(embeddings, jobs, candidates):
+    """
+    Embed the unique tag vocabulary once with ``embeddings``, then score
+    every job x candidate pair in one vectorized pass.
+
+    With LEXICAL_PREFILTER, pairs without any lexical tag overlap are not
+    vector-scored: all their metrics are 0 and ``metric_matrices["lexical_skip"]``
+    marks them.
+
+    Returns: (metric matrices or None if the prefilter failed, job rows,
+    candidate rows, tag_lookup over the embedded tags or None)
+    """
+    canonicalize = prefilter_canonicalizer()
+    overlap = lexical_prefilter(jobs, candidates, canonicalize)
+    embedded = [c for i, c in enumerate(candidates) if overlap is None or overlap[:, i].any()]
+
+    tag_lists = [job.job_tag for job in jobs] + [c.candidate_tag for c in embedded]
+    try:
+        tag_index, tag_matrix = await abuild_tag_matrix(
+            tag_lists,
+            embeddings,
+            chunk_size=settings.embedding_chunk_size,
+            max_concurrency=settings.embedding_concurrent_limit,
+            canonicalize=canonicalize
+        )
+        store = getattr(embeddings, "store", None)
+        logger.info(f"Embedded {len(tag_index)} unique tags for {len(jobs)} jobs x {len(embedded)} candidates"
+                   + (f" (embedding store: {store.stats()})" if store is not None else ""))
+        if canonicalize is not None:
+            logger.info(f"Tag canonicalization: {get_tag_canonicalizer().vocabulary_reduction(tag_lists)}")
+    except Exception as e:
+        logger.warning(f"Tag embedding pre-pass failed, skipping cosine prefilter: {str(e)}")
+        return None, [[] for _ in jobs], [[] for _ in candidates], None
+
+    lookup = tag_lookup(tag_index, tag_matrix, canonicalize)
+    job_rows = [tag_rows(job.job_tag, tag_index, canonicalize) for job in jobs]
+    candidate_rows = [
+        tag_rows(c.candidate_tag, tag_index, canonicalize) if overlap is None or overlap[:, i].any() else []
+        for i, c in enumerate(candidates)
+    ]
+
+    try:
+        metric_matrices = await asyncio.to_thread(score_all_pairs, tag_matrix, candidate_rows, job_rows)
+    except Exception as e:
+        logger.warning(f"Error calculating match scores, skipping cosine prefilter: {str(e)}")
+        return None, job_rows, candidate_rows, lookup
+
+    if overlap is not None:
+        job_has_tags = np.array([bool(rows) for rows in job_rows])
+        candidate_has_tags = np.array([bool(collect_unique_tags([c.candidate_tag], canonicalize)) for c in candidates])
+        skipped = ~overlap & job_has_tags[:, None] & candidate_has_tags[None, :]
+        for name in MATCH_METRIC_NAMES:
+            metric_matrices[name][skipped] = 0.0
+        metric_matrices["lexical_skip"] = skipped
+
+    return metric_matrices, job_rows, candidate_rows, lookup
+
+
+async def rescore_borderline_pairs(jobs, candidates, metric_matrices, eligibility_gates) -> None:
+    """
+    Hybrid backend: replace the local scores of pairs near an eligibility
+    gate with scores from the remote embedding model, in place. Pairs far
+    from every gate keep their local decision.
+    """
+    borderline = borderline_mask(metric_matrices, eligibility_gates, settings.hybrid_borderline_margin)
+    if "lexical_skip" in metric_matrices:
+        borderline &= ~metric_matrices["lexical_skip"]
+    scored = int((~np.isnan(metric_matrices["weighted_coverage"])).sum())
+    if not borderline.any():
+        logger.info(f"Hybrid prefilter: no borderline pairs among {scored} scored pairs")
+        return
+
+    job_idx = np.flatnonzero(borderline.any(axis=1))
+    candidate_idx = np.flatnonzero(borderline.any(axis=0))
+    remote, _, _, _ = await score_pairs_with(
+        get_embeddings(),
+        [jobs[j] for j in job_idx],
+        [candidates[c] for c in candidate_idx]
+    )
+    if remote is None:
+        logger.warning(f"Hybrid prefilter: remote rescoring failed, keeping local scores for "
+                      f"{int(borderline.sum())} borderline pairs")
+        return
+
+    block = np.ix_(job_idx, candidate_idx)
+    rescored = borderline[block]
+    for name in MATCH_METRIC_NAMES:
+        values = metric_matrices[name][block]
+        values[rescored] = remote[name][rescored]
+        metric_matrices[name][block] = values
+
+    logger.info(f"Hybrid prefilter: rescored {int(borderline.sum())} of {scored} pairs with remote embeddings "
+               f"({len(job_idx)} jobs x {len(candidate_idx)} candidates embedded remotely)")
+
+
+def backend_embeddings():
+    """Embeddings the prefilter scores with first: remote for "openai", offline for "local"/"hybrid"."""
+    backend = settings.embedding_backend.lower()
+    if backend == "openai":
+        return get_embeddings()
+    if backend not in ("local", "hybrid"):
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{settings.embedding_backend}'")
+    return get_local_embeddings()
+
+
+async def score_with_backend(jobs, candidates, eligibility_gates: Dict[str, float]):
+    """
+    EMBEDDING_BACKEND picks the embeddings: "openai" (remote model),
+    "local" (offline n-gram vectors only) or "hybrid" (local for every pair,
+    remote only for pairs near an eligibility gate).
+
+    Returns: the score_pairs_with tuple for the chosen backend
+    """
+    metric_matrices, job_rows, candidate_rows, lookup = await score_pairs_with(backend_embeddings(), jobs, candidates)
+    if settings.embedding_backend.lower() == "hybrid" and metric_matrices is not None:
+        await rescore_borderline_pairs(jobs, candidates, metric_matrices, eligibility_gates)
+    return metric_matrices, job_rows, candidate_rows, lookup
+
+
+def _missing_blocks(missing: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Cover the missing pairs with few (jobs, candidates) blocks: jobs missing
+    most of the pool (new or edited jobs) are rescored against it alone, the
+    remaining gaps (new candidates) against the other jobs in one block.
+    """
+    blocks = []
+    missing = missing.copy()
+    mostly_missing = missing.sum(axis=1) * 2 >= missing.shape[1]
+    if mostly_missing.any():
+        job_idx = np.flatnonzero(mostly_missing)
+        candidate_idx = np.flatnonzero(missing[job_idx].any(axis=0))
+        blocks.append((job_idx, candidate_idx))
+        missing[job_idx] = False
+    if missing.any():
+        blocks.append((np.flatnonzero(missing.any(axis=1)), np.flatnonzero(missing.any(axis=0))))
+    return blocks
+
+
+async def incremental_match_matrices(request: JobCandidateData, eligibility_gates: Dict[str, float]):
+    """
+    score_with_backend over only the pairs missing from the pair score
+    cache. Pairs are keyed by job and candidate tag fingerprints, so new
+    candidates are scored against the existing jobs, an edited job against
+    the pool, and unchanged pairs are served from the stored matrix.
+
+    Job/candidate rows are left empty and no tag lookup is returned, since
+    cached pairs need no embedding; see build_alignment_lookup.
+    """
+    jobs, candidates = request.jobs, request.candidates
+    canonicalize = prefilter_canonicalizer()
+
+    def fingerprint(tags):
+        return tags_fingerprint(tags, canonicalize) if collect_unique_tags([tags], canonicalize) else None
+
+    job_fps = [fingerprint(job.job_tag) for job in jobs]
+    candidate_fps = [fingerprint(c.candidate_tag) for c in candidates]
+    scope = scoring_scope(eligibility_gates)
+    cache = get_pair_score_cache()
+
+    try:
+        metric_matrices, hit = await asyncio.to_thread(cache.get_matrix, scope, job_fps, candidate_fps)
+    except Exception as e:
+        logger.warning(f"Pair score cache unavailable, scoring every pair: {str(e)}")
+        return await score_with_backend(jobs, candidates, eligibility_gates)
+
+    has_tags = np.array([fp is not None for fp in job_fps])[:, None] & np.array([fp is not None for fp in candidate_fps])[None, :]
+    missing = has_tags & ~hit
+    blocks = _missing_blocks(missing)
+    for job_idx, candidate_idx in blocks:
+        block_matrices, _, _, _ = await score_with_backend(
+            [jobs[j] for j in job_idx], [candidates[c] for c in candidate_idx], eligibility_gates
+        )
+        if block_matrices is None:
+            return None, [[] for _ in jobs], [[] for _ in candidates], None
+
+        block = np.ix_(job_idx, candidate_idx)
+        fresh = missing[block]
+        for name in MATCH_METRIC_NAMES + ["lexical_skip"]:
+            if name in block_matrices:
+                values = metric_matrices[name][block]
+                values[fresh] = block_matrices[name][fresh]
+                metric_matrices[name][block] = values
+        try:
+            await asyncio.to_thread(
+                cache.put_pairs, scope, [job_fps[j] for j in job_idx], [candidate_fps[c] for c in candidate_idx],
+                block_matrices, fresh
+            )
+        except Exception as e:
+            logger.warning(f"Could not store {int(fresh.sum())} pair scores: {str(e)}")
+
+    logger.info(f"Incremental matching: {int((hit & has_tags).sum())} of {int(has_tags.sum())} pairs served from "
+               f"the score cache, {int(missing.sum())} scored in {len(blocks)} blocks")
+    if not settings.lexical_prefilter:
+        del metric_matrices["lexical_skip"]
+
+    return metric_matrices, [[] for _ in jobs], [[] for _ in candidates], None
+
+
+async def compute_match_matrices(request: JobCandidateData, eligibility_gates: Dict[str, float]):
+    """
+    Cosine prefilter shared by the batch-analyze and screening endpoints.
+    With INCREMENTAL_MATCHING, unchanged pairs come from the pair score cache.
+
+    Returns: the score_pairs_with tuple (see score_with_backend); the lookup
+    is None on the incremental path
+    """
+    if settings.incremental_matching:
+        return await incremental_match_matrices(request, eligibility_gates)
+    return await score_with_backend(request.jobs, request.candidates, eligibility_gates)
+
+
+async def build_alignment_lookup(job_batches):
+    """
+    Tag lookup for local skill alignment built from the tags of the
+    (job, candidates) batches going to LLM analysis only, so pairs served
+    from the pair score cache or screened out cost no embedding. None when
+    embedding fails.
+    """
+    canonicalize = prefilter_canonicalizer()
+    candidates = {id(c): c for _, batch in job_batches for c in batch}
+    try:
+        tag_index, tag_matrix = await abuild_tag_matrix(
+            [job.job_tag for job, _ in job_batches] + [c.candidate_tag for c in candidates.values()],
+            backend_embeddings(),
+            chunk_size=settings.embedding_chunk_size,
+            max_concurrency=settings.embedding_concurrent_limit,
+            canonicalize=canonicalize
+        )
+        return tag_lookup(tag_index, tag_matrix, canonicalize)
+    except Exception as e:
+        logger.warning(f"Tag embedding for local skill alignment failed: {str(e)}")
+        return None
+
+
+def skill_alignment_from(lookup):
+    """
+    local_alignment callable for the analysis pipeline: (skillMatches, skillGaps)
+    from the prefilter's tag vectors, or None when a side has no embedded tags.
+    """
+    def local_alignment(job, candidate):
+        job_tags, job_vectors = lookup(job.job_tag)
+        candidate_tags, candidate_vectors = lookup(candidate.candidate_tag)
+        if not job_tags or not candidate_tags:
+            return None
+        return align_tags(candidate_tags, candidate_vectors, job_tags, job_vectors)
+
+    return local_alignment
+
+
+def log_ingested_entities(request: JobCandidateData) -> None:
+    """
+    Log how many jobs/candidates already had their current tags embedded at
+    ingest. Observability only: the registry is not consulted for scoring.
+    Ingest-embedded tags are reused because their vectors are already in
+    the shared embedding store, which serves them without a remote call.
+    """
+    try:
+        registry = get_tag_registry()
+        canonicalize = prefilter_canonicalizer()
+        known_jobs = registry.current_keys("job", ((j.job_id, j.job_tag) for j in request.jobs), canonicalize)
+        known_candidates = registry.current_keys(
+            "candidate", ((c.candidateId, c.candidate_tag) for c in request.candidates), canonicalize
+        )
+        logger.info(
+            f"Tags embedded at ingest: {len(known_jobs)}/{len(request.jobs)} jobs, "
+            f"{len(known_candidates)}/{len(request.candidates)} candidates"
+        )
+    except Exception as e:
+        logger.warning(f"Could not read the ingest tag registry: {str(e)}")
+
+
+def has_tags(tags: Optional[List[str]]) -> bool:
+    """True when ``tags`` holds at least one non-blank tag."""
+    return any(tag and tag.strip() for tag in tags or [])
+
+
+def select_llm_candidates(
+    eligible: List[Tuple[Any, Optional[float]]],
+    limit: Optional[int],
+    unscored_use_budget: bool = True
+) -> Tuple[List[Any], List[Tuple[Any, Optional[float]]]]:
+    """
+    Split eligible (candidate, prefilter score) pairs into the top ``limit``
+    by score, which go to LLM analysis, and the rest. Equal scores keep
+    their request order.
+
+    Unscored candidates (score None: no tags on either side, or no embedded
+    tags) rank after every scored one, so they only take slots the scored
+    candidates leave free. With ``unscored_use_budget`` off
+    (UNSCORED_CANDIDATES_USE_LLM_BUDGET=false) they are always analysed
+    and do not count against ``limit``.
+    """
+    unscored = []
+    if not unscored_use_budget:
+        unscored = [candidate for candidate, score in eligible if score is None]
+        eligible = [(candidate, score) for candidate, score in eligible if score is not None]
+
+    if not limit or len(eligible) <= limit:
+        return [candidate for candidate, _ in eligible] + unscored, []
+
+    ranked = sorted(eligible, key=lambda item: item[1] if item[1] is not None else float("-inf"), reverse=True)
+    return [candidate for candidate, _ in ranked[:limit]] + unscored, ranked[limit:]
+
+
+def screened_out_response(job, candidate, prefilter_score: Optional[float]) -> CandidateAnalysisResponse:
+    """Lightweight result for an eligible candidate that did not make the per-job LLM budget."""
+    name_parts = (candidate.name or "").split()
+    return CandidateAnalysisResponse(
+        job_id=job.job_id,
+        id=candidate.candidateId,
+        firstName=name_parts[0] if name_parts else "",
+        lastName=" ".join(name_parts[1:]),
+        email=candidate.email,
+        phone=candidate.phone,
+        currentTitle=candidate.currentTitle,
+        experienceYears=candidate.experience_year,
+        matchScore=None,
+        prefilterScore=round(prefilter_score, 1) if prefilter_score is not None else None,
+        aiInsights=None,
+        applicationStatus="screened_out"
+    )
+
+
 @router.post("/ai/batch-analyze-resumes", response_model=List[CandidateAnalysisResponse])
 @traceable(name="batch_analyze_resumes", run_type="chain", metadata={"endpoint": "ai-match"})
 async def batch_analyze_resumes_api(request: JobCandidateData):
@@ -306,105 +675,172 @@ async def batch_analyze_resumes_api(request: JobCandidateData):
             logger.warning("Empty candidates or jobs list")
             return []
 
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        all_results = []
+        job_batches = []
+
+        if settings.embed_tags_on_ingest:
+            log_ingested_entities(request)
 
-        MINIMUM_ELIGIBLE_SCORE = settings.minimum_eligible_score
+        eligibility_gates = request.eligibility_gates or settings.eligibility_gate_thresholds
+        use_local_alignment = settings.local_skill_alignment if request.local_skill_alignment is None \
+            else request.local_skill_alignment
+        metric_matrices, _, _, lookup = await compute_match_matrices(request, eligibility_gates)
+        if metric_matrices is not None:
+            eligible_matrix = eligibility_mask(metric_matrices, eligibility_gates)
 
-        for job in request.jobs or []:
+        llm_limit = request.max_llm_candidates_per_job or settings.max_llm_candidates_per_job
+        screened_out = []
+
+        for job_idx, job in enumerate(request.jobs):
             job_eligible_candidates = []
 
-            for candidate in request.candidates or []:
+            for candidate_idx, candidate in enumerate(request.candidates):
 
-                if not candidate.candidate_tag or len(candidate.candidate_tag) == 0:
+                if not has_tags(candidate.candidate_tag):
                     logger.info(f"Job {job.job_id} - Candidate {candidate.candidateId}: "
                                f"No candidate tags, auto-include")
-                    job_eligible_candidates.append(candidate)
+                    job_eligible_candidates.append((candidate, None))
                     continue
 
-                if not job.job_tag or len(job.job_tag) == 0:
+                if not has_tags(job.job_tag):
                     logger.info(f"Job {job.job_id} - Candidate {candidate.candidateId}: "
                                f"No job tags, auto-include")
-                    job_eligible_candidates.append(candidate)
+                    job_eligible_candidates.append((candidate, None))
                     continue
 
-                try:
-
-                    relevance_score = check_domain_relevance_strict(
-                        candidate.candidate_tag,
-                        job.job_tag,
-                        embeddings
-                    )
-
-                    match_score = calculate_weighted_coverage_score(
-                        candidate.candidate_tag,
-                        job.job_tag,
-                        embeddings
-                    )
-
-                    if match_score >= MINIMUM_ELIGIBLE_SCORE:
-                        job_eligible_candidates.append(candidate)
-                        logger.info(f"Job {job.job_id} - Candidate {candidate.candidateId}: "
-                                   f"Relevance {relevance_score:.1f}%, Score {match_score:.1f}% - ELIGIBLE")
-                    else:
-                        logger.info(f"Job {job.job_id} - Candidate {candidate.candidateId}: "
-                                   f"Relevance {relevance_score:.1f}%, Score {match_score:.1f}% - REJECTED")
+                if metric_matrices is None or np.isnan(metric_matrices["weighted_coverage"][job_idx, candidate_idx]):
+                    logger.info(f"Job {job.job_id} - Candidate {candidate.candidateId}: "
+                               f"No embedded tags, auto-include")
+                    job_eligible_candidates.append((candidate, None))
+                    continue
 
-                except Exception as e:
-                    logger.warning(f"Error calculating match for job {job.job_id} "
-                                  f"candidate {candidate.candidateId}: {str(e)}")
-                    job_eligible_candidates.append(candidate)
+                match_score = float(metric_matrices["weighted_coverage"][job_idx, candidate_idx])
+                decision = "ELIGIBLE" if eligible_matrix[job_idx, candidate_idx] else "REJECTED"
+                if decision == "ELIGIBLE":
+                    job_eligible_candidates.append((candidate, match_score))
+                logger.debug(f"Job {job.job_id} - Candidate {candidate.candidateId}: "
+                            f"Relevance {metric_matrices['strict_relevance'][job_idx, candidate_idx]:.1f}%, "
+                            f"Score {match_score:.1f}% - {decision}")
 
             if job_eligible_candidates:
+                llm_candidates, job_screened_out = select_llm_candidates(
+                    job_eligible_candidates, llm_limit, settings.unscored_candidates_use_llm_budget
+                )
                 logger.info(f"Job {job.job_id} has {len(job_eligible_candidates)} eligible candidates "
-                           f"(filtered from {num_candidates} total)")
-
-                job_specific_request = JobCandidateData(
-                    jobs=[job],
-                    candidates=job_eligible_candidates,
-                    threshold=request.threshold,
-                    cosine_score=MINIMUM_ELIGIBLE_SCORE
+                           f"(filtered from {num_candidates} total), sending {len(llm_candidates)} to LLM analysis")
+                job_batches.append((job, llm_candidates))
+                screened_out.extend(
+                    screened_out_response(job, candidate, score) for candidate, score in job_screened_out
                 )
-                job_results = await generate_batch_analysis_async(job_specific_request)
-                all_results.extend(job_results)
             else:
                 logger.warning(f"Job {job.job_id} has NO eligible candidates after filtering")
 
-        serialized = [r.dict(exclude_none=True) for r in all_results]
-        logger.info(f"Total analysis results: {len(serialized)}")
+        if use_local_alignment and lookup is None and job_batches:
+            lookup = await build_alignment_lookup(job_batches)
+
+        # All jobs share one work queue and one global LLM concurrency limit
+        all_results = await generate_pipeline_analysis_async(
+            job_batches,
+            threshold=request.threshold,
+            max_concurrent=settings.batch_concurrent_limit,
+            local_alignment=skill_alignment_from(lookup) if use_local_alignment and lookup is not None else None
+        )
+
+        serialized = [r.dict(exclude_none=True) for r in all_results + screened_out]
+        logger.info(f"Total analysis results: {len(all_results)} analyzed, {len(screened_out)} screened out")
         return serialized
 
     except QuotaLimitError as qe:
         logger.error(f"Quota limit reached: {str(qe)}")
-        raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+        raise quota_http_exception(qe)
     except Exception as e:
         logger.error(f"Error generating batch AI analysis: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to generate batch AI analysis")
 
 
+@router.post("/ai/screen-candidates", response_model=ScreeningResponse)
+async def screen_candidates_api(
+    request: JobCandidateData,
+    min_score: Optional[float] = Query(None, description="Minimum weighted coverage (0-100) for a pair to be listed")
+):
+    """
+    Cosine-only jobs x candidates screening: no chat-model calls.
+
+    Returns every pair whose weighted coverage is at least ``min_score``
+    (default MINIMUM_ELIGIBLE_SCORE), with all of its MatchMetrics and
+    whether it passes the eligibility gates used by batch analysis.
+    """
+    try:
+        jobs = request.jobs or []
+        candidates = request.candidates or []
+        eligibility_gates = request.eligibility_gates or settings.eligibility_gate_thresholds
+        min_score = settings.minimum_eligible_score if min_score is None else min_score
+
+        response = ScreeningResponse(
+            job_ids=[job.job_id for job in jobs],
+            candidate_ids=[candidate.candidateId for candidate in candidates],
+            eligibility_gates=eligibility_gates,
+            min_score=min_score
+        )
+        if not jobs or not candidates:
+            return response
+
+        metric_matrices, _, _, _ = await compute_match_matrices(request, eligibility_gates)
+        if metric_matrices is None:
+            raise HTTPException(status_code=503, detail="Tag embeddings are unavailable, cannot screen candidates")
+
+        scores = metric_matrices["weighted_coverage"]
+        eligible_matrix = eligibility_mask(metric_matrices, eligibility_gates)
+        scored = ~np.isnan(scores)
+
+        response.scored_pairs = int(scored.sum())
+        if "lexical_skip" in metric_matrices:
+            response.lexically_skipped_pairs = int(metric_matrices["lexical_skip"].sum())
+        response.unscored_pairs = int(scores.size - response.scored_pairs)
+        response.eligible_pairs = int(eligible_matrix.sum())
+        response.matches = [
+            PairMatch(
+                job_id=jobs[j].job_id,
+                candidateId=candidates[c].candidateId,
+                eligible=bool(eligible_matrix[j, c]),
+                metrics=pair_metrics(metric_matrices, j, c)
+            )
+            for j, c in zip(*np.nonzero(np.nan_to_num(scores, nan=-np.inf) >= min_score))
+        ]
+
+        logger.info(f"Screened {len(jobs)} jobs x {len(candidates)} candidates: "
+                   f"{response.eligible_pairs} eligible, {len(response.matches)} pairs >= {min_score}")
+        return response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error screening candidates: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to screen candidates")
+
+
 @router.post("/generate-ai-question", response_model=AIQuestionResponse)
-def ai_question_generator(request: AIQuestionRequest):
+async def ai_question_generator(request: AIQuestionRequest):
     try:
-        return generate_interview_questions(request)
+        return await agenerate_interview_questions(request)
     except QuotaLimitError as qe:
         logger.error(f"Quota limit reached: {str(qe)}")
-        raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+        raise quota_http_exception(qe)
     except Exception as e:
         logger.error(f"Error generating AI job question: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to generate AI job question")
 
 
 @router.post("/generate-prompt-questions", response_model=AIPromptQuestionResponse)
-def ai_prompt_question_generator(request: AIPromptQuestionRequest):
+async def ai_prompt_question_generator(request: AIPromptQuestionRequest):
     try:
         if not request.prompt:
             raise Exception("Input array is empty")
 
-        return generate_prompt_based_questions(request)
+        return await agenerate_prompt_based_questions(request)
 
     except QuotaLimitError as qe:
         logger.error(f"Quota limit reached: {str(qe)}")
-        raise HTTPException(status_code=429, detail="All API keys have reached their quota limit. Please try again later.")
+        raise quota_http_exception(qe)
     except Exception as e:
         logger.error(f"Error generating prompt-based questions: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -1,7 +1,344 @@
-from typing import List
+import asyncio
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 import numpy as np
+from app.models.batch_analyze_model import MatchMetrics, SkillMatch
 
+
+# ============================================================================
+# TAG VOCABULARY PRE-PASS (embed every unique tag once per request)
+# ============================================================================
+def _tag_key(tag, canonicalize: Optional[Callable[[str], str]] = None) -> str:
+    key = tag.strip() if isinstance(tag, str) else ""
+    return canonicalize(key) if key and canonicalize else key
+
+
+def collect_unique_tags(
+    tag_lists: Iterable[Optional[List[str]]],
+    canonicalize: Optional[Callable[[str], str]] = None
+) -> List[str]:
+    """
+    Collect every unique, non-empty tag across many tag lists,
+    preserving first-seen order. With ``canonicalize`` the tags are
+    collapsed to their canonical IDs first.
+    """
+
+    seen = {}
+    for tags in tag_lists:
+        for tag in tags or []:
+            key = _tag_key(tag, canonicalize)
+            if key and key not in seen:
+                seen[key] = len(seen)
+    return list(seen)
+
+
+def build_tag_matrix(
+    tag_lists: Iterable[Optional[List[str]]],
+    embeddings,
+    chunk_size: int = 512,
+    canonicalize: Optional[Callable[[str], str]] = None
+) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Embed the unique tag vocabulary in chunked bulk calls. With
+    ``canonicalize`` one vector is embedded per canonical tag ID.
+
+    Returns: (tag -> row index, matrix of shape [num_unique_tags, dim])
+    """
+
+    vocabulary = collect_unique_tags(tag_lists, canonicalize)
+    if not vocabulary:
+        return {}, np.empty((0, 0))
+
+    vectors = []
+    for start in range(0, len(vocabulary), chunk_size):
+        vectors.extend(embeddings.embed_documents(vocabulary[start:start + chunk_size]))
+
+    tag_index = {tag: row for row, tag in enumerate(vocabulary)}
+    return tag_index, np.asarray(vectors, dtype=np.float64)
+
+
+async def abuild_tag_matrix(
+    tag_lists: Iterable[Optional[List[str]]],
+    embeddings,
+    chunk_size: int = 512,
+    max_concurrency: int = 4,
+    canonicalize: Optional[Callable[[str], str]] = None
+) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Async build_tag_matrix: chunks go through ``aembed_documents`` with at
+    most ``max_concurrency`` requests in flight, so the event loop stays free.
+    """
+
+    vocabulary = collect_unique_tags(tag_lists, canonicalize)
+    if not vocabulary:
+        return {}, np.empty((0, 0))
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def embed_chunk(chunk: List[str]):
+        async with semaphore:
+            return await embeddings.aembed_documents(chunk)
+
+    chunks = await asyncio.gather(*[
+        embed_chunk(vocabulary[start:start + chunk_size])
+        for start in range(0, len(vocabulary), chunk_size)
+    ])
+
+    tag_index = {tag: row for row, tag in enumerate(vocabulary)}
+    return tag_index, np.asarray([v for chunk in chunks for v in chunk], dtype=np.float64)
+
+
+def tag_rows(
+    tags: Optional[List[str]],
+    tag_index: Dict[str, int],
+    canonicalize: Optional[Callable[[str], str]] = None
+) -> List[int]:
+    """
+    Map raw tags to their row indexes in the tag matrix (unknown tags are
+    skipped). Pass the same ``canonicalize`` the matrix was built with.
+    """
+
+    rows = []
+    for tag in tags or []:
+        key = _tag_key(tag, canonicalize)
+        if key in tag_index:
+            rows.append(tag_index[key])
+    return rows
+
+
+# ============================================================================
+# FUSED SCORING (one similarity matrix -> every metric)
+# ============================================================================
+def score_tag_match(
+    candidate_vectors,
+    job_vectors,
+    top_k: int = 3,
+    decent_threshold: float = 0.45
+) -> MatchMetrics:
+    """
+    Build the candidate-tag x job-tag similarity matrix once from precomputed
+    vectors and derive every relevance/coverage metric from it.
+
+    The relevance/coverage scores are identical to check_domain_relevance,
+    check_domain_relevance_strict and calculate_weighted_coverage_score.
+    """
+
+    sim_matrix = cosine_similarity(candidate_vectors, job_vectors)
+    best_per_job = sim_matrix.max(axis=0)
+
+    max_similarity = float(sim_matrix.max())
+    top_k_mean = float(np.sort(best_per_job)[-min(top_k, len(best_per_job)):].mean())
+    coverage_ratio = float((best_per_job >= decent_threshold).sum() / len(best_per_job))
+    avg_quality = float(best_per_job.mean())
+
+    return MatchMetrics(
+        max_similarity=max_similarity,
+        top_k_mean=top_k_mean,
+        coverage_ratio=coverage_ratio,
+        avg_quality=avg_quality,
+        domain_relevance=(max_similarity * 0.4 + top_k_mean * 0.6) * 100,
+        strict_relevance=(coverage_ratio * 0.6 + avg_quality * 0.4) * 100,
+        weighted_coverage=float(np.power(best_per_job, 2).mean() * 100)
+    )
+
+
+# ============================================================================
+# VECTORIZED ALL-PAIRS KERNEL (jobs x candidates in one matmul)
+# ============================================================================
+MATCH_METRIC_NAMES = list(MatchMetrics.model_fields)
+UNIT_INTERVAL_METRICS = {"max_similarity", "top_k_mean", "coverage_ratio", "avg_quality"}
+
+
+def _segments(row_lists: List[List[int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Concatenate non-empty row lists; returns (positions kept, concatenated rows, segment offsets)."""
+
+    kept = np.array([i for i, rows in enumerate(row_lists) if rows], dtype=np.intp)
+    lengths = np.array([len(row_lists[i]) for i in kept], dtype=np.intp)
+    concat = np.array([r for i in kept for r in row_lists[i]], dtype=np.intp)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.intp) if len(kept) else lengths
+    return kept, concat, offsets
+
+
+def score_all_pairs(
+    tag_matrix: np.ndarray,
+    candidate_rows: List[List[int]],
+    job_rows: List[List[int]],
+    top_k: int = 3,
+    decent_threshold: float = 0.45,
+    max_block_elements: int = 8_000_000
+) -> Dict[str, np.ndarray]:
+    """
+    Score every job against every candidate at once.
+
+    All tag vectors are L2-normalized once, the (candidate tags x job tags)
+    similarity block comes from a single matmul over the unique rows, and
+    segmented max/sum reductions turn it into one jobs x candidates matrix
+    per MatchMetrics field. Values are identical to score_tag_match; pairs
+    where either side has no tags are NaN.
+    """
+
+    n_jobs, n_candidates = len(job_rows), len(candidate_rows)
+    results = {name: np.full((n_jobs, n_candidates), np.nan) for name in MATCH_METRIC_NAMES}
+
+    job_kept, job_concat, job_offsets = _segments(job_rows)
+    if not len(job_kept) or not any(candidate_rows):
+        return results
+
+    normalized = normalize(np.asarray(tag_matrix, dtype=np.float64))
+    job_lengths = np.diff(np.append(job_offsets, len(job_concat)))
+    job_vocab, job_local = np.unique(job_concat, return_inverse=True)
+    job_vectors = normalized[job_vocab]
+
+    cand_kept, cand_concat, cand_offsets = _segments(candidate_rows)
+    cand_ends = np.append(cand_offsets, len(cand_concat))
+
+    # Block over candidates so the similarity block stays under max_block_elements
+    block_tags = max(1, max_block_elements // max(1, len(job_concat)))
+    start = 0
+    while start < len(cand_kept):
+        stop = start + 1
+        while stop < len(cand_kept) and cand_ends[stop + 1] - cand_ends[start] <= block_tags:
+            stop += 1
+
+        rows = cand_concat[cand_ends[start]:cand_ends[stop]]
+        cand_vocab, cand_local = np.unique(rows, return_inverse=True)
+        vocab_sim = normalized[cand_vocab] @ job_vectors.T
+        # Identical (canonical) tags are an exact match, not a float round trip
+        _, same_cand, same_job = np.intersect1d(cand_vocab, job_vocab, assume_unique=True, return_indices=True)
+        vocab_sim[same_cand, same_job] = 1.0
+        sim = vocab_sim[cand_local][:, job_local]
+
+        # best match per job tag, per candidate: [block candidates x all job tags]
+        best = np.maximum.reduceat(sim, cand_offsets[start:stop] - cand_ends[start], axis=0)
+
+        max_similarity = np.maximum.reduceat(best, job_offsets, axis=1)
+        avg_quality = np.add.reduceat(best, job_offsets, axis=1) / job_lengths
+        coverage_ratio = np.add.reduceat((best >= decent_threshold).astype(np.float64), job_offsets, axis=1) / job_lengths
+        weighted_coverage = np.add.reduceat(np.power(best, 2), job_offsets, axis=1) / job_lengths * 100
+        top_k_mean = np.empty_like(max_similarity)
+        for j, (offset, length) in enumerate(zip(job_offsets, job_lengths)):
+            segment = np.sort(best[:, offset:offset + length], axis=1)
+            top_k_mean[:, j] = segment[:, -min(top_k, length):].mean(axis=1)
+
+        block = {
+            "max_similarity": max_similarity,
+            "top_k_mean": top_k_mean,
+            "coverage_ratio": coverage_ratio,
+            "avg_quality": avg_quality,
+            "domain_relevance": (max_similarity * 0.4 + top_k_mean * 0.6) * 100,
+            "strict_relevance": (coverage_ratio * 0.6 + avg_quality * 0.4) * 100,
+            "weighted_coverage": weighted_coverage,
+        }
+        cols = cand_kept[start:stop]
+        for name, values in block.items():
+            results[name][np.ix_(job_kept, cols)] = values.T
+
+        start = stop
+
+    return results
+
+
+def weighted_coverage_matrix(
+    tag_matrix: np.ndarray,
+    candidate_rows: List[List[int]],
+    job_rows: List[List[int]]
+) -> np.ndarray:
+    """jobs x candidates calculate_weighted_coverage_score values (NaN where a side has no tags)."""
+
+    return score_all_pairs(tag_matrix, candidate_rows, job_rows)["weighted_coverage"]
+
+
+def eligibility_mask(metric_matrices: Dict[str, np.ndarray], gates: Dict[str, float]) -> np.ndarray:
+    """jobs x candidates boolean mask of pairs passing every gate (NaN pairs never pass)."""
+
+    mask = np.ones_like(metric_matrices["weighted_coverage"], dtype=bool)
+    for metric, minimum in gates.items():
+        mask &= np.nan_to_num(metric_matrices[metric], nan=-np.inf) >= minimum
+    return mask
+
+
+def borderline_mask(metric_matrices: Dict[str, np.ndarray], gates: Dict[str, float], margin: float) -> np.ndarray:
+    """
+    jobs x candidates mask of scored pairs within ``margin`` points of any gate.
+    The margin is on the 0-100 scale and divided by 100 for the 0-1 metrics.
+    """
+
+    mask = np.zeros_like(metric_matrices["weighted_coverage"], dtype=bool)
+    for metric, minimum in gates.items():
+        scale = 0.01 if metric in UNIT_INTERVAL_METRICS else 1.0
+        distance = np.abs(np.nan_to_num(metric_matrices[metric], nan=np.inf) - minimum)
+        mask |= distance < margin * scale
+    return mask
+
+
+def pair_metrics(metric_matrices: Dict[str, np.ndarray], job_idx: int, candidate_idx: int) -> MatchMetrics:
+    """Pull one pair's MatchMetrics out of score_all_pairs output."""
+
+    return MatchMetrics(**{name: float(metric_matrices[name][job_idx, candidate_idx]) for name in MATCH_METRIC_NAMES})
+
+
+# ============================================================================
+# LOCAL TAG ALIGNMENT (skillMatches / skillGaps without the LLM)
+# ============================================================================
+def tag_lookup(
+    tag_index: Dict[str, int],
+    tag_matrix: np.ndarray,
+    canonicalize: Optional[Callable[[str], str]] = None
+) -> Callable[[Optional[List[str]]], Tuple[List[str], np.ndarray]]:
+    """
+    Callable mapping raw tags to (tags found in the matrix, their vectors),
+    so callers can align tags after the prefilter without re-embedding.
+    """
+
+    def lookup(tags: Optional[List[str]]) -> Tuple[List[str], np.ndarray]:
+        found = [(tag.strip(), tag_index[key]) for tag in tags or []
+                 if (key := _tag_key(tag, canonicalize)) in tag_index]
+        return [tag for tag, _ in found], tag_matrix[[row for _, row in found]]
+
+    return lookup
+
+
+def align_tags(
+    candidate_tags: List[str],
+    candidate_vectors,
+    job_tags: List[str],
+    job_vectors,
+    decent_threshold: float = 0.45,
+    strength_bands: Tuple[Tuple[float, str], ...] = ((0.999, "Exact"), (0.75, "Strong"), (0.6, "Moderate"))
+) -> Tuple[List[SkillMatch], List[str]]:
+    """
+    Best candidate tag for every job tag, from the candidate-tag x job-tag
+    similarity matrix the prefilter already uses.
+
+    Returns: (SkillMatch per job tag with a decent match, job tags without one)
+    """
+
+    if not len(candidate_tags) or not len(job_tags):
+        return [], list(job_tags)
+
+    sim_matrix = cosine_similarity(candidate_vectors, job_vectors)
+    best_rows = sim_matrix.argmax(axis=0)
+
+    matches, gaps = [], []
+    for j, job_tag in enumerate(job_tags):
+        similarity = float(sim_matrix[best_rows[j], j])
+        if similarity < decent_threshold:
+            gaps.append(job_tag)
+            continue
+        strength = next((label for minimum, label in strength_bands if similarity >= minimum), "Partial")
+        matches.append(SkillMatch(
+            jobRequirement=job_tag,
+            candidateSkill=candidate_tags[best_rows[j]],
+            matchStrength=strength,
+            confidenceScore=round(min(similarity, 1.0) * 100, 1)
+        ))
+    return matches, gaps
+
+
+# ============================================================================
+# DOMAIN RELEVANCE CHECK (First Filter)
+# ============================================================================
 def check_domain_relevance(
     candidate_tags: List[str],
     job_tags: List[str],
@@ -0,0 +1,241 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.services.ai_match_score import build_tag_matrix, tag_rows
+from app.services.tag_canonicalizer import prefilter_canonicalizer
+from app.services.vector_quantization import quantize
+from config.Settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Name of the live build under the index directory; replaced atomically on every rebuild
+CURRENT_FILE = "CURRENT"
+
+
+def live_directory(directory: Path) -> Optional[Path]:
+    """Build directory CURRENT points to (``directory`` itself for an index without one), or None when unbuilt."""
+    directory = Path(directory)
+    try:
+        return directory / (directory / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return directory if (directory / "meta.json").exists() else None
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _spherical_kmeans(points: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Coarse centroids for unit vectors (cosine k-means); returns unit-norm centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = points[rng.choice(len(points), n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = np.argmax(points @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        lists, starts = np.unique(assign[order], return_index=True)
+        centroids[lists] = np.add.reduceat(points[order], starts, axis=0)
+        centroids = _normalize_rows(centroids)
+
+    return centroids
+
+
+class CandidateIndex:
+    """
+    IVF-style, memory-mapped index of candidate tag vectors.
+
+    Every build is written to its own subdirectory of the index directory
+    and published by atomically replacing the CURRENT file that names it.
+    Build layout (all arrays are np.load(..., mmap_mode="r")):
+    - vocab.npy:        unique tag vectors, L2-normalized [V x dim], stored as
+                        float32, float16 or int8 (EMBEDDING_STORAGE_DTYPE)
+    - vocab_scales.npy: per-vector scales, int8 indexes only
+    - tag_ids.npy:      tag row of every candidate tag, candidates grouped by list
+    - cand_offsets.npy: start of each candidate in tag_ids (+ end sentinel)
+    - list_offsets.npy: start of each coarse list in candidate order (+ end sentinel)
+    - centroids.npy:    unit-norm coarse centroids [n_lists x dim]
+    - meta.json:        candidate ids (in list order), model, dimensions
+
+    Search scores candidates exactly like calculate_weighted_coverage_score;
+    ``n_probe`` (how many coarse lists to scan) trades recall for latency,
+    with ``n_probe = n_lists`` being an exhaustive search.
+    """
+
+    def __init__(self, directory: Path):
+        directory = live_directory(directory)
+        if directory is None:
+            raise FileNotFoundError("Candidate index has not been built")
+        with open(directory / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.directory = directory
+        self.candidate_ids: List[str] = self.meta["candidate_ids"]
+        self.vocab = np.load(directory / "vocab.npy", mmap_mode="r")
+        scales_path = directory / "vocab_scales.npy"
+        self.vocab_scales = np.load(scales_path, mmap_mode="r") if scales_path.exists() else None
+        self.tag_ids = np.load(directory / "tag_ids.npy", mmap_mode="r")
+        self.cand_offsets = np.load(directory / "cand_offsets.npy", mmap_mode="r")
+        self.list_offsets = np.load(directory / "list_offsets.npy", mmap_mode="r")
+        self.centroids = np.load(directory / "centroids.npy", mmap_mode="r")
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        return len(self.candidate_ids)
+
+    def search(self, job_vectors, top_k: int = 50, n_probe: Optional[int] = None) -> Tuple[List[Tuple[str, float]], dict]:
+        """
+        Top-``top_k`` candidates for one job's tag vectors.
+
+        Returns: ([(candidate_id, weighted coverage score 0-100)], search stats)
+        """
+        started = time.perf_counter()
+        n_probe = min(self.n_lists, n_probe or settings.candidate_index_n_probe)
+
+        job_vectors = _normalize_rows(np.asarray(job_vectors, dtype=np.float32))
+        query = job_vectors.mean(axis=0)
+        probed = np.argsort(-(self.centroids @ query))[:n_probe]
+
+        # Similarity of every vocabulary tag to every job tag, computed once per query
+        vocab_sim = np.asarray(self.vocab @ job_vectors.T, dtype=np.float64)
+        if self.vocab_scales is not None:
+            vocab_sim *= self.vocab_scales[:, None]
+
+        positions, scores = [], []
+        for list_id in probed:
+            first, last = int(self.list_offsets[list_id]), int(self.list_offsets[list_id + 1])
+            if first == last:
+                continue
+            offsets = np.asarray(self.cand_offsets[first:last + 1])
+            sim = vocab_sim[np.asarray(self.tag_ids[offsets[0]:offsets[-1]])]
+            best = np.maximum.reduceat(sim, offsets[:-1] - offsets[0], axis=0)
+            scores.append(np.power(best, 2).mean(axis=1) * 100)
+            positions.append(np.arange(first, last))
+
+        stats = {"n_lists": self.n_lists, "n_probe": int(n_probe), "scanned_candidates": 0}
+        if not scores:
+            stats["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return [], stats
+
+        positions, scores = np.concatenate(positions), np.concatenate(scores)
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        stats["scanned_candidates"] = int(len(scores))
+        stats["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return [(self.candidate_ids[positions[i]], float(scores[i])) for i in top], stats
+
+
+def build_candidate_index(
+    directory: Path,
+    candidate_ids: List[str],
+    candidate_tag_lists: List[Optional[List[str]]],
+    embeddings,
+    n_lists: Optional[int] = None,
+    train_sample: int = 20_000,
+    iterations: int = 10,
+    dtype: Optional[str] = None
+) -> CandidateIndex:
+    """
+    Embed the candidates' tag vocabulary, cluster candidates by their mean tag
+    vector, and write the index files to a new build directory. The build is
+    published by atomically replacing the CURRENT pointer, so workers keep
+    searching the previous build until then; older builds are removed.
+
+    Candidates without any tag are not indexed.
+    """
+    directory = Path(directory)
+    dtype = dtype or settings.embedding_storage_dtype
+    canonicalize = prefilter_canonicalizer()
+    tag_index, tag_matrix = build_tag_matrix(
+        candidate_tag_lists, embeddings, chunk_size=settings.embedding_chunk_size, canonicalize=canonicalize
+    )
+
+    kept = [(cid, rows) for cid, rows in
+            zip(candidate_ids, (tag_rows(tags, tag_index, canonicalize) for tags in candidate_tag_lists)) if rows]
+    if not kept:
+        raise ValueError("No candidate has any tags to index")
+
+    vocab = _normalize_rows(tag_matrix).astype(np.float32)
+    means = _normalize_rows(np.stack([vocab[rows].mean(axis=0) for _, rows in kept]))
+
+    n_lists = min(len(kept), n_lists or max(1, int(np.sqrt(len(kept)))))
+    rng = np.random.default_rng(0)
+    sample = means[rng.choice(len(means), min(train_sample, len(means)), replace=False)]
+    centroids = _spherical_kmeans(sample, min(n_lists, len(sample)), iterations=iterations)
+    assign = np.argmax(means @ centroids.T, axis=1)
+
+    order = np.argsort(assign, kind="stable")
+    lengths = np.array([len(kept[i][1]) for i in order], dtype=np.int64)
+    cand_offsets = np.concatenate(([0], np.cumsum(lengths)))
+    list_offsets = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+    tag_ids = np.array([r for i in order for r in kept[i][1]], dtype=np.int32)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f"build-{time.time_ns()}-", dir=directory))
+    vocab_data, vocab_scales = quantize(vocab, dtype)
+    np.save(staging / "vocab.npy", vocab_data)
+    if vocab_scales is not None:
+        np.save(staging / "vocab_scales.npy", vocab_scales)
+    np.save(staging / "tag_ids.npy", tag_ids)
+    np.save(staging / "cand_offsets.npy", cand_offsets)
+    np.save(staging / "list_offsets.npy", list_offsets)
+    np.save(staging / "centroids.npy", centroids.astype(np.float32))
+    with open(staging / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "candidate_ids": [kept[i][0] for i in order],
+            "model": settings.embedding_model,
+            "dimensions": settings.embedding_dimensions,
+            "dtype": dtype,
+            "canonicalized": canonicalize is not None,
+            "built_at": time.time(),
+        }, f)
+
+    previous = live_directory(directory)
+    pointer = directory / f".{CURRENT_FILE}-{staging.name}"
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(staging.name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer, directory / CURRENT_FILE)
+
+    # Builds are named by start time: drop those older than the previous one, which workers
+    # that resolved CURRENT just before the swap may still be opening
+    if previous is not None and previous != directory:
+        for old in directory.glob("build-*"):
+            if old.name < previous.name:
+                shutil.rmtree(old, ignore_errors=True)
+
+    logger.info(f"Built candidate index with {len(kept)} candidates, {len(vocab)} unique tags, "
+                f"{len(centroids)} lists at {directory}")
+    return CandidateIndex(staging)
+
+
+_index_lock = threading.Lock()
+_loaded: dict = {}
+
+
+def get_candidate_index() -> Optional[CandidateIndex]:
+    """Process-wide index handle; reloaded when another worker publishes a new build."""
+    version = live_directory(settings.candidate_index_directory)
+    if version is None:
+        return None
+
+    with _index_lock:
+        if _loaded.get("version") != version:
+            _loaded["index"] = CandidateIndex(version)
+            _loaded["version"] = version
+        return _loaded["index"]
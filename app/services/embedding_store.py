@@ -0,0 +1,338 @@
+import asyncio
+import fcntl
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.llm_clients import get_embeddings_client
+from app.services.vector_quantization import STORAGE_DTYPES, check_storage_dtype, dequantize, quantize, roundtrip
+from config.Settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+_VECTOR_FILE_SUFFIXES = {"float32": "f32", "float16": "f16", "int8": "i8"}
+
+
+def normalize_text(text: str) -> str:
+    """Cache key form of a text: whitespace collapsed and case folded."""
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingStore:
+    """
+    Two-tier embedding cache for one (model, dimensions) pair.
+
+    - Hot tier: in-process LRU of the most recently used vectors.
+    - Disk tier: a fixed-capacity memory-mapped array plus a SQLite
+      sidecar index (normalized text -> slot). Every uvicorn worker maps the
+      same file, so the OS page cache holds one shared copy.
+
+    When the disk tier is full, the least recently used slots are reused.
+    Both tiers hold vectors in ``dtype`` ("float32", "float16", or "int8" with a
+    per-vector scale); lookups always return float32.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        model: str,
+        dimensions: Optional[int] = None,
+        max_entries: int = 100_000,
+        hot_entries: int = 20_000,
+        dtype: str = "float32"
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.dtype = check_storage_dtype(dtype)
+        self.max_entries = max_entries
+        self.hot_entries = hot_entries
+
+        slug = f"{model}-{dimensions or 'default'}" + ("" if dtype == "float32" else f"-{dtype}")
+        slug = re.sub(r"[^A-Za-z0-9_.-]", "_", slug)
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = directory / f"{slug}.{_VECTOR_FILE_SUFFIXES[dtype]}"
+        self._scales_path = directory / f"{slug}.scales"
+        self._lock_path = directory / f"{slug}.lock"
+
+        self._hot: "OrderedDict[str, tuple]" = OrderedDict()
+        self._mutex = threading.RLock()
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._dim: Optional[int] = None
+        # Slots in the mapped files; can exceed max_entries when the store was created larger
+        self.capacity = 0
+
+        self._db = sqlite3.connect(str(directory / f"{slug}.sqlite"), timeout=30, check_same_thread=False)
+        with self._file_lock(exclusive=True):
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, slot INTEGER UNIQUE NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            self._db.commit()
+
+        self.hot_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        with open(self._lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _meta(self, name: str) -> Optional[int]:
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return int(row[0]) if row else None
+
+    def _set_meta(self, name: str, value: int) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value)))
+        self._db.commit()
+
+    def _resize(self, capacity: int) -> None:
+        """Grow (or create) the vector and scale files to ``capacity`` rows; new rows are zero."""
+        files = [(self._vectors_path, self._dim * np.dtype(STORAGE_DTYPES[self.dtype]).itemsize)]
+        if self.dtype == "int8":
+            files.append((self._scales_path, np.dtype(np.float32).itemsize))
+        for path, row_bytes in files:
+            with open(path, "r+b" if path.exists() else "w+b") as f:
+                f.truncate(capacity * row_bytes)
+
+    def _open_vectors(self, dim: Optional[int] = None) -> bool:
+        """
+        Map the vector file at the capacity recorded next to its dimension
+        (both fixed by the first write). A writer (``dim`` given, exclusive
+        file lock held) grows the files first when max_entries was raised;
+        readers remap when another worker has grown them.
+        """
+        self._dim = self._meta("dim")
+        if self._dim is None and dim is None:
+            return False
+        if self._dim is None:
+            self._dim = dim
+            self._set_meta("dim", dim)
+
+        capacity = self._meta("capacity")
+        if capacity is None:
+            # Stores written before the capacity was recorded are sized by their vector file
+            row_bytes = self._dim * np.dtype(STORAGE_DTYPES[self.dtype]).itemsize
+            capacity = self._vectors_path.stat().st_size // row_bytes if self._vectors_path.exists() else 0
+        if dim is not None and capacity < self.max_entries:
+            self._vectors = self._scales = None
+            self._resize(self.max_entries)
+            capacity = self.max_entries
+            self._set_meta("capacity", capacity)
+        if capacity == 0:
+            return False
+
+        if capacity > self.max_entries and self.capacity != capacity:
+            logger.error(f"Embedding store {self._vectors_path} holds {capacity} slots but "
+                         f"EMBEDDING_STORE_MAX_ENTRIES is {self.max_entries}; keeping {capacity}. "
+                         f"Delete the store files to shrink it")
+        if self._vectors is not None and self.capacity == capacity:
+            return True
+
+        self.capacity = capacity
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=STORAGE_DTYPES[self.dtype], mode="r+", shape=(capacity, self._dim)
+        )
+        if self.dtype == "int8":
+            self._scales = np.memmap(self._scales_path, dtype=np.float32, mode="r+", shape=(capacity,))
+        return True
+
+    def _lookup_slots(self, keys: List[str]) -> Dict[str, int]:
+        slots = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            slots.update(self._db.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return slots
+
+    def _remember(self, key: str, encoded: tuple) -> None:
+        self._hot[key] = encoded
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_entries:
+            self._hot.popitem(last=False)
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look texts up in the hot tier, then the disk tier; None marks a miss."""
+        keys = [normalize_text(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        with self._mutex:
+            for key in keys:
+                if key in self._hot and key not in found:
+                    self._hot.move_to_end(key)
+                    found[key] = dequantize(*self._hot[key])
+                    self.hot_hits += 1
+
+            pending = list(dict.fromkeys(k for k in keys if k not in found))
+            if pending:
+                with self._file_lock(exclusive=False):
+                    if self._open_vectors():
+                        for key, slot in self._lookup_slots(pending).items():
+                            encoded = (np.array(self._vectors[slot]),
+                                       None if self._scales is None else np.float32(self._scales[slot]))
+                            found[key] = dequantize(*encoded)
+                            self._remember(key, encoded)
+                            self.disk_hits += 1
+
+                disk_keys = [k for k in pending if k in found]
+                if disk_keys:
+                    try:
+                        now = time.time()
+                        self._db.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, k) for k in disk_keys])
+                        self._db.commit()
+                    except sqlite3.OperationalError as e:
+                        logger.debug(f"Skipped embedding store recency update: {str(e)}")
+
+            self.misses += len([k for k in pending if k not in found])
+
+        return [found.get(key) for key in keys]
+
+    def put_many(self, texts: List[str], vectors) -> None:
+        """Write vectors to both tiers, evicting least recently used disk slots when full."""
+        latest = {}
+        for text, vector in zip(texts, vectors):
+            latest[normalize_text(text)] = vector
+        if not latest:
+            return
+
+        data, scales = quantize(list(latest.values()), self.dtype)
+        entries = {
+            key: (data[i], None if scales is None else scales[i])
+            for i, key in enumerate(latest)
+        }
+
+        with self._mutex:
+            for key, encoded in entries.items():
+                self._remember(key, encoded)
+
+            with self._file_lock(exclusive=True):
+                self._open_vectors(dim=data.shape[1])
+                keys = list(entries)[:self.capacity]
+                existing = self._lookup_slots(keys)
+
+                new_keys = [k for k in keys if k not in existing]
+                used = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                free = list(range(used, min(self.capacity, used + len(new_keys))))
+
+                shortfall = len(new_keys) - len(free)
+                if shortfall > 0:
+                    candidates = self._db.execute(
+                        "SELECT key, slot FROM entries ORDER BY last_used ASC LIMIT ?",
+                        (shortfall + len(existing),)
+                    ).fetchall()
+                    victims = [(k, slot) for k, slot in candidates if k not in existing][:shortfall]
+                    self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+                    free.extend(slot for _, slot in victims)
+                    self.evictions += len(victims)
+
+                now = time.time()
+                slots = {**existing, **dict(zip(new_keys, free))}
+                for key, slot in slots.items():
+                    self._vectors[slot], scale = entries[key]
+                    if self._scales is not None:
+                        self._scales[slot] = scale
+                self._vectors.flush()
+                if self._scales is not None:
+                    self._scales.flush()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                    [(key, slot, now) for key, slot in slots.items()]
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._mutex:
+            lookups = self.hot_hits + self.disk_hits + self.misses
+            return {
+                "model": self.model,
+                "dimensions": self.dimensions,
+                "dtype": self.dtype,
+                "hot_hits": self.hot_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hot_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "hot_entries": len(self._hot),
+                "disk_entries": self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0],
+            }
+
+
+class CachedEmbeddings:
+    """
+    embed_documents-compatible wrapper that serves vectors from an
+    EmbeddingStore and only sends misses to the underlying embeddings.
+    """
+
+    def __init__(self, embeddings, store: EmbeddingStore):
+        self.embeddings = embeddings
+        self.store = store
+
+    @staticmethod
+    def _missing(texts: List[str], cached: List[Optional[np.ndarray]]) -> List[str]:
+        missing = {}
+        for text, vector in zip(texts, cached):
+            if vector is None:
+                missing.setdefault(normalize_text(text), text)
+        return list(missing.values())
+
+    def _merge(self, texts, cached, missing, fresh) -> List[List[float]]:
+        # Fresh vectors go through the store's encoding so a tag scores the same on every call
+        fresh = roundtrip(fresh, self.store.dtype) if missing else []
+        by_key = {normalize_text(t): v for t, v in zip(missing, fresh)}
+        cached = [v if v is not None else by_key[normalize_text(t)] for t, v in zip(texts, cached)]
+        return [np.asarray(v, dtype=np.float32).tolist() for v in cached]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached = self.store.get_many(texts)
+        missing = self._missing(texts, cached)
+        fresh = self.embeddings.embed_documents(missing) if missing else []
+        if missing:
+            self.store.put_many(missing, fresh)
+        return self._merge(texts, cached, missing, fresh)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async variant: store I/O runs in a worker thread, misses use the client's async API."""
+        cached = await asyncio.to_thread(self.store.get_many, texts)
+        missing = self._missing(texts, cached)
+        fresh = await self.embeddings.aembed_documents(missing) if missing else []
+        if missing:
+            await asyncio.to_thread(self.store.put_many, missing, fresh)
+        return self._merge(texts, cached, missing, fresh)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+@lru_cache(maxsize=None)
+def get_embeddings() -> CachedEmbeddings:
+    """Process-wide tag embeddings client backed by the shared embedding store."""
+    embeddings = get_embeddings_client(settings.embedding_model, settings.embedding_dimensions)
+    store = EmbeddingStore(
+        settings.embedding_store_directory,
+        model=settings.embedding_model,
+        dimensions=settings.embedding_dimensions,
+        max_entries=settings.embedding_store_max_entries,
+        hot_entries=settings.embedding_hot_cache_size,
+        dtype=settings.embedding_storage_dtype
+    )
+    return CachedEmbeddings(embeddings, store)
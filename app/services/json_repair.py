@@ -0,0 +1,130 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.outputs import Generation
+
+from app.services.llm_metrics import get_llm_metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _closed(text: str, stack: List[str]) -> str:
+    """``text`` with a dangling comma dropped (or a dangling key given null) and every open bracket closed."""
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    elif text.endswith(":"):
+        text += "null"
+    return text + "".join(_CLOSERS[bracket] for bracket in reversed(stack))
+
+
+def _loads(text: str) -> Optional[Any]:
+    try:
+        return json.loads(text, strict=False)
+    except ValueError:
+        return None
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort fix of a model's almost-JSON answer: prose or code fences
+    around the first object or array are dropped, as are trailing commas,
+    and a truncated answer is closed, falling back to its last complete
+    member when the cut left half a value.
+    """
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        return text.strip()
+
+    out: List[str] = []
+    stack: List[str] = []
+    # (output length, open brackets) after each complete member, to cut back to
+    cuts: List[Tuple[int, Tuple[str, ...]]] = []
+    in_string = escaped = False
+    for char in text[start:]:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+        elif char in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                return "".join(out)
+            cuts.append((len(out), tuple(stack)))
+            continue
+        elif char == ",":
+            cuts.append((len(out), tuple(stack)))
+        out.append(char)
+
+    # Truncated: close what is open, else cut back to the last complete member
+    body = "".join(out)
+    if in_string:
+        body = (body[:-1] if escaped else body) + '"'
+    closed = _closed(body, stack)
+    if _loads(closed) is not None:
+        return closed
+    for length, open_brackets in reversed(cuts):
+        candidate = _closed("".join(out[:length]), list(open_brackets))
+        if _loads(candidate) is not None:
+            return candidate
+    return closed
+
+
+def parse_json(text: str, agent: Optional[str] = None) -> Any:
+    """
+    ``text`` as JSON, repaired locally with repair_json when it does not
+    parse as it is. Repairs are counted in /metrics under ``agent``;
+    raises OutputParserException when even the repaired text is not JSON.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    metrics = get_llm_metrics()
+    value = _loads(repair_json(text))
+    if value is None:
+        metrics.record_json_repair(agent or "unknown", repaired=False)
+        raise OutputParserException(f"Invalid JSON output: {text[:200]!r}", llm_output=text)
+    metrics.record_json_repair(agent or "unknown", repaired=True)
+    logger.info(f"Repaired JSON output of {agent or 'unknown'} locally")
+    return value
+
+
+def record_reask(agent: str) -> None:
+    """Count a second model call made because the first answer could not be used."""
+    get_llm_metrics().record_json_reask(agent)
+
+
+class RepairingOutputParser(PydanticOutputParser):
+    """PydanticOutputParser that runs the answer through parse_json, so fixable JSON is repaired rather than rejected."""
+
+    agent: Optional[str] = None
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False):
+        try:
+            return self._parse_obj(parse_json(result[0].text, self.agent))
+        except OutputParserException:
+            if partial:
+                return None
+            raise
@@ -0,0 +1,156 @@
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional
+
+from config.Settings import settings, QuotaLimitError
+import logging
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+_MAX_BACKOFF_STEPS = 5
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from OpenAI's x-ratelimit-reset-* format ("20ms", "1s", "6m0s", "1h2m3.5s")."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def mask_key(key: str) -> str:
+    return f"{key[:3]}...{key[-4:]}" if len(key) > 8 else "***"
+
+
+class _KeyState:
+    def __init__(self, key: str):
+        self.key = key
+        self.cooling_until = 0.0
+        self.consecutive_429 = 0
+        self.headroom = 1.0          # min remaining/limit fraction from the last response headers
+        self.headroom_until = 0.0    # when the provider window behind ``headroom`` resets
+        self.last_used = 0.0
+        self.requests = 0
+        self.rate_limited = 0
+
+
+class APIKeyPool:
+    """
+    OpenAI API keys with per-key health: each call goes to the key with the
+    most remaining quota (from the x-ratelimit-* response headers) that is
+    not cooling down, least recently used first on ties. A 429 cools the key
+    for the provider's retry-after/reset hint, or for ``cooldown`` doubling
+    on consecutive 429s; an exhausted billing quota cools it for
+    ``quota_cooldown``. QuotaLimitError is raised only when every key is
+    cooling down.
+
+    Health is tracked per process.
+    """
+
+    def __init__(self, keys: List[str], cooldown: float = 30.0, quota_cooldown: float = 3600.0):
+        if not keys:
+            raise ValueError("APIKeyPool needs at least one key")
+        self._keys = [_KeyState(key) for key in dict.fromkeys(keys)]
+        self.cooldown = cooldown
+        self.quota_cooldown = quota_cooldown
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def keys(self) -> List[str]:
+        return [state.key for state in self._keys]
+
+    def choose(self) -> str:
+        """The healthiest key that is not cooling down."""
+        now = time.time()
+        with self._lock:
+            available = [state for state in self._keys if state.cooling_until <= now]
+            if not available:
+                retry_in = min(state.cooling_until for state in self._keys) - now
+                raise QuotaLimitError(
+                    f"All {len(self._keys)} API keys are cooling down; next one is available in {retry_in:.0f}s"
+                )
+            best = max(available, key=lambda state: (
+                state.headroom if state.headroom_until > now else 1.0, -state.last_used
+            ))
+            best.last_used = now
+            best.requests += 1
+            return best.key
+
+    def record(self, key: str, status_code: int, headers: Mapping[str, str], body: bytes = b"") -> bool:
+        """
+        Update ``key``'s health from a response. Returns True when the call
+        was rate limited and should be retried on another key.
+        """
+        now = time.time()
+        with self._lock:
+            state = next((state for state in self._keys if state.key == key), None)
+            if state is None:
+                return False
+
+            fractions, resets = [], []
+            for kind in ("requests", "tokens"):
+                try:
+                    fractions.append(int(headers[f"x-ratelimit-remaining-{kind}"]) /
+                                     max(1, int(headers[f"x-ratelimit-limit-{kind}"])))
+                except (KeyError, ValueError):
+                    continue
+                resets.append(parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}")) or 0.0)
+            if fractions:
+                state.headroom = min(fractions)
+                state.headroom_until = now + max(resets)
+
+            if status_code != 429:
+                state.consecutive_429 = 0
+                if fractions and state.headroom <= 0:
+                    # Exhausted for this window: skip the key until it resets instead of collecting a 429
+                    state.cooling_until = state.headroom_until
+                return False
+
+            state.rate_limited += 1
+            state.consecutive_429 += 1
+            if b"insufficient_quota" in body:
+                wait = self.quota_cooldown
+            else:
+                retry_after_ms = parse_reset_duration(headers.get("retry-after-ms"))
+                wait = (retry_after_ms / 1000 if retry_after_ms else None) \
+                    or parse_reset_duration(headers.get("retry-after")) \
+                    or max(resets, default=0.0) \
+                    or self.cooldown * 2 ** min(state.consecutive_429 - 1, _MAX_BACKOFF_STEPS)
+            state.cooling_until = now + wait
+            logger.warning(f"API key {mask_key(key)} rate limited; cooling down for {wait:.0f}s")
+            return True
+
+    def stats(self) -> List[Dict]:
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "key": mask_key(state.key),
+                    "cooling_for": round(max(0.0, state.cooling_until - now), 1),
+                    "headroom": round(state.headroom if state.headroom_until > now else 1.0, 3),
+                    "requests": state.requests,
+                    "rate_limited": state.rate_limited,
+                }
+                for state in self._keys
+            ]
+
+
+@lru_cache(maxsize=None)
+def get_key_pool() -> Optional[APIKeyPool]:
+    """Pool over OPENAI_API_KEYS (or the single OPENAI_API_KEY); None when no key is configured."""
+    keys = settings.openai_api_key_list
+    if not keys:
+        return None
+    return APIKeyPool(keys, cooldown=settings.openai_key_cooldown, quota_cooldown=settings.openai_key_quota_cooldown)
@@ -0,0 +1,98 @@
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from app.services.tag_canonicalizer import fold_tag
+
+# Words that appear across unrelated roles and would make almost every pair "overlap"
+GENERIC_TAG_WORDS = {
+    "and", "of", "the", "in", "for", "with", "&",
+    "developer", "engineer", "senior", "junior", "lead", "specialist",
+    "executive", "professional", "expert", "skills", "management",
+}
+
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TagInvertedIndex:
+    """
+    Inverted index from lexical tag keys to candidate positions.
+
+    A tag's keys are its canonical ID plus its non-generic words, so
+    "Python Developer" overlaps with "Python". With ``fuzzy_threshold`` a job
+    key also matches candidate keys whose character-trigram Jaccard
+    similarity is at least the threshold ("postgre" ~ "postgres").
+
+    Built per request by lexical_overlap_mask; it can also be kept and
+    extended with ``add`` as candidates arrive.
+    """
+
+    def __init__(self, canonicalize: Optional[Callable[[str], str]] = None, fuzzy_threshold: Optional[float] = None):
+        self.canonicalize = canonicalize or fold_tag
+        self.fuzzy_threshold = fuzzy_threshold
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._trigram_postings: Dict[str, Set[str]] = defaultdict(set)
+        self._trigram_sizes: Dict[str, int] = {}
+
+    def keys(self, tags: Optional[Iterable[str]]) -> Set[str]:
+        keys = set()
+        for tag in tags or []:
+            key = self.canonicalize(tag.strip()) if isinstance(tag, str) else ""
+            if key:
+                keys.add(key)
+                keys.update(word for word in key.split() if word not in GENERIC_TAG_WORDS)
+        return keys
+
+    def add(self, position: int, tags: Optional[Iterable[str]]) -> None:
+        for key in self.keys(tags):
+            if key not in self._postings and self.fuzzy_threshold:
+                grams = _trigrams(key)
+                self._trigram_sizes[key] = len(grams)
+                for gram in grams:
+                    self._trigram_postings[gram].add(key)
+            self._postings[key].add(position)
+
+    def _fuzzy_keys(self, key: str) -> Set[str]:
+        grams = _trigrams(key)
+        shared = Counter(other for gram in grams for other in self._trigram_postings.get(gram, ()))
+        return {
+            other for other, count in shared.items()
+            if count / (len(grams) + self._trigram_sizes[other] - count) >= self.fuzzy_threshold
+        }
+
+    def matching(self, tags: Optional[Iterable[str]]) -> Set[int]:
+        """Positions of candidates sharing at least one (fuzzy) key with ``tags``."""
+        matched = set()
+        for key in self.keys(tags):
+            matched |= self._postings.get(key, set())
+            if self.fuzzy_threshold:
+                for other in self._fuzzy_keys(key):
+                    matched |= self._postings[other]
+        return matched
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+
+def lexical_overlap_mask(
+    job_tag_lists: List[Optional[List[str]]],
+    candidate_tag_lists: List[Optional[List[str]]],
+    canonicalize: Optional[Callable[[str], str]] = None,
+    fuzzy_threshold: Optional[float] = None
+) -> np.ndarray:
+    """jobs x candidates mask of pairs with at least one lexical (or fuzzy) tag overlap."""
+
+    index = TagInvertedIndex(canonicalize, fuzzy_threshold)
+    for position, tags in enumerate(candidate_tag_lists):
+        index.add(position, tags)
+
+    mask = np.zeros((len(job_tag_lists), len(candidate_tag_lists)), dtype=bool)
+    for j, tags in enumerate(job_tag_lists):
+        matched = index.matching(tags)
+        if matched:
+            mask[j, list(matched)] = True
+    return mask
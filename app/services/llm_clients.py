@@ -0,0 +1,459 @@
+import asyncio
+import json
+import threading
+import weakref
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+import openai
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from app.services.key_pool import APIKeyPool, get_key_pool
+from app.services.llm_metrics import AgentMetricsCallback, LLMMetrics, get_llm_metrics
+from app.services.rate_limiter import LLMRateLimiter, RateLimitTimeout, estimate_request_tokens, get_rate_limiter
+from config.Settings import settings, QuotaLimitError
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolStats:
+    """Request counters shared by the sync and async pools."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.errors = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self, failed: bool = False) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += int(failed)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "failed_requests": self.errors,
+            }
+
+
+# Marks a 429 produced locally (every key cooling, rate limit wait too long) rather than by the provider
+LOCAL_LIMIT_HEADER = "x-local-limit"
+# Carries the calling agent's name from its model to the transport; stripped before sending
+AGENT_HEADER = "x-llm-agent"
+
+
+# Embeddings count against the same organization RPM/TPM as chat completions
+_RATE_LIMITED_PATHS = ("/chat/completions", "/embeddings")
+
+
+def _is_rate_limited(request: httpx.Request, limiter: Optional[LLMRateLimiter]) -> bool:
+    return limiter is not None and request.url.path.endswith(_RATE_LIMITED_PATHS)
+
+
+def _local_limit_response(request: httpx.Request, error: QuotaLimitError) -> httpx.Response:
+    """A local 429 the OpenAI client raises as RateLimitError without retrying."""
+    headers = {"x-should-retry": "false", LOCAL_LIMIT_HEADER: "keys"}
+    if isinstance(error, RateLimitTimeout):
+        headers.update({LOCAL_LIMIT_HEADER: "rate", "retry-after": f"{error.retry_after:.3f}"})
+    return httpx.Response(
+        429,
+        headers=headers,
+        json={"error": {"message": str(error), "type": "requests", "code": "rate_limit_exceeded"}},
+        request=request
+    )
+
+
+def _request_model(request: httpx.Request) -> str:
+    try:
+        return json.loads(request.content or b"{}").get("model") or "unknown"
+    except ValueError:
+        return "unknown"
+
+
+def _take_agent(request: httpx.Request, metrics: Optional[LLMMetrics]) -> Optional[str]:
+    """Strip the agent header, counting the request as a retry if the OpenAI SDK is resending it."""
+    agent = request.headers.pop(AGENT_HEADER, None)
+    if metrics is not None and agent and request.headers.get("x-stainless-retry-count", "0") != "0":
+        metrics.record_retry(agent, _request_model(request))
+    return agent
+
+
+def _raise_local_limit(error: openai.RateLimitError) -> None:
+    """Re-raise a locally produced 429 as the QuotaLimitError (or RateLimitTimeout) behind it."""
+    headers = error.response.headers if error.response is not None else {}
+    if headers.get(LOCAL_LIMIT_HEADER):
+        body = error.body if isinstance(error.body, dict) else {}
+        message = body.get("message") or str(error)
+        if headers[LOCAL_LIMIT_HEADER] == "rate":
+            raise RateLimitTimeout(message, retry_after=float(headers.get("retry-after") or 0)) from error
+        raise QuotaLimitError(message) from error
+
+
+class _CountingTransport(httpx.BaseTransport):
+    """
+    Counts requests, reserves rate limit budget for chat completion and
+    embeddings requests and, with a key pool, sends each request with the
+    healthiest key, moving on to the next one when a key is rate limited.
+    Retries are counted per agent in ``metrics``.
+    """
+
+    def __init__(self, transport: httpx.HTTPTransport, stats: _PoolStats,
+                 limiter: Optional[LLMRateLimiter] = None, keys: Optional[APIKeyPool] = None,
+                 metrics: Optional[LLMMetrics] = None):
+        self.transport = transport
+        self.stats = stats
+        self.limiter = limiter
+        self.keys = keys
+        self.metrics = metrics
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        self.stats.started()
+        failed = True
+        try:
+            response = self.transport.handle_request(request)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            self.stats.finished(failed)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        agent = _take_agent(request, self.metrics)
+        try:
+            if _is_rate_limited(request, self.limiter):
+                self.limiter.acquire(*estimate_request_tokens(request.content))
+            while True:
+                if self.keys is None:
+                    return self._send(request)
+                key = self.keys.choose()
+                request.headers["Authorization"] = f"Bearer {key}"
+                response = self._send(request)
+                body = response.read() if response.status_code == 429 else b""
+                if not self.keys.record(key, response.status_code, response.headers, body):
+                    return response
+                response.close()
+                if self.metrics is not None and agent:
+                    self.metrics.record_retry(agent, _request_model(request))
+        except QuotaLimitError as e:
+            return _local_limit_response(request, e)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class _AsyncCountingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncHTTPTransport, stats: _PoolStats,
+                 limiter: Optional[LLMRateLimiter] = None, keys: Optional[APIKeyPool] = None,
+                 metrics: Optional[LLMMetrics] = None):
+        self.transport = transport
+        self.stats = stats
+        self.limiter = limiter
+        self.keys = keys
+        self.metrics = metrics
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        self.stats.started()
+        failed = True
+        try:
+            response = await self.transport.handle_async_request(request)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            self.stats.finished(failed)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        agent = _take_agent(request, self.metrics)
+        try:
+            if _is_rate_limited(request, self.limiter):
+                await self.limiter.aacquire(*estimate_request_tokens(request.content))
+            while True:
+                if self.keys is None:
+                    return await self._send(request)
+                key = self.keys.choose()
+                request.headers["Authorization"] = f"Bearer {key}"
+                response = await self._send(request)
+                body = await response.aread() if response.status_code == 429 else b""
+                if not self.keys.record(key, response.status_code, response.headers, body):
+                    return response
+                await response.aclose()
+                if self.metrics is not None and agent:
+                    self.metrics.record_retry(agent, _request_model(request))
+        except QuotaLimitError as e:
+            return _local_limit_response(request, e)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class _PooledChatOpenAI(ChatOpenAI):
+    """ChatOpenAI raising QuotaLimitError when the pool rejects a call locally."""
+
+    def _generate(self, *args, **kwargs):
+        try:
+            return super()._generate(*args, **kwargs)
+        except openai.RateLimitError as e:
+            _raise_local_limit(e)
+            raise
+
+    async def _agenerate(self, *args, **kwargs):
+        try:
+            return await super()._agenerate(*args, **kwargs)
+        except openai.RateLimitError as e:
+            _raise_local_limit(e)
+            raise
+
+
+class _PooledOpenAIEmbeddings(OpenAIEmbeddings):
+    """OpenAIEmbeddings raising QuotaLimitError when the pool rejects a call locally."""
+
+    def embed_documents(self, *args, **kwargs):
+        try:
+            return super().embed_documents(*args, **kwargs)
+        except openai.RateLimitError as e:
+            _raise_local_limit(e)
+            raise
+
+    async def aembed_documents(self, *args, **kwargs):
+        try:
+            return await super().aembed_documents(*args, **kwargs)
+        except openai.RateLimitError as e:
+            _raise_local_limit(e)
+            raise
+
+
+class LLMClientRegistry:
+    """
+    Process-wide ChatOpenAI / OpenAIEmbeddings instances keyed by
+    (model, temperature, max_tokens), all sharing one keep-alive HTTP pool.
+
+    httpx clients are thread-safe, so one sync pool serves every thread.
+    Async connections belong to the event loop that opened them, so each
+    running loop gets its own async pool and its own client instances;
+    clients requested outside a loop use the sync pool only.
+
+    With a ``limiter``, every chat completion and embeddings request through
+    either pool first reserves its RPM/TPM budget there, and a call that
+    would wait past the limiter's max wait raises RateLimitTimeout. With a
+    ``key_pool``, every request is sent with the healthiest key in it; when
+    all keys are cooling down, the calling model raises QuotaLimitError.
+    With ``metrics``, chat models requested for an ``agent`` record every
+    call under its name. Chat models requested with ``json_mode`` ask the
+    provider for a JSON object answer (response_format json_object) unless
+    LLM_JSON_MODE is off.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive: int = 20,
+                 keepalive_expiry: float = 60.0, timeout: float = 120.0,
+                 limiter: Optional[LLMRateLimiter] = None, key_pool: Optional[APIKeyPool] = None,
+                 metrics: Optional[LLMMetrics] = None):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._timeout = httpx.Timeout(timeout, connect=10.0)
+        self._lock = threading.RLock()
+        self._stats = _PoolStats()
+        self.limiter = limiter
+        self.key_pool = key_pool
+        self.metrics = metrics
+        self._http_client: Optional[httpx.Client] = None
+        self._loop_state = weakref.WeakKeyDictionary()  # loop -> (async pool, {key: client})
+        self._clients: Dict[Tuple, object] = {}
+        self.created = 0
+        self.reused = 0
+
+    # ---- HTTP pools --------------------------------------------------------
+    def http_client(self) -> httpx.Client:
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(
+                    transport=_CountingTransport(httpx.HTTPTransport(limits=self._limits), self._stats,
+                                                 self.limiter, self.key_pool, self.metrics),
+                    timeout=self._timeout
+                )
+            return self._http_client
+
+    def _loop_clients(self) -> Tuple[Optional[httpx.AsyncClient], Dict[Tuple, object]]:
+        """(async pool, client cache) for the running event loop, or (None, shared cache) outside one."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None, self._clients
+
+        state = self._loop_state.get(loop)
+        if state is None:
+            pool = httpx.AsyncClient(
+                transport=_AsyncCountingTransport(httpx.AsyncHTTPTransport(limits=self._limits), self._stats,
+                                                  self.limiter, self.key_pool, self.metrics),
+                timeout=self._timeout
+            )
+            state = self._loop_state[loop] = (pool, {})
+        return state
+
+    # ---- Clients -----------------------------------------------------------
+    def _get(self, key: Tuple, build):
+        with self._lock:
+            async_pool, clients = self._loop_clients()
+            client = clients.get(key)
+            if client is not None:
+                self.reused += 1
+                return client
+
+            kwargs = {"http_client": self.http_client()}
+            if async_pool is not None:
+                kwargs["http_async_client"] = async_pool
+            client = clients[key] = build(**kwargs)
+            self.created += 1
+            return client
+
+    def _api_key(self) -> Optional[str]:
+        # When pooled this is a placeholder; the transport sets the key per request
+        return self.key_pool.keys[0] if self.key_pool else settings.openai_api_key
+
+    def chat(self, model: Optional[str] = None, temperature: Optional[float] = None,
+             max_tokens: Optional[int] = None, agent: Optional[str] = None, json_mode: bool = False) -> ChatOpenAI:
+        model = model or settings.model
+        temperature = settings.temperature if temperature is None else temperature
+        max_tokens = max_tokens or settings.max_output_tokens
+        json_mode = json_mode and settings.llm_json_mode
+        instrumentation = {}
+        if json_mode:
+            instrumentation["model_kwargs"] = {"response_format": {"type": "json_object"}}
+        if agent:
+            instrumentation["metadata"] = {"agent": agent}
+            if self.metrics is not None:
+                instrumentation["callbacks"] = [AgentMetricsCallback(agent, self.metrics)]
+                instrumentation["default_headers"] = {AGENT_HEADER: agent}
+        return self._get(
+            ("chat", model, temperature, max_tokens, agent, json_mode),
+            lambda **http: _PooledChatOpenAI(
+                model=model,
+                api_key=self._api_key(),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **instrumentation,
+                **http
+            )
+        )
+
+    def chain(self, name: str, build: Callable[[ChatOpenAI], object], model: Optional[str] = None,
+              temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+              agent: Optional[str] = None, json_mode: bool = False):
+        """
+        ``build(chat model)`` once per event loop (like the models themselves)
+        and model parameters, then the same runnable for every later call under
+        ``name``. Templates and parsers are immutable, so one chain serves all
+        concurrent calls.
+        """
+        key = ("chain", name, model, temperature, max_tokens, agent, json_mode)
+        with self._lock:
+            _, clients = self._loop_clients()
+            chain = clients.get(key)
+            if chain is None:
+                chain = clients[key] = build(self.chat(model, temperature, max_tokens, agent, json_mode=json_mode))
+            return chain
+
+    def embeddings(self, model: Optional[str] = None, dimensions: Optional[int] = None) -> OpenAIEmbeddings:
+        model = model or settings.embedding_model
+        return self._get(
+            ("embeddings", model, dimensions),
+            lambda **http: _PooledOpenAIEmbeddings(model=model, dimensions=dimensions, api_key=self._api_key(), **http)
+        )
+
+    def stats(self) -> Dict:
+        """Client reuse and HTTP pool utilization."""
+        pools = []
+        with self._lock:
+            sync_pool = self._http_client
+            async_pools = [pool for pool, _ in self._loop_state.values()]
+            clients = sum(1 for cache in [self._clients] + [c for _, c in self._loop_state.values()]
+                          for key in cache if key[0] != "chain")
+            created, reused = self.created, self.reused
+        for kind, pool in [("sync", sync_pool)] + [("async", p) for p in async_pools]:
+            if pool is not None:
+                # httpcore's pool is not public API; report what it exposes
+                connections = getattr(getattr(pool._transport.transport, "_pool", None), "connections", [])
+                idle = sum(1 for c in connections if c.is_idle())
+                pools.append({"kind": kind, "connections": len(connections), "idle": idle,
+                              "active": len(connections) - idle})
+        return {
+            "clients": clients,
+            "clients_created": created,
+            "client_reuses": reused,
+            "max_connections": self._limits.max_connections,
+            "max_keepalive_connections": self._limits.max_keepalive_connections,
+            "pools": pools,
+            "rate_limit": self.limiter.stats() if self.limiter else None,
+            "api_keys": self.key_pool.stats() if self.key_pool else None,
+            **self._stats.snapshot(),
+        }
+
+
+_registry: Optional[LLMClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> LLMClientRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMClientRegistry(
+                max_connections=settings.llm_http_max_connections,
+                max_keepalive=settings.llm_http_max_keepalive,
+                keepalive_expiry=settings.llm_http_keepalive_expiry,
+                timeout=settings.llm_http_timeout,
+                limiter=get_rate_limiter(),
+                key_pool=get_key_pool(),
+                metrics=get_llm_metrics()
+            )
+        return _registry
+
+
+def get_chat_model(model: Optional[str] = None, temperature: Optional[float] = None,
+                   max_tokens: Optional[int] = None, agent: Optional[str] = None,
+                   json_mode: bool = False) -> ChatOpenAI:
+    """
+    Shared ChatOpenAI for these parameters (defaults: MODEL, TEMPERATURE,
+    MAX_OUTPUT_TOKENS); calls are recorded in /metrics under ``agent``.
+    With ``json_mode`` the provider is asked for a JSON object answer.
+    """
+    return get_client_registry().chat(model, temperature, max_tokens, agent, json_mode=json_mode)
+
+
+def get_chain(name: str, build: Callable[[ChatOpenAI], object], model: Optional[str] = None,
+              temperature: Optional[float] = None, max_tokens: Optional[int] = None, agent: Optional[str] = None,
+              json_mode: bool = False):
+    """Shared runnable ``build(get_chat_model(...))``, built once per event loop and reused under ``name``."""
+    return get_client_registry().chain(name, build, model, temperature, max_tokens, agent, json_mode=json_mode)
+
+
+def get_embeddings_client(model: Optional[str] = None, dimensions: Optional[int] = None) -> OpenAIEmbeddings:
+    """Shared OpenAIEmbeddings for this model and dimensions."""
+    return get_client_registry().embeddings(model, dimensions)
+
+
+async def ainvoke_chain(chain, inputs: Dict):
+    """
+    ainvoke a module-level LLMChain through the running loop's pooled model
+    (same model parameters). Returns the parsed output, not LLMChain's
+    {"text": ...} dict.
+    """
+    llm = chain.llm
+    runnable = get_chain(
+        f"llmchain:{id(chain)}", lambda model: chain.prompt | model | chain.output_parser,
+        llm.model_name, llm.temperature, llm.max_tokens, (llm.metadata or {}).get("agent"),
+        json_mode="response_format" in (getattr(llm, "model_kwargs", None) or {})
+    )
+    return await runnable.ainvoke(inputs)
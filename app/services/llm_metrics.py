@@ -0,0 +1,258 @@
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from config.Settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M (prompt, completion) tokens; matched by longest model-name prefix
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prefix = max((p for p in MODEL_PRICES if model.startswith(p)), key=len, default=None)
+    if prefix is None:
+        return 0.0
+    prompt_price, completion_price = MODEL_PRICES[prefix]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # not installed, or the BPE file cannot be fetched
+        logger.warning(f"tiktoken unavailable for {model} ({e}); estimating 4 characters per token")
+        return None
+
+
+def estimate_tokens(text: str, model: str) -> int:
+    """Token count of ``text`` by tiktoken, or about four characters per token without it."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class LLMMetrics:
+    """
+    Per (agent, model) LLM call metrics: calls, tokens, estimated cost and
+    retries as counters, latency and tokens per call as cumulative
+    histograms, plus latency quantiles over a rolling ``window`` (seconds),
+    rendered in the Prometheus text format. JSON repairs and re-asks are
+    counted per agent. Metrics are per process.
+    """
+
+    def __init__(self, window: float = 300.0, max_window_samples: int = 10_000):
+        self.window = window
+        self.max_window_samples = max_window_samples
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], _Histogram] = {}
+        self._recent: Dict[Tuple[str, str], Deque[Tuple[float, float]]] = {}
+
+    def _inc(self, name: str, labels: Dict[str, str], value: float = 1.0) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def _observe(self, name: str, labels: Dict[str, str], buckets, value: float) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = _Histogram(buckets)
+        histogram.observe(value)
+
+    def record_call(self, agent: str, model: str, latency: float, prompt_tokens: int, completion_tokens: int,
+                    estimated: bool = False, failed: bool = False) -> None:
+        labels = {"agent": agent, "model": model}
+        now = time.time()
+        with self._lock:
+            self._inc("llm_calls_total", {**labels, "status": "error" if failed else "ok"})
+            self._observe("llm_call_latency_seconds", labels, LATENCY_BUCKETS, latency)
+            recent = self._recent.setdefault((agent, model), deque(maxlen=self.max_window_samples))
+            recent.append((now, latency))
+            if failed:
+                return
+            source = "estimate" if estimated else "usage"
+            for kind, tokens in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+                self._inc("llm_tokens_total", {**labels, "kind": kind, "source": source}, tokens)
+                self._observe("llm_call_tokens", {**labels, "kind": kind}, TOKEN_BUCKETS, tokens)
+            self._inc("llm_cost_usd_total", labels, call_cost(model, prompt_tokens, completion_tokens))
+
+    def record_retry(self, agent: str, model: str) -> None:
+        with self._lock:
+            self._inc("llm_retries_total", {"agent": agent, "model": model})
+
+    def record_json_repair(self, agent: str, repaired: bool) -> None:
+        with self._lock:
+            self._inc("llm_json_repairs_total", {"agent": agent, "outcome": "repaired" if repaired else "failed"})
+
+    def record_json_reask(self, agent: str) -> None:
+        with self._lock:
+            self._inc("llm_json_reasks_total", {"agent": agent})
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        cutoff = time.time() - self.window
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            windows = {}
+            for key, samples in self._recent.items():
+                while samples and samples[0][0] < cutoff:
+                    samples.popleft()
+                windows[key] = sorted(value for _, value in samples)
+
+        lines: List[str] = []
+        described = set()
+
+        def describe(name: str, kind: str, help_text: str) -> None:
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter", _HELP[name])
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), histogram in histograms:
+            describe(name, "histogram", _HELP[name])
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else _number(bound)
+                lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+        # Gauges rather than a summary: the window drops old samples, so nothing here is cumulative
+        name = "llm_call_latency_recent_seconds"
+        for (agent, model), values in sorted(windows.items()):
+            describe(name, "gauge", f"LLM call latency quantiles over the last {self.window:.0f}s")
+            labels = (("agent", agent), ("model", model))
+            for q in QUANTILES:
+                value = values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+                lines.append(f"{name}{_labels(labels + (('quantile', str(q)),))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+_HELP = {
+    "llm_calls_total": "LLM calls by agent, model and outcome",
+    "llm_tokens_total": "Prompt and completion tokens, from usage metadata or tiktoken estimates",
+    "llm_cost_usd_total": "Estimated spend in USD from MODEL_PRICES",
+    "llm_retries_total": "HTTP retries of LLM calls (SDK retries and key pool rotations)",
+    "llm_json_repairs_total": "Model answers that were not valid JSON, by whether local repair fixed them",
+    "llm_json_reasks_total": "Second LLM calls made because the first answer could not be parsed",
+    "llm_call_latency_seconds": "LLM call latency",
+    "llm_call_tokens": "Tokens per LLM call",
+}
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class AgentMetricsCallback(BaseCallbackHandler):
+    """
+    Records every call of the model it is attached to under ``agent``:
+    latency, model and token usage, falling back to tiktoken estimates
+    when the response carries no usage.
+    """
+
+    run_inline = True
+
+    def __init__(self, agent: str, metrics: "LLMMetrics"):
+        self.agent = agent
+        self.metrics = metrics
+        self._runs: Dict[UUID, Tuple[float, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _started(self, run_id: UUID, prompt: str, kwargs: Dict[str, Any]) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or settings.model
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), model, prompt)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt = "\n".join(str(m.content) for batch in messages for m in batch)
+        self._started(run_id, prompt, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started(run_id, "\n".join(prompts), kwargs)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            started, model, prompt = self._runs.pop(run_id, (time.perf_counter(), settings.model, ""))
+        latency = time.perf_counter() - started
+        output = response.llm_output or {}
+        model = output.get("model_name") or model
+
+        usage = output.get("token_usage") or {}
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens"), usage.get("completion_tokens")
+        if prompt_tokens is None:
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if metadata:
+                        prompt_tokens = (prompt_tokens or 0) + metadata.get("input_tokens", 0)
+                        completion_tokens = (completion_tokens or 0) + metadata.get("output_tokens", 0)
+
+        estimated = prompt_tokens is None
+        if estimated:
+            prompt_tokens = estimate_tokens(prompt, model)
+            completion_tokens = sum(estimate_tokens(g.text, model) for gs in response.generations for g in gs)
+        self.metrics.record_call(self.agent, model, latency, prompt_tokens, completion_tokens or 0, estimated)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            started, model, _ = self._runs.pop(run_id, (time.perf_counter(), settings.model, ""))
+        self.metrics.record_call(self.agent, model, time.perf_counter() - started, 0, 0, failed=True)
+
+
+@lru_cache(maxsize=None)
+def get_llm_metrics() -> LLMMetrics:
+    return LLMMetrics(window=settings.llm_metrics_window)
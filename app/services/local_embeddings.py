@@ -0,0 +1,84 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from app.services.tag_canonicalizer import TagCanonicalizer, get_tag_canonicalizer
+from config.Settings import settings
+
+
+class LocalTagEmbeddings:
+    """
+    In-process, network-free tag embeddings with the embed_documents interface.
+
+    Tags are folded by ``canonicalizer`` (case and punctuation only when it
+    has no aliases), then embedded as hashed character n-gram TF-IDF vectors (sublinear tf, L2-normalized).
+    The IDF weights are fitted on the alias vocabulary by default so
+    vectors are stable across calls and workers; ``fit`` can refit them on a
+    larger tag corpus.
+    """
+
+    def __init__(
+        self,
+        canonicalizer: Optional[TagCanonicalizer] = None,
+        n_features: int = 2048,
+        ngram_range: Tuple[int, int] = (2, 4),
+        idf_corpus: Optional[List[str]] = None
+    ):
+        self.canonicalizer = canonicalizer or TagCanonicalizer()
+        self.n_features = n_features
+        self._vectorizer = HashingVectorizer(
+            analyzer="char_wb",
+            ngram_range=ngram_range,
+            n_features=n_features,
+            alternate_sign=False,
+            norm=None
+        )
+        self.idf = np.ones(n_features)
+        corpus = idf_corpus if idf_corpus is not None else self.canonicalizer.vocabulary()
+        if corpus:
+            self.fit(corpus)
+
+    def fit(self, texts: List[str]) -> "LocalTagEmbeddings":
+        """Refit the IDF weights on a tag corpus."""
+        counts = self._vectorizer.transform([self.canonicalizer.canonicalize(t) for t in texts])
+        document_frequency = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+        return self
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        counts = self._vectorizer.transform([self.canonicalizer.canonicalize(t) for t in texts]).tocsr()
+        counts.data = 1 + np.log(counts.data)
+        return normalize(counts.multiply(self.idf).tocsr()).toarray()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Pure CPU and fast enough per chunk to run on the event loop
+        return self.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def get_local_embeddings() -> LocalTagEmbeddings:
+    """
+    Process-wide offline embeddings used by the local and hybrid prefilter
+    backends; tags go through the alias table only when TAG_CANONICALIZATION
+    is on.
+    """
+    return _local_embeddings(settings.tag_canonicalization)
+
+
+@lru_cache(maxsize=None)
+def _local_embeddings(canonicalization: bool) -> LocalTagEmbeddings:
+    aliases = get_tag_canonicalizer()
+    # IDF is fitted on the alias vocabulary either way, so it does not depend on the setting
+    return LocalTagEmbeddings(
+        aliases if canonicalization else TagCanonicalizer(),
+        n_features=settings.local_embedding_features,
+        idf_corpus=aliases.vocabulary()
+    )
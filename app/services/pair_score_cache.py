@@ -0,0 +1,154 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.ai_match_score import MATCH_METRIC_NAMES
+from app.services.tag_canonicalizer import get_tag_canonicalizer
+from config.Settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the scoring kernel changes so stale scores are not served
+SCORING_VERSION = 2
+# Stored per pair: every MatchMetrics field, then the lexical_skip flag
+_FIELDS = len(MATCH_METRIC_NAMES) + 1
+
+
+def scoring_scope(eligibility_gates: Dict[str, float]) -> str:
+    """
+    Fingerprint of every setting that changes a pair's scores, so scores are
+    only reused under the same backend, model, storage, alias table and
+    prefilter setup.
+    """
+    backend = settings.embedding_backend.lower()
+    scope = {
+        "version": SCORING_VERSION,
+        "backend": backend,
+        "model": settings.embedding_model,
+        "dimensions": settings.embedding_dimensions,
+        "dtype": settings.embedding_storage_dtype,
+        "local_features": settings.local_embedding_features,
+        "canonicalization": settings.tag_canonicalization,
+        "aliases": get_tag_canonicalizer().fingerprint() if settings.tag_canonicalization else None,
+        "lexical_prefilter": settings.lexical_prefilter,
+        "fuzzy_threshold": settings.lexical_fuzzy_threshold,
+    }
+    if backend == "hybrid":
+        # Which pairs get rescored remotely depends on the gates
+        scope["gates"] = sorted(eligibility_gates.items())
+        scope["margin"] = settings.hybrid_borderline_margin
+    return hashlib.sha1(json.dumps(scope, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class PairScoreCache:
+    """
+    Persisted job x candidate score matrices in SQLite, one row per pair
+    keyed by (scope, job tag fingerprint, candidate tag fingerprint). Only
+    tag sets matter, so a pair keeps its scores until either side's tags
+    change. Rows beyond ``max_entries`` are evicted oldest first.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 5_000_000):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS pair_scores ("
+                "scope TEXT NOT NULL, job_fp TEXT NOT NULL, candidate_fp TEXT NOT NULL, "
+                "scores BLOB NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (scope, job_fp, candidate_fp))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS pair_scores_age ON pair_scores (updated_at)")
+            self._db.commit()
+
+    def get_matrix(
+        self,
+        scope: str,
+        job_fps: List[Optional[str]],
+        candidate_fps: List[Optional[str]]
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Stored scores for every (job, candidate) position; None fingerprints
+        never hit.
+
+        Returns: (metric name -> jobs x candidates matrix, NaN where missing,
+        plus a boolean "lexical_skip" matrix; hit mask)
+        """
+        values = np.full((_FIELDS, len(job_fps), len(candidate_fps)), np.nan)
+        candidate_positions: Dict[str, List[int]] = {}
+        for c, fp in enumerate(candidate_fps):
+            if fp is not None:
+                candidate_positions.setdefault(fp, []).append(c)
+
+        job_positions: Dict[str, List[int]] = {}
+        for j, fp in enumerate(job_fps):
+            if fp is not None:
+                job_positions.setdefault(fp, []).append(j)
+
+        with self._lock:
+            for job_fp, rows in job_positions.items():
+                for candidate_fp, blob in self._db.execute(
+                    "SELECT candidate_fp, scores FROM pair_scores WHERE scope = ? AND job_fp = ?", (scope, job_fp)
+                ):
+                    cols = candidate_positions.get(candidate_fp)
+                    if cols:
+                        values[:, np.array(rows)[:, None], np.array(cols)[None, :]] = \
+                            np.frombuffer(blob, dtype=np.float64)[:, None, None]
+
+        hit = ~np.isnan(values[-1])
+        matrices = {name: values[i] for i, name in enumerate(MATCH_METRIC_NAMES)}
+        matrices["lexical_skip"] = values[-1] == 1.0
+        return matrices, hit
+
+    def put_pairs(
+        self,
+        scope: str,
+        job_fps: List[str],
+        candidate_fps: List[str],
+        metric_matrices: Dict[str, np.ndarray],
+        pairs: np.ndarray
+    ) -> int:
+        """Store the scores at the (job, candidate) positions of the boolean ``pairs`` mask."""
+        skip = metric_matrices.get("lexical_skip")
+        now = time.time()
+        rows = []
+        for j, c in zip(*np.nonzero(pairs)):
+            scores = [metric_matrices[name][j, c] for name in MATCH_METRIC_NAMES]
+            scores.append(1.0 if skip is not None and skip[j, c] else 0.0)
+            rows.append((scope, job_fps[j], candidate_fps[c], np.asarray(scores, dtype=np.float64).tobytes(), now))
+
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO pair_scores VALUES (?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+            self._writes_since_prune += len(rows)
+            if self._writes_since_prune >= max(1, self.max_entries // 10):
+                self._prune()
+        return len(rows)
+
+    def _prune(self) -> None:
+        self._writes_since_prune = 0
+        count = self._db.execute("SELECT COUNT(*) FROM pair_scores").fetchone()[0]
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM pair_scores WHERE rowid IN "
+                "(SELECT rowid FROM pair_scores ORDER BY updated_at LIMIT ?)", (count - self.max_entries,)
+            )
+            self._db.commit()
+            logger.info(f"Pair score cache: evicted {count - self.max_entries} oldest pairs")
+
+
+@lru_cache(maxsize=None)
+def get_pair_score_cache() -> PairScoreCache:
+    return PairScoreCache(settings.pair_score_cache_path, max_entries=settings.pair_score_cache_max_entries)
@@ -0,0 +1,162 @@
+import json
+import textwrap
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from app.services.llm_metrics import estimate_tokens
+from config.Settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Strings are never trimmed below this many characters
+_MIN_TEXT = 64
+_TRIM_MARK = "…"
+# Agents reading raw document text: trimming it loses data, so only their own
+# PROMPT_INPUT_TOKEN_BUDGETS entry limits them, not PROMPT_INPUT_TOKEN_BUDGET
+FREE_TEXT_AGENTS = frozenset({"resume_extractor"})
+
+
+def compact_value(value: Any) -> Any:
+    """``value`` as plain JSON data without None, empty strings, lists or dicts, at any depth."""
+    if isinstance(value, BaseModel):
+        value = value.model_dump(mode="json")
+    if isinstance(value, dict):
+        items = ((key, compact_value(item)) for key, item in value.items())
+        return {key: item for key, item in items if item not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        items = (compact_value(item) for item in value)
+        return [item for item in items if item not in (None, "", [], {})]
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def render_payload(value: Any) -> str:
+    """
+    Prompt rendering of request data: compact JSON without empty fields.
+    Strings are returned as they are.
+    """
+    if isinstance(value, str):
+        return value
+    return json.dumps(compact_value(value), separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def compact_prompt(text: str) -> str:
+    """Template text without the common indentation of a triple-quoted literal and outer blank lines."""
+    return textwrap.dedent(text).strip() + "\n"
+
+
+def _type_hint(annotation) -> Any:
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is Union:
+        options = [arg for arg in args if arg is not type(None)]
+        if len(options) == 1:
+            return _type_hint(options[0])
+        return "|".join(str(_type_hint(option)) for option in options)
+    if origin in (list, List, tuple, Tuple, set):
+        return [_type_hint(args[0]) if args else "any"]
+    if origin in (dict, Dict):
+        return "object"
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return _model_hint(annotation)
+        if issubclass(annotation, Enum):
+            return "|".join(str(member.value) for member in annotation)
+        if issubclass(annotation, bool):
+            return "boolean"
+        if issubclass(annotation, int):
+            return "integer"
+        if issubclass(annotation, float):
+            return "number"
+        if issubclass(annotation, str):
+            return "string"
+    return "any"
+
+
+def _model_hint(model: Type[BaseModel]) -> Dict[str, Any]:
+    hint = {}
+    for name, field in model.model_fields.items():
+        value = _type_hint(field.annotation)
+        bounds = [getattr(item, attr) for item in field.metadata for attr in ("ge", "gt", "le", "lt")
+                  if getattr(item, attr, None) is not None]
+        if isinstance(value, str) and len(bounds) == 2:
+            value = f"{value} {bounds[0]}-{bounds[1]}"
+        hint[field.alias or name] = value
+    return hint
+
+
+def format_hint(model: Type[BaseModel]) -> str:
+    """
+    One-line output instructions for ``model``: field names and types as a
+    JSON example, in place of PydanticOutputParser's full JSON schema.
+    """
+    example = json.dumps(_model_hint(model), separators=(",", ":"), ensure_ascii=False)
+    return f"Return only a JSON object of this shape: {example}"
+
+
+def input_token_budget(agent: str) -> int:
+    """
+    PROMPT_INPUT_TOKEN_BUDGETS entry for ``agent``, else PROMPT_INPUT_TOKEN_BUDGET
+    (0 = unlimited); FREE_TEXT_AGENTS are unlimited without their own entry.
+    """
+    budgets = settings.prompt_input_token_budget_map
+    if agent in budgets:
+        return budgets[agent]
+    return 0 if agent in FREE_TEXT_AGENTS else settings.prompt_input_token_budget
+
+
+def _largest_part(value: Any, path: Tuple = ()) -> Optional[Tuple[int, Tuple]]:
+    """(size, path) of the longest trimmable string or list in ``value``."""
+    best = None
+    if isinstance(value, str) and len(value) > _MIN_TEXT + len(_TRIM_MARK):
+        best = (len(value), path)
+    elif isinstance(value, list) and len(value) > 1:
+        best = (len(render_payload(value)), path)
+    children = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else ()
+    for key, item in children:
+        candidate = _largest_part(item, path + (key,))
+        if candidate and (best is None or candidate[0] > best[0]):
+            best = candidate
+    return best
+
+
+def _trim(value: Any, path: Tuple, ratio: float) -> Any:
+    if path:
+        value[path[0]] = _trim(value[path[0]], path[1:], ratio)
+        return value
+    if isinstance(value, str):
+        return value[:max(_MIN_TEXT, int(len(value) * ratio))] + _TRIM_MARK
+    return value[:max(1, int(len(value) * ratio))]
+
+
+def render_inputs(agent: str, payloads: Dict[str, Any], model: Optional[str] = None) -> Dict[str, str]:
+    """
+    Render each prompt variable in ``payloads`` with render_payload and keep
+    their total within ``agent``'s input-token budget (tiktoken count): while
+    over it, the longest string or list among them is cut in proportion to
+    the excess. Values are copied before trimming.
+    """
+    model = model or settings.model
+    budget = input_token_budget(agent)
+    rendered = {name: render_payload(value) for name, value in payloads.items()}
+    if budget <= 0:
+        return rendered
+    tokens = sum(estimate_tokens(text, model) for text in rendered.values())
+    if tokens <= budget:
+        return rendered
+
+    original = tokens
+    data = {name: value if isinstance(value, str) else compact_value(value) for name, value in payloads.items()}
+    while tokens > budget:
+        largest = _largest_part(data)
+        if largest is None:
+            break
+        # Slightly more than the excess, so a handful of rounds is enough
+        data = _trim(data, largest[1], max(0.0, 1 - (tokens - budget) / tokens) * 0.95)
+        rendered = {name: render_payload(value) for name, value in data.items()}
+        tokens = sum(estimate_tokens(text, model) for text in rendered.values())
+    logger.warning(f"{agent} prompt inputs trimmed from {original} to {tokens} tokens (budget {budget})")
+    return rendered
@@ -0,0 +1,283 @@
+import asyncio
+import json
+import math
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from config.Settings import settings, QuotaLimitError
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bucket state: (available requests, available tokens, last refill time)
+BucketState = Tuple[float, float, float]
+
+
+class RateLimitTimeout(QuotaLimitError):
+    """
+    Raised when a call would have to wait longer than the limiter's
+    max_wait; ``retry_after`` is that wait in seconds. The API keys may
+    still have quota left, so routes report it with quota_http_exception
+    rather than the key quota message.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def quota_error_detail(error: QuotaLimitError) -> str:
+    """Client-facing message for a QuotaLimitError."""
+    if isinstance(error, RateLimitTimeout):
+        return f"LLM rate limit reached. Please retry in {math.ceil(error.retry_after)} seconds."
+    return "All API keys have reached their quota limit. Please try again later."
+
+
+def quota_http_exception(error: QuotaLimitError) -> HTTPException:
+    """429 for a QuotaLimitError, with Retry-After when the local rate limiter refused the call."""
+    headers = {"Retry-After": str(math.ceil(error.retry_after))} if isinstance(error, RateLimitTimeout) else None
+    return HTTPException(status_code=429, detail=quota_error_detail(error), headers=headers)
+
+
+def _take(state: Optional[BucketState], now: float, cost: Tuple[float, float],
+          limits: Tuple[float, float], max_wait: float) -> Tuple[Optional[BucketState], float]:
+    """
+    Refill both buckets to ``now`` and reserve ``cost`` (requests, tokens).
+
+    Levels may go negative: a caller that reserves beyond what is available
+    is told how long to wait until its share has refilled, and later callers
+    queue behind it. Reservations needing more than ``max_wait`` are not
+    committed (new state None).
+
+    Returns: (new state or None, seconds to wait)
+    """
+    levels = list(limits) if state is None else [
+        min(limit, level + limit / 60.0 * max(0.0, now - state[2]))
+        for level, limit in zip(state[:2], limits)
+    ]
+    wait = 0.0
+    for i, limit in enumerate(limits):
+        if limit > 0:
+            # A single call larger than the whole budget still gets through, alone
+            levels[i] -= min(cost[i], limit)
+            if levels[i] < 0:
+                wait = max(wait, -levels[i] / (limit / 60.0))
+    if wait > max_wait:
+        return None, wait
+    return (levels[0], levels[1], now), wait
+
+
+class MemoryBucketBackend:
+    """Buckets for this process only; also the local stand-in for the Redis backend in tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, BucketState] = {}
+
+    def reserve(self, key: str, cost: Tuple[float, float], limits: Tuple[float, float], max_wait: float) -> float:
+        with self._lock:
+            state, wait = _take(self._buckets.get(key), time.time(), cost, limits, max_wait)
+            if state is not None:
+                self._buckets[key] = state
+            return wait
+
+
+class SQLiteBucketBackend:
+    """
+    Buckets in a SQLite file, shared by every worker process on the host.
+    Each reservation is one IMMEDIATE transaction, so concurrent workers
+    serialize on the file lock rather than overspending the budget.
+    """
+
+    def __init__(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, requests REAL NOT NULL, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def reserve(self, key: str, cost: Tuple[float, float], limits: Tuple[float, float], max_wait: float) -> float:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT requests, tokens, updated_at FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                state, wait = _take(row, time.time(), cost, limits, max_wait)
+                if state is not None:
+                    self._db.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)", (key, *state))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            return wait
+
+
+# Same arithmetic as _take, run atomically on the server with the server's clock
+_RESERVE_SCRIPT = """
+local limits = {tonumber(ARGV[3]), tonumber(ARGV[4])}
+local cost = {tonumber(ARGV[1]), tonumber(ARGV[2])}
+local max_wait = tonumber(ARGV[5])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'updated_at')
+local levels = {limits[1], limits[2]}
+if state[3] then
+  local elapsed = math.max(0, now - tonumber(state[3]))
+  for i = 1, 2 do
+    levels[i] = math.min(limits[i], tonumber(state[i]) + limits[i] / 60 * elapsed)
+  end
+end
+local wait = 0
+for i = 1, 2 do
+  if limits[i] > 0 then
+    levels[i] = levels[i] - math.min(cost[i], limits[i])
+    if levels[i] < 0 then
+      wait = math.max(wait, -levels[i] / (limits[i] / 60))
+    end
+  end
+end
+if wait <= max_wait then
+  redis.call('HSET', KEYS[1], 'requests', levels[1], 'tokens', levels[2], 'updated_at', now)
+  redis.call('EXPIRE', KEYS[1], 120)
+end
+return tostring(wait)
+"""
+
+
+class RedisBucketBackend:
+    """
+    Buckets on a Redis-compatible server, shared by every node. ``client``
+    is anything with redis-py's ``eval(script, numkeys, *keys_and_args)``.
+    """
+
+    def __init__(self, client, prefix: str = "llm-rate-limit:"):
+        self._client = client
+        self._prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBucketBackend":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("LLM_RATE_LIMIT_BACKEND=redis requires the 'redis' package") from e
+        return cls(redis.Redis.from_url(url))
+
+    def reserve(self, key: str, cost: Tuple[float, float], limits: Tuple[float, float], max_wait: float) -> float:
+        wait = self._client.eval(_RESERVE_SCRIPT, 1, self._prefix + key, *cost, *limits, max_wait)
+        return float(wait.decode() if isinstance(wait, bytes) else wait)
+
+
+class LLMRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute token buckets per model, held
+    in a backend shared by every caller of that backend (process, host or
+    cluster). Token costs are estimates made before the call.
+    """
+
+    def __init__(self, backend, requests_per_minute: int, tokens_per_minute: int, max_wait: float = 60.0):
+        self.backend = backend
+        self.limits = (float(max(0, requests_per_minute)), float(max(0, tokens_per_minute)))
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.waited_seconds = 0.0
+
+    def _reserve(self, key: str, tokens: int) -> float:
+        wait = self.backend.reserve(key, (1.0, float(tokens)), self.limits, self.max_wait)
+        with self._lock:
+            if wait > self.max_wait:
+                self.rejected += 1
+            else:
+                self.granted += 1
+                self.delayed += int(wait > 0)
+                self.waited_seconds += wait
+        if wait > self.max_wait:
+            raise RateLimitTimeout(f"LLM rate limit for {key}: next slot in {wait:.1f}s exceeds {self.max_wait:.0f}s",
+                                   retry_after=wait)
+        return wait
+
+    def acquire(self, key: str, tokens: int) -> float:
+        """Reserve one request and ``tokens`` for ``key``, blocking until they are available."""
+        wait = self._reserve(key, tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, key: str, tokens: int) -> float:
+        wait = await asyncio.to_thread(self._reserve, key, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests_per_minute": self.limits[0],
+                "tokens_per_minute": self.limits[1],
+                "granted": self.granted,
+                "delayed": self.delayed,
+                "rejected": self.rejected,
+                "waited_seconds": round(self.waited_seconds, 3),
+            }
+
+
+def estimate_request_tokens(body: bytes) -> Tuple[str, int]:
+    """
+    (model, estimated tokens) for a chat completion request body: about four
+    characters per prompt token plus the completion allowance, which is
+    what the provider counts against the budget up front. For an embeddings
+    body, the tokens of its inputs (token id lists are counted exactly).
+    """
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return "unknown", settings.max_output_tokens
+    inputs = payload.get("input")
+    if inputs is not None:
+        if not isinstance(inputs, list) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        tokens = sum(len(item) if isinstance(item, list) else math.ceil(len(str(item)) / 4) for item in inputs)
+        return payload.get("model") or "unknown", max(1, tokens)
+    chars = 0
+    for message in payload.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        chars += len(content or "") + 16  # role and framing
+    completion = payload.get("max_completion_tokens") or payload.get("max_tokens") or settings.max_output_tokens
+    return payload.get("model") or "unknown", math.ceil(chars / 4) + int(completion)
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter() -> Optional[LLMRateLimiter]:
+    """Limiter configured by LLM_RATE_LIMIT_*; None when disabled."""
+    backend_name = settings.llm_rate_limit_backend.lower()
+    if backend_name in ("", "none", "off") or \
+            (settings.llm_requests_per_minute <= 0 and settings.llm_tokens_per_minute <= 0):
+        return None
+    if backend_name == "memory":
+        backend = MemoryBucketBackend()
+    elif backend_name == "sqlite":
+        backend = SQLiteBucketBackend(settings.llm_rate_limit_path)
+    elif backend_name == "redis":
+        backend = RedisBucketBackend.from_url(settings.llm_rate_limit_redis_url)
+    else:
+        raise ValueError(f"Unknown LLM_RATE_LIMIT_BACKEND: {settings.llm_rate_limit_backend}")
+    logger.info(f"LLM rate limit: {settings.llm_requests_per_minute} RPM, "
+                f"{settings.llm_tokens_per_minute} TPM via {backend_name}")
+    return LLMRateLimiter(backend, settings.llm_requests_per_minute, settings.llm_tokens_per_minute,
+                          max_wait=settings.llm_rate_limit_max_wait)
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config.Settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+_INNER_DOT = re.compile(r"(?<=\w)\.(?=\w)")
+_SEPARATORS = re.compile(r"[\s_\-/,;:|]+")
+_EDGE_PUNCTUATION = " \"'`()[]{}!?*"
+# Bump when the alias matching rules change, so fingerprints (and cached scores) change with them
+MATCHING_VERSION = 2
+
+
+def fold_tag(text: str) -> str:
+    """
+    Case- and punctuation-folded form of a tag: "React.JS" -> "reactjs",
+    "CI/CD" -> "ci cd", "Full-Stack" -> "full stack". Symbols that carry
+    meaning ("c++", "c#", ".net") are kept.
+    """
+    text = _INNER_DOT.sub("", text.casefold())
+    text = _SEPARATORS.sub(" ", text).strip(_EDGE_PUNCTUATION)
+    return text.rstrip(".").strip()
+
+
+class TagCanonicalizer:
+    """
+    Maps noisy tag variants to canonical tag IDs before embedding.
+
+    A tag is folded (fold_tag), then looked up in the alias table as a whole,
+    so "ReactJS", "React.js" and "react" share one ID. Inside a longer tag
+    only multi-word aliases are replaced, longest first and on word
+    boundaries ("React JS Developer" -> "react developer"); one-word aliases
+    such as "go" or "ci" only ever match a whole tag, so "Go-to-market
+    strategy" keeps its meaning. The table is {"canonical": ["alias", ...]},
+    loadable from JSON files and extendable at runtime with ``add``.
+    """
+
+    def __init__(self, table: Optional[Dict[str, List[str]]] = None):
+        self._aliases: Dict[str, str] = {}
+        # Multi-word aliases and canonical forms, replaceable inside a longer tag
+        self._phrases: Dict[str, str] = {}
+        self._longest = 1
+        self._cache: Dict[str, str] = {}
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+        self.update(table or {})
+
+    @classmethod
+    def from_file(cls, path: Path) -> "TagCanonicalizer":
+        canonicalizer = cls()
+        canonicalizer.load_file(path)
+        return canonicalizer
+
+    def load_file(self, path: Path) -> None:
+        """Merge a JSON alias table into this one."""
+        with open(path, encoding="utf-8") as f:
+            self.update(json.load(f))
+
+    def update(self, table: Dict[str, Iterable[str]]) -> None:
+        for canonical, aliases in table.items():
+            self.add(canonical, aliases)
+
+    def add(self, canonical: str, aliases: Iterable[str]) -> None:
+        canonical = fold_tag(canonical)
+        with self._lock:
+            # A canonical phrase matches itself, so "google cloud platform" is not read as alias "google cloud"
+            if len(canonical.split()) > 1:
+                self._phrases[canonical] = canonical
+                self._longest = max(self._longest, len(canonical.split()))
+            for alias in aliases:
+                alias = fold_tag(alias)
+                if alias and alias != canonical:
+                    self._aliases[alias] = canonical
+                    if len(alias.split()) > 1:
+                        self._phrases[alias] = canonical
+                        self._longest = max(self._longest, len(alias.split()))
+            self._cache.clear()
+            self._fingerprint = None
+
+    def fingerprint(self) -> str:
+        """Short hash of the alias table; changes whenever an alias is added or remapped."""
+        with self._lock:
+            if self._fingerprint is None:
+                table = json.dumps(
+                    [MATCHING_VERSION, sorted(self._aliases.items()), sorted(self._phrases)], ensure_ascii=False
+                )
+                self._fingerprint = hashlib.sha1(table.encode("utf-8")).hexdigest()[:16]
+            return self._fingerprint
+
+    def vocabulary(self) -> List[str]:
+        """Every alias and canonical form in the table."""
+        return sorted(set(self._aliases) | set(self._aliases.values()))
+
+    def canonicalize(self, text: str) -> str:
+        """Canonical tag ID of ``text`` (empty string for a blank tag)."""
+        if not isinstance(text, str):
+            return ""
+        cached = self._cache.get(text)
+        if cached is None:
+            if len(self._cache) >= 100_000:
+                self._cache.clear()
+            cached = self._cache[text] = self._canonicalize(fold_tag(text))
+        return cached
+
+    def _canonicalize(self, text: str) -> str:
+        if text in self._aliases:
+            return self._aliases[text]
+
+        words, out, i = text.split(), [], 0
+        while i < len(words):
+            for size in range(min(self._longest, len(words) - i), 1, -1):
+                phrase = " ".join(words[i:i + size])
+                if phrase in self._phrases:
+                    out.append(self._phrases[phrase])
+                    i += size
+                    break
+            else:
+                out.append(words[i])
+                i += 1
+        return " ".join(out)
+
+    def vocabulary_reduction(self, tag_lists: Iterable[Optional[List[str]]]) -> Dict[str, float]:
+        """How many unique strings the tag lists collapse to once canonicalized."""
+        raw, canonical = set(), set()
+        for tags in tag_lists:
+            for tag in tags or []:
+                key = tag.strip() if isinstance(tag, str) else ""
+                if key:
+                    raw.add(key)
+                    canonical.add(self.canonicalize(key))
+        return {
+            "raw_tags": len(raw),
+            "canonical_tags": len(canonical),
+            "reduction": round(1 - len(canonical) / len(raw), 4) if raw else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+
+@lru_cache(maxsize=None)
+def get_tag_canonicalizer() -> TagCanonicalizer:
+    """Process-wide canonicalizer loaded from TAG_SYNONYMS_FILE (alias-free if missing)."""
+    path = settings.tag_synonyms_path
+    if not path.exists():
+        logger.warning(f"Tag alias file {path} not found, canonicalizing by case and punctuation only")
+        return TagCanonicalizer()
+    canonicalizer = TagCanonicalizer.from_file(path)
+    logger.info(f"Loaded {len(canonicalizer)} tag aliases from {path}")
+    return canonicalizer
+
+
+def prefilter_canonicalizer():
+    """canonicalize callable for the prefilter, or None when TAG_CANONICALIZATION is off."""
+    return get_tag_canonicalizer().canonicalize if settings.tag_canonicalization else None
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.services.ai_match_score import collect_unique_tags
+from app.services.embedding_store import get_embeddings
+from app.services.tag_canonicalizer import prefilter_canonicalizer
+from config.Settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def tags_fingerprint(tags: Optional[List[str]], canonicalize: Optional[Callable[[str], str]] = None) -> str:
+    """
+    Order- and case-insensitive fingerprint of a tag list (of its canonical
+    IDs when given). Duplicates count, as they do in score_all_pairs.
+    """
+    keys = sorted(
+        key.casefold() for tag in tags or [] if isinstance(tag, str)
+        if (key := canonicalize(tag.strip()) if canonicalize and tag.strip() else tag.strip())
+    )
+    return hashlib.sha1("\n".join(keys).encode("utf-8")).hexdigest()
+
+
+class TagRegistry:
+    """
+    SQLite registry of the tags embedded at ingest time, keyed by
+    (kind, key) where kind is "candidate" or "job". The vectors themselves
+    live in the shared EmbeddingStore; the registry records which tag set
+    (by fingerprint) each entity was embedded with, for reporting. Matching
+    does not depend on it: embedded tags are reused through the store.
+    """
+
+    def __init__(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entities ("
+                "kind TEXT NOT NULL, key TEXT NOT NULL, fingerprint TEXT NOT NULL, tags TEXT NOT NULL, "
+                "model TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (kind, key))"
+            )
+            self._db.commit()
+
+    def register(self, kind: str, key: str, tags: List[str], fingerprint: str, model: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entities (kind, key, fingerprint, tags, model, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, fingerprint, json.dumps(tags), model, time.time())
+            )
+            self._db.commit()
+
+    def lookup(self, kind: str, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint, tags, model, updated_at FROM entities WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"fingerprint": row[0], "tags": json.loads(row[1]), "model": row[2], "updated_at": row[3]}
+
+    def current_keys(self, kind: str, entities: Iterable[Tuple[Optional[str], Optional[List[str]]]],
+                     canonicalize: Optional[Callable[[str], str]] = None) -> List[str]:
+        """Keys among (key, tags) whose registered tag set still matches ``tags``."""
+        current = []
+        for key, tags in entities:
+            if key and tags:
+                entry = self.lookup(kind, key)
+                if entry and entry["model"] == settings.embedding_model \
+                        and entry["fingerprint"] == tags_fingerprint(tags, canonicalize):
+                    current.append(key)
+        return current
+
+
+@lru_cache(maxsize=None)
+def get_tag_registry() -> TagRegistry:
+    return TagRegistry(settings.tag_registry_path)
+
+
+def _ingest_texts(tags: Optional[List[str]]) -> Tuple[Optional[Callable[[str], str]], List[str]]:
+    """(canonicalize, unique tag texts to embed); no texts when ingest-time embedding does not apply."""
+    if not settings.embed_tags_on_ingest or settings.embedding_backend.lower() == "local" or not tags:
+        return None, []
+    canonicalize = prefilter_canonicalizer()
+    return canonicalize, collect_unique_tags([tags], canonicalize)
+
+
+def _register(kind: str, tags: List[str], texts: List[str], key: Optional[str], canonicalize) -> str:
+    fingerprint = tags_fingerprint(tags, canonicalize)
+    key = key or fingerprint
+    get_tag_registry().register(kind, key, texts, fingerprint, settings.embedding_model)
+    logger.info(f"Embedded {len(texts)} {kind} tags at ingest for {kind} {key}")
+    return f"{kind}:{key}@{fingerprint[:16]}"
+
+
+def embed_ingested_tags(kind: str, tags: Optional[List[str]], key: Optional[str] = None) -> Optional[str]:
+    """
+    Embed freshly generated tags into the shared embedding store and register
+    them under ``key`` (or their fingerprint when no key is known yet).
+
+    Returns a vector handle "kind:key@fingerprint", or None when ingest-time
+    embedding is off, there are no tags, or embedding failed (never raises:
+    matching will embed the tags later instead).
+    """
+    canonicalize, texts = _ingest_texts(tags)
+    if not texts:
+        return None
+
+    try:
+        get_embeddings().embed_documents(texts)
+        return _register(kind, tags, texts, key, canonicalize)
+    except Exception as e:
+        logger.warning(f"Ingest-time embedding of {len(texts)} {kind} tags failed: {str(e)}")
+        return None
+
+
+async def aembed_ingested_tags(kind: str, tags: Optional[List[str]], key: Optional[str] = None) -> Optional[str]:
+    """Async embed_ingested_tags: embeds with the async client, the registry write runs in a thread."""
+    canonicalize, texts = _ingest_texts(tags)
+    if not texts:
+        return None
+
+    try:
+        await get_embeddings().aembed_documents(texts)
+        return await asyncio.to_thread(_register, kind, tags, texts, key, canonicalize)
+    except Exception as e:
+        logger.warning(f"Ingest-time embedding of {len(texts)} {kind} tags failed: {str(e)}")
+        return None
@@ -0,0 +1,71 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+STORAGE_DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+
+def check_storage_dtype(dtype: str) -> str:
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Unknown embedding storage dtype '{dtype}', expected one of {sorted(STORAGE_DTYPES)}")
+    return dtype
+
+
+def quantize(vectors, dtype: str = "float32") -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Encode a [n x dim] matrix for storage.
+
+    Returns: (data in ``dtype``, per-vector float32 scales for int8 else None).
+    int8 rows are scaled symmetrically so their largest component maps to 127.
+    """
+
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if check_storage_dtype(dtype) != "int8":
+        return matrix.astype(STORAGE_DTYPES[dtype]), None
+
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    data = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return data, scales.astype(np.float32)
+
+
+def dequantize(data, scales=None) -> np.ndarray:
+    """float32 vectors back from quantize() output (a single row or a matrix)."""
+
+    vectors = np.asarray(data, dtype=np.float32)
+    if scales is None:
+        return vectors
+    scales = np.asarray(scales, dtype=np.float32)
+    return vectors * (scales[..., None] if vectors.ndim > 1 else scales)
+
+
+def roundtrip(vectors, dtype: str = "float32") -> np.ndarray:
+    """The float32 vectors a store using ``dtype`` would serve back for ``vectors``."""
+
+    return dequantize(*quantize(vectors, dtype))
+
+
+def truncate_dimensions(vectors, dimensions: Optional[int]) -> np.ndarray:
+    """
+    Shorten embeddings to their first ``dimensions`` components and re-normalize,
+    which is what the text-embedding-3 ``dimensions`` parameter does server side.
+    """
+
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if not dimensions or dimensions >= matrix.shape[1]:
+        return matrix
+    matrix = matrix[:, :dimensions]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def bytes_per_vector(dim: int, dtype: str = "float32") -> int:
+    """Storage cost of one vector, including its int8 scale."""
+
+    return dim * np.dtype(STORAGE_DTYPES[check_storage_dtype(dtype)]).itemsize + (4 if dtype == "int8" else 0)
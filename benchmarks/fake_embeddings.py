@@ -0,0 +1,46 @@
+import hashlib
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+
+class NgramEmbeddings:
+    """
+    Deterministic, offline stand-in for OpenAIEmbeddings.
+
+    Each tag is the normalized sum of seeded random vectors for its character
+    trigrams and words, so related tags ("React", "React.js") get similar
+    vectors the way a real embedding model would. A shared component
+    (``baseline``) gives unrelated tags the ~0.3 cosine floor of
+    text-embedding-3, so scores land in a realistic range.
+    """
+
+    def __init__(self, dim: int = 1536, baseline: float = 0.65):
+        self.dim = dim
+        self.baseline = baseline
+        self.calls = 0
+        self._component = lru_cache(maxsize=200_000)(self._seeded_vector)
+
+    def _seeded_vector(self, feature: str) -> np.ndarray:
+        seed = int(hashlib.sha1(feature.encode("utf-8")).hexdigest()[:8], 16)
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def _vector(self, text: str) -> np.ndarray:
+        text = " ".join(text.casefold().split())
+        padded = f"  {text}  "
+        features = [padded[i:i + 3] for i in range(len(padded) - 2)] + [f"w:{w}" for w in text.split()]
+        vector = np.sum([self._component(f) for f in features], axis=0)
+        vector = vector / np.linalg.norm(vector) + self.baseline * self._component("<shared>")
+        return vector / np.linalg.norm(vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self._vector(t).tolist() for t in texts]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,55 @@
+"""
+Instant stand-in for the agents' chat models: canned JSON answers per
+agent, no network and no API key. ``install_fake_models`` must run before
+the agents are imported, since most of them create their model at import.
+"""
+
+import json
+import os
+from typing import List, Optional, Tuple
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_core.language_models import FakeListChatModel
+
+from app.services.llm_clients import get_client_registry
+
+_JD_FIELDS = {"keyResponsibilities": ["Own the ingestion service"], "softSkills": ["Ownership"],
+              "technicalSkills": ["Python"], "education": ["B.Tech"], "certifications": ["AWS SAA"],
+              "niceToHave": ["Kafka"]}
+
+CANNED = {
+    "resume_analyze": {"matchScore": 72, "aiInsights": {"strengths": [{"title": "Python", "weight": "0.8"}]}},
+    "ai_question_generate": {"ai_score": 70, "summary": {"experience_match": {}, "skill_match": {}},
+                             "advice": {"questions_to_ask": ["How did you scale the ingestion pipeline?"]}},
+    "jd_genrator": {"keyResponsibilities": ["Build APIs"], "softSkills": ["Ownership"],
+                    "technicalSkills": ["Python"], "education": ["B.Tech"]},
+    "jd_title_suggestion": {"title": ["Backend Engineer"]},
+    "job_taging": {"tags": ["python", "fastapi"]},
+    "ai_feedback": {"enhanced": "Clear and specific feedback."},
+    "evaluation_agent": {"recommendation": "hire", "confidenceScore": 80},
+    "jd_enhance": _JD_FIELDS,
+    "jd_regenrate": _JD_FIELDS,
+}
+
+# (agent, prompt text) of every call, in order
+PROMPTS: List[Tuple[Optional[str], str]] = []
+
+
+class FakeChatModel(FakeListChatModel):
+    # The ChatOpenAI fields ainvoke_chain reads back off a chain's model
+    model_name: str = "gpt-4o-mini"
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs) -> str:
+        PROMPTS.append(((self.metadata or {}).get("agent"), "\n".join(str(m.content) for m in messages)))
+        return super()._call(messages, stop, run_manager, **kwargs)
+
+
+def install_fake_models() -> None:
+    def fake_chat(model=None, temperature=None, max_tokens=None, agent=None, json_mode=False):
+        return FakeChatModel(responses=[json.dumps(CANNED.get(agent, {}))], model_name=model or "gpt-4o-mini",
+                             temperature=temperature, max_tokens=max_tokens, metadata={"agent": agent})
+
+    get_client_registry().chat = fake_chat
@@ -0,0 +1,158 @@
+"""
+Per-call CPU overhead of the agents' prompt and chain setup.
+
+Runs each agent entry point against an instant fake chat model (canned
+JSON answers, no network, no API key), so what is timed is everything the
+agent does around the model call: building templates, escaping prompts,
+constructing chains, formatting the prompt and parsing the answer.
+
+The fake replaces LLMClientRegistry.chat before the agents are imported,
+so module-level models are fakes too and the script runs unchanged on
+older revisions; to compare, run it on the old revision with --output and
+on the new one with --baseline.
+
+Usage:
+    python -m benchmarks.prompt_overhead
+    python -m benchmarks.prompt_overhead --calls 500 --output prompt_report.json
+    python -m benchmarks.prompt_overhead --baseline prompt_report.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import warnings
+from pathlib import Path
+from typing import Callable, Dict
+
+from benchmarks.fake_llm import install_fake_models
+from benchmarks.scoring_benchmark import _git_commit
+
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    """name -> coroutine factory (or plain callable) exercising one agent call."""
+    from agents import resume_analyze
+    from agents.ai_feedback import aenhance_feedback
+    from agents.ai_question_generate import agenerate_interview_questions
+    from agents.evaluation_agent import aevaluate_interview
+    from agents.jd_enhance import key_resp_chain
+    from agents.jd_genrator import areturn_jd
+    from agents.jd_title_suggestion import atitle_suggests
+    from agents.job_taging import areturn_jd as areturn_tags
+    from app.models.batch_analyze_model import CandidateRequest, JobRequest
+    from app.models.evaluation_model import InterviewSummaryRequest
+    from app.models.feedback_model import EnhanceFeedbackRequest
+    from app.models.jd_model import JobTitleAISuggestInput
+    from app.models.resume_analyze_model import AIQuestionRequest, CandidateAiQuestion, JobAiQuestion
+    from app.services.llm_clients import ainvoke_chain
+
+    job = JobRequest(job_id="j1", title="Backend Engineer", description="Build ingestion APIs",
+                     experience_level="Mid", technical_skills=["Python", "FastAPI", "AWS"],
+                     responsibilities=["Own the ingestion service"], softSkills=["Ownership"],
+                     qualification=["B.Tech"], job_tag=["python", "fastapi", "aws"])
+    candidates = [
+        CandidateRequest(candidateId=f"c{i}", currentTitle="Engineer", name="Asha Rao", phone=None,
+                         email="asha@example.com", location="Pune", experience_level="Mid",
+                         technical_skills=["Python", "Django"], softSkills=["Teamwork"],
+                         qualification=["B.E."], candidate_tag=["python", "django"])
+        for i in range(10)
+    ]
+    question_request = AIQuestionRequest(
+        jobs=JobAiQuestion(job_id="j1", title="Backend Engineer", technical_skills=["Python", "AWS"]),
+        candidates=CandidateAiQuestion(candidateId="c1", technical_skills=["Python"])
+    )
+    title_input = JobTitleAISuggestInput(title="Backend Engineer", experienceRange="3-5",
+                                         department="Engineering", keyResponsibilities=["Build APIs"],
+                                         softSkills=["Ownership"], technicalSkills=["Python"], education=["B.Tech"])
+
+    return {
+        "resume_analyze.pair (sync)": lambda: resume_analyze._analyze_candidate_for_job(
+            job, candidates[0], resume_analyze._build_prompt_template()),
+        "resume_analyze.batch (1 job x 10 candidates)": lambda: resume_analyze.generate_pipeline_analysis_async(
+            [(job, candidates)], max_concurrent=1),
+        "ai_question_generate": lambda: agenerate_interview_questions(question_request),
+        "jd_genrator": lambda: areturn_jd("Backend Engineer", "3-5", "Engineering", "Platform"),
+        "jd_title_suggestion": lambda: atitle_suggests(title_input),
+        "job_taging": lambda: areturn_tags("Backend Engineer", "3-5", "Build ingestion APIs", ["Build APIs"],
+                                           ["Python"], ["Ownership"], ["B.Tech"], ["AWS"]),
+        "ai_feedback": lambda: aenhance_feedback(EnhanceFeedbackRequest(text="good", context="interview")),
+        "evaluation_agent": lambda: aevaluate_interview(InterviewSummaryRequest(technicalSkills="Strong Python")),
+        "jd_refine (jd_enhance chain)": lambda: ainvoke_chain(key_resp_chain, {
+            "title": "Backend Engineer", "experienceRange": "3-5", "department": "Engineering",
+            "subDepartment": "Platform", "keyResponsibilities": ["Build APIs"]}),
+    }
+
+
+async def _time_case(call: Callable[[], object], calls: int, warmup: int) -> Dict[str, float]:
+    async def once():
+        result = call()
+        if asyncio.iscoroutine(result):
+            await result
+
+    for _ in range(warmup):
+        await once()
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(calls):
+        await once()
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    return {"cpu_us_per_call": round(cpu / calls * 1e6, 1), "wall_us_per_call": round(wall / calls * 1e6, 1)}
+
+
+def add_speedups(report: Dict, baseline: Dict) -> None:
+    """cpu_speedup_vs_baseline = baseline CPU per call / current CPU per call."""
+    previous = baseline.get("cases", {})
+    for name, stats in report["cases"].items():
+        old = previous.get(name, {}).get("cpu_us_per_call")
+        if old and stats["cpu_us_per_call"]:
+            stats["baseline_cpu_us_per_call"] = old
+            stats["cpu_speedup_vs_baseline"] = round(old / stats["cpu_us_per_call"], 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="timed calls per case")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed calls first (lazy compilation, caches)")
+    parser.add_argument("--baseline", type=Path, help="earlier report to compute speedups against")
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    # The agents print and log per call; keep that out of the measurement
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+    install_fake_models()
+    cases = build_cases()
+
+    async def run_all():
+        results = {}
+        for name, call in cases.items():
+            print(f"timing {name}...", file=sys.stderr)
+            stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+            try:
+                results[name] = await _time_case(call, args.calls, args.warmup)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+        return results
+
+    report = {
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "calls": args.calls,
+        "cases": asyncio.run(run_all()),
+    }
+    if baseline:
+        add_speedups(report, baseline)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Input tokens per agent prompt on the match fixture set.
+
+Runs the agents against the fake chat model from ``fake_llm`` on the jobs
+and candidates of ``fixtures/match_fixture.json`` and counts the tokens of
+every prompt they send (tiktoken, or about four characters per token when
+its encodings are unavailable; the report says which). Like
+``prompt_overhead`` it only drives public entry points, so it also runs on
+older revisions: run it there with --output and here with --baseline.
+
+Usage:
+    python -m benchmarks.prompt_tokens --output prompt_tokens.json
+    python -m benchmarks.prompt_tokens --baseline prompt_tokens.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import warnings
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.fake_llm import PROMPTS, install_fake_models
+from benchmarks.scoring_benchmark import _git_commit
+
+FIXTURE = Path(__file__).parent / "fixtures" / "match_fixture.json"
+MODEL = "gpt-4o-mini"
+
+
+def fixture_requests(path: Path = FIXTURE):
+    """JobRequest/CandidateRequest per fixture entry; the last tag is the role, the rest are skills."""
+    from app.models.batch_analyze_model import CandidateRequest, JobRequest
+
+    fixture = json.loads(path.read_text(encoding="utf-8"))
+    jobs = [
+        JobRequest(job_id=job["job_id"], title=job["job_tag"][-1], description=None, experience_level="3-5 years",
+                   technical_skills=job["job_tag"][:-1], responsibilities=[], softSkills=[], qualification=[],
+                   job_tag=job["job_tag"])
+        for job in fixture["jobs"]
+    ]
+    candidates = [
+        CandidateRequest(candidateId=candidate["candidateId"], currentTitle=candidate["candidate_tag"][-1],
+                         name=None, phone=None, email=None, location=None, experience_level=None,
+                         technical_skills=candidate["candidate_tag"][:-1], softSkills=[], qualification=[],
+                         candidate_tag=candidate["candidate_tag"])
+        for candidate in fixture["candidates"]
+    ]
+    return jobs, candidates
+
+
+async def drive_agents(jobs, candidates, questions_per_job: int = 4) -> None:
+    """Every agent entry point over the fixture: all pairs for resume_analyze, per job for the rest."""
+    from agents.ai_feedback import aenhance_feedback
+    from agents.ai_question_generate import agenerate_interview_questions
+    from agents.evaluation_agent import aevaluate_interview
+    from agents.jd_genrator import areturn_jd
+    from agents.jd_title_suggestion import atitle_suggests
+    from agents.job_taging import areturn_jd as areturn_tags
+    from agents.resume_analyze import generate_pipeline_analysis_async
+    from app.models.evaluation_model import InterviewSummaryRequest
+    from app.models.feedback_model import EnhanceFeedbackRequest
+    from app.models.jd_model import JobRefineInput, JobTitleAISuggestInput
+    from app.models.resume_analyze_model import AIQuestionRequest, CandidateAiQuestion, JobAiQuestion
+    from app.routes.jd_refine import enhance_job_field, regenerate_job_field
+
+    await generate_pipeline_analysis_async([(job, candidates) for job in jobs], max_concurrent=4)
+
+    for job in jobs:
+        skills = job.technical_skills
+        for candidate in candidates[:questions_per_job]:
+            await agenerate_interview_questions(AIQuestionRequest(
+                jobs=JobAiQuestion(job_id=job.job_id, title=job.title, technical_skills=skills),
+                candidates=CandidateAiQuestion(candidateId=candidate.candidateId,
+                                               technical_skills=candidate.technical_skills)
+            ))
+
+        fields = {"keyResponsibilities": [f"Build {skill} services" for skill in skills[:3]],
+                  "softSkills": ["Communication", "Ownership"], "technicalSkills": skills,
+                  "education": ["B.Tech in Computer Science"]}
+        # The refine routes take each field as free text and run one chain for the first field given
+        context = {"title": job.title, "experienceRange": job.experience_level, "department": "Engineering"}
+        for refine in (enhance_job_field, regenerate_job_field):
+            for field, values in fields.items():
+                await refine(JobRefineInput(**context, **{field: ", ".join(values)}))
+
+        await areturn_jd(job.title, job.experience_level, "Engineering", "")
+        await atitle_suggests(JobTitleAISuggestInput(**context, **fields))
+        await areturn_tags(job.title, job.experience_level, f"{job.title} working with {', '.join(skills)}",
+                           fields["keyResponsibilities"], skills, fields["softSkills"], fields["education"], [])
+        await aenhance_feedback(EnhanceFeedbackRequest(text=f"knows {skills[0]} well", context="technicalSkills"))
+        await aevaluate_interview(InterviewSummaryRequest(technicalSkills=f"Strong {skills[0]}",
+                                                          communicationCollaboration="Clear"))
+
+
+def count_tokens(prompts) -> Dict[str, Dict]:
+    from app.services.llm_metrics import estimate_tokens
+
+    per_agent: Dict[str, List[int]] = defaultdict(list)
+    for agent, text in prompts:
+        per_agent[agent or "unknown"].append(estimate_tokens(text, MODEL))
+    return {
+        agent: {"calls": len(counts), "input_tokens": sum(counts), "mean_input_tokens": round(sum(counts) / len(counts), 1)}
+        for agent, counts in sorted(per_agent.items())
+    }
+
+
+def add_reductions(report: Dict, baseline: Dict) -> None:
+    """input_token_reduction = 1 - current / baseline mean input tokens per call."""
+    previous = baseline.get("agents", {})
+    for agent, stats in list(report["agents"].items()) + [("total", report["total"])]:
+        old = (previous.get(agent) if agent != "total" else baseline.get("total")) or {}
+        if old.get("mean_input_tokens"):
+            stats["baseline_mean_input_tokens"] = old["mean_input_tokens"]
+            stats["input_token_reduction"] = round(1 - stats["mean_input_tokens"] / old["mean_input_tokens"], 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", type=Path, default=FIXTURE)
+    parser.add_argument("--baseline", type=Path, help="earlier report to compute reductions against")
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+    install_fake_models()
+    jobs, candidates = fixture_requests(args.fixture)
+
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")  # the agents print per call
+    try:
+        asyncio.run(drive_agents(jobs, candidates))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    from app.services.llm_metrics import _encoding
+    agents = count_tokens(PROMPTS)
+    calls = sum(stats["calls"] for stats in agents.values())
+    tokens = sum(stats["input_tokens"] for stats in agents.values())
+    report = {
+        "git_commit": _git_commit(),
+        "fixture": args.fixture.name,
+        "token_counter": "tiktoken" if _encoding(MODEL) is not None else "chars/4",
+        "agents": agents,
+        "total": {"calls": calls, "input_tokens": tokens, "mean_input_tokens": round(tokens / max(1, calls), 1)},
+    }
+    if baseline:
+        add_reductions(report, baseline)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Accuracy benchmark for reduced-dimension and quantized tag embeddings.
+
+Scores every job x candidate pair of a fixture at full precision (float64,
+full model dimensions, as the prefilter does today) and again for each
+(dimensions, storage dtype) combination, then reports the score drift,
+how many eligibility decisions flip at each weighted-coverage threshold,
+and the memory per vector.
+
+Without --openai the tags are embedded with the offline NgramEmbeddings,
+whose dimensions are hashed buckets rather than Matryoshka components:
+truncating them just drops random features. That run is a smoke test of
+the pipeline only; its drift and flip figures, for reduced dimensions in
+particular, say nothing about text-embedding-3 and must not be used to
+pick EMBEDDING_DIMENSIONS or EMBEDDING_STORAGE_DTYPE. Base those on a
+committed --openai report.
+
+Usage:
+    python -m benchmarks.quantization_accuracy
+    python -m benchmarks.quantization_accuracy --dims 1536 512 256 --dtypes float16 int8 --thresholds 50 60 --output report.json
+    python -m benchmarks.quantization_accuracy --openai   # real text-embedding-3 vectors (needs OPENAI_API_KEY)
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from app.services.ai_match_score import MATCH_METRIC_NAMES, build_tag_matrix, eligibility_mask, score_all_pairs, tag_rows
+from app.services.vector_quantization import STORAGE_DTYPES, bytes_per_vector, roundtrip, truncate_dimensions
+from benchmarks.fake_embeddings import NgramEmbeddings
+from config.Settings import settings
+
+DEFAULT_FIXTURE = Path(__file__).parent / "fixtures" / "match_fixture.json"
+SMOKE_TEST_NOTE = (
+    "Offline n-gram embeddings: hashed features, not Matryoshka dimensions. Smoke test only; "
+    "do not choose EMBEDDING_DIMENSIONS or EMBEDDING_STORAGE_DTYPE from these figures, rerun with --openai."
+)
+
+
+def load_fixture(path: Path):
+    with open(path, encoding="utf-8") as f:
+        fixture = json.load(f)
+    return [j["job_tag"] for j in fixture["jobs"]], [c["candidate_tag"] for c in fixture["candidates"]]
+
+
+def run(job_tags, candidate_tags, embeddings, dims_list, dtypes, thresholds):
+    tag_index, full = build_tag_matrix(job_tags + candidate_tags, embeddings)
+    job_rows = [tag_rows(tags, tag_index) for tags in job_tags]
+    candidate_rows = [tag_rows(tags, tag_index) for tags in candidate_tags]
+
+    reference = score_all_pairs(full, candidate_rows, job_rows)
+    gates = {threshold: {"weighted_coverage": threshold} for threshold in thresholds}
+    reference_masks = {threshold: eligibility_mask(reference, gate) for threshold, gate in gates.items()}
+    full_dim = full.shape[1]
+
+    results = []
+    for dims in dims_list:
+        for dtype in dtypes:
+            vectors = roundtrip(truncate_dimensions(full, dims), dtype)
+            matrices = score_all_pairs(vectors, candidate_rows, job_rows)
+
+            drift = np.abs(matrices["weighted_coverage"] - reference["weighted_coverage"])
+            drift = drift[~np.isnan(drift)]
+            dim = min(dims or full_dim, full_dim)
+            results.append({
+                "dimensions": dim,
+                "dtype": dtype,
+                "bytes_per_vector": bytes_per_vector(dim, dtype),
+                "memory_vs_full_float64": round(bytes_per_vector(dim, dtype) / (full_dim * 8), 4),
+                "weighted_coverage_drift": {
+                    "mean": round(float(drift.mean()), 4),
+                    "p95": round(float(np.percentile(drift, 95)), 4),
+                    "max": round(float(drift.max()), 4),
+                },
+                "max_metric_drift": {
+                    name: round(float(np.nanmax(np.abs(matrices[name] - reference[name]))), 4)
+                    for name in MATCH_METRIC_NAMES
+                },
+                "eligibility_flips": {
+                    str(threshold): int((eligibility_mask(matrices, gate) != reference_masks[threshold]).sum())
+                    for threshold, gate in gates.items()
+                },
+            })
+
+    return {
+        "pairs": int(len(job_tags) * len(candidate_tags)),
+        "unique_tags": len(tag_index),
+        "full_dimensions": full_dim,
+        "reference_eligible_pairs": {str(t): int(mask.sum()) for t, mask in reference_masks.items()},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", type=Path, default=DEFAULT_FIXTURE)
+    parser.add_argument("--dims", type=int, nargs="+", default=[1536, 768, 512, 256])
+    parser.add_argument("--dtypes", nargs="+", default=list(STORAGE_DTYPES), choices=list(STORAGE_DTYPES))
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        help="weighted-coverage eligibility thresholds (default: 30 40 50 and MINIMUM_ELIGIBLE_SCORE)")
+    parser.add_argument("--openai", action="store_true", help="embed with the configured OpenAI model instead of the offline fake")
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    args = parser.parse_args()
+
+    if args.openai:
+        from app.services.llm_clients import get_embeddings_client
+        embeddings = get_embeddings_client(settings.embedding_model)
+    else:
+        embeddings = NgramEmbeddings()
+
+    job_tags, candidate_tags = load_fixture(args.fixture)
+    thresholds = args.thresholds or sorted({30.0, 40.0, 50.0, float(settings.minimum_eligible_score)})
+    report = run(job_tags, candidate_tags, embeddings, args.dims, args.dtypes, thresholds)
+    report["fixture"] = str(args.fixture)
+    report["embeddings"] = settings.embedding_model if args.openai else "offline-ngram"
+    report["smoke_test_only"] = not args.openai
+    if not args.openai:
+        report["note"] = SMOKE_TEST_NOTE
+        print(f"WARNING: {SMOKE_TEST_NOTE}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Wall-time and memory benchmark for the match scoring strategies.
+
+Builds deterministic synthetic tag corpora at several jobs x candidates
+scales and times each strategy in app.services.ai_match_score:
+
+  - check_domain_relevance, check_domain_relevance_strict,
+    calculate_weighted_coverage_score, calculate_relevance_and_score_combined
+    and score_tag_match, called once per pair as the legacy loop does;
+  - score_all_pairs, the vectorized all-pairs kernel;
+  - build_tag_matrix, embedding the unique vocabulary once.
+
+Per-pair strategies run on a deterministic sample of at most --max-pairs
+pairs and are projected to the full grid (``projected_wall_s``). Embeddings
+come from the offline NgramEmbeddings fake, pre-embedded once so the
+numbers measure scoring rather than the embedder. Peak memory and the
+blocks still allocated afterwards come from tracemalloc in a separate,
+untimed run.
+
+Corpora, samples and report layout are deterministic for a given --seed,
+so reports from two versions can be diffed directly; pass --baseline
+old_report.json to add per-strategy speedups.
+
+Usage:
+    python -m benchmarks.scoring_benchmark
+    python -m benchmarks.scoring_benchmark --scales 10x100 100x10000 --repeat 5 --output scoring_report.json
+    python -m benchmarks.scoring_benchmark --baseline scoring_report.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services.ai_match_score import (
+    build_tag_matrix,
+    calculate_relevance_and_score_combined,
+    calculate_weighted_coverage_score,
+    check_domain_relevance,
+    check_domain_relevance_strict,
+    collect_unique_tags,
+    score_all_pairs,
+    score_tag_match,
+    tag_rows,
+)
+from benchmarks.fake_embeddings import NgramEmbeddings
+from benchmarks.synthetic_corpus import synthetic_corpus
+
+DEFAULT_SCALES = ["10x100", "20x1000", "100x10000"]
+
+# Per-pair legacy function -> kernel metric it must agree with
+LEGACY_STRATEGIES = {
+    "check_domain_relevance": (check_domain_relevance, "domain_relevance"),
+    "check_domain_relevance_strict": (check_domain_relevance_strict, "strict_relevance"),
+    "calculate_weighted_coverage_score": (calculate_weighted_coverage_score, "weighted_coverage"),
+    "calculate_relevance_and_score_combined": (calculate_relevance_and_score_combined, "weighted_coverage"),
+}
+
+
+class PrecomputedEmbeddings:
+    """embed_documents over a vocabulary embedded once up front."""
+
+    def __init__(self, embeddings, vocabulary: List[str]):
+        self._index = {tag: row for row, tag in enumerate(vocabulary)}
+        self._matrix = np.asarray(embeddings.embed_documents(vocabulary), dtype=np.float64)
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return self._matrix[[self._index[t.strip()] for t in texts]]
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Best-of-``repeat`` wall time, then one traced run for memory."""
+    gc.collect()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = after.compare_to(before, "filename")
+    del result
+
+    return {
+        "wall_s": round(min(times), 6),
+        "wall_s_mean": round(float(np.mean(times)), 6),
+        "peak_bytes": int(peak),
+        "retained_bytes": int(sum(stat.size_diff for stat in retained)),
+        "retained_blocks": int(sum(stat.count_diff for stat in retained)),
+    }
+
+
+def run_scale(n_jobs: int, n_candidates: int, embeddings, repeat: int, max_pairs: int, seed: int) -> Dict:
+    job_tags, candidate_tags = synthetic_corpus(n_jobs, n_candidates, seed=seed)
+    vocabulary = collect_unique_tags(job_tags + candidate_tags)
+    lookup = PrecomputedEmbeddings(embeddings, vocabulary)
+    n_pairs = n_jobs * n_candidates
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(n_pairs, size=min(max_pairs, n_pairs), replace=False)
+    pairs = [(int(p // n_candidates), int(p % n_candidates)) for p in np.sort(sample)]
+
+    strategies = {}
+
+    def embed_vocabulary():
+        return build_tag_matrix(job_tags + candidate_tags, lookup)
+
+    strategies["build_tag_matrix"] = measure(embed_vocabulary, repeat)
+    tag_index, tag_matrix = embed_vocabulary()
+    job_rows = [tag_rows(tags, tag_index) for tags in job_tags]
+    candidate_rows = [tag_rows(tags, tag_index) for tags in candidate_tags]
+
+    kernel = score_all_pairs(tag_matrix, candidate_rows, job_rows)
+    strategies["score_all_pairs"] = measure(lambda: score_all_pairs(tag_matrix, candidate_rows, job_rows), repeat)
+    strategies["score_all_pairs"].update(pairs=n_pairs, per_pair_us=round(strategies["score_all_pairs"]["wall_s"] / n_pairs * 1e6, 4))
+
+    for name, (fn, metric) in LEGACY_STRATEGIES.items():
+        def legacy_loop(fn=fn):
+            return [fn(candidate_tags[c], job_tags[j], lookup) for j, c in pairs]
+
+        stats = measure(legacy_loop, repeat)
+        scores = np.array([s[1] if isinstance(s, tuple) else s for s in legacy_loop()], dtype=np.float64)
+        reference = np.array([kernel[metric][j, c] for j, c in pairs])
+        if name == "calculate_relevance_and_score_combined":
+            reference = np.where(scores > 0, reference, 0.0)
+        stats["max_abs_diff_vs_kernel"] = round(float(np.max(np.abs(scores - reference))), 8)
+        strategies[name] = stats
+
+    def fused_loop():
+        return [score_tag_match(lookup.embed_documents(candidate_tags[c]), lookup.embed_documents(job_tags[j]))
+                for j, c in pairs]
+
+    strategies["score_tag_match"] = measure(fused_loop, repeat)
+
+    for name, stats in strategies.items():
+        if name not in ("build_tag_matrix", "score_all_pairs"):
+            per_pair = stats["wall_s"] / len(pairs)
+            stats.update(
+                pairs=len(pairs),
+                per_pair_us=round(per_pair * 1e6, 4),
+                projected_wall_s=round(per_pair * n_pairs, 4),
+            )
+
+    return {
+        "scale": f"{n_jobs}x{n_candidates}",
+        "jobs": n_jobs,
+        "candidates": n_candidates,
+        "pairs": n_pairs,
+        "unique_tags": len(vocabulary),
+        "strategies": strategies,
+    }
+
+
+def add_speedups(report: Dict, baseline: Dict) -> None:
+    """speedup_vs_baseline = baseline per-pair time / current per-pair time."""
+    previous = {scale["scale"]: scale["strategies"] for scale in baseline.get("scales", [])}
+    for scale in report["scales"]:
+        for name, stats in scale["strategies"].items():
+            old = previous.get(scale["scale"], {}).get(name)
+            key = "per_pair_us" if "per_pair_us" in stats else "wall_s"
+            if old and old.get(key) and stats.get(key):
+                stats["speedup_vs_baseline"] = round(old[key] / stats[key], 3)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_scale(text: str):
+    jobs, _, candidates = text.lower().partition("x")
+    return int(jobs), int(candidates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES, help="JOBSxCANDIDATES, e.g. 10x100")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per strategy (best is reported)")
+    parser.add_argument("--max-pairs", type=int, default=2000, help="pairs sampled for the per-pair strategies")
+    parser.add_argument("--dim", type=int, default=1536, help="fake embedding dimensions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, help="earlier report to compute speedups against")
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    embeddings = NgramEmbeddings(dim=args.dim)
+    report = {
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "embeddings": f"offline-ngram-{args.dim}",
+        "repeat": args.repeat,
+        "max_pairs": args.max_pairs,
+        "seed": args.seed,
+        "scales": [],
+    }
+    for scale in args.scales:
+        n_jobs, n_candidates = _parse_scale(scale)
+        print(f"scoring {n_jobs} jobs x {n_candidates} candidates...", file=sys.stderr)
+        report["scales"].append(run_scale(n_jobs, n_candidates, embeddings, args.repeat, args.max_pairs, args.seed))
+
+    if baseline:
+        add_speedups(report, baseline)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
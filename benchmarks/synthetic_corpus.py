@@ -0,0 +1,65 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Skill clusters the synthetic jobs and candidates draw from
+DOMAINS: Dict[str, List[str]] = {
+    "backend": ["Python", "Django", "FastAPI", "Flask", "PostgreSQL", "Redis", "REST API", "Celery", "SQLAlchemy",
+                "Go", "gRPC", "Microservices", "Kafka", "Java", "Spring Boot", "Node.js", "Express"],
+    "frontend": ["React", "React.js", "TypeScript", "JavaScript", "Next.js", "Vue.js", "Angular", "CSS", "HTML",
+                 "Tailwind CSS", "Redux", "Webpack", "Jest", "UI Development", "Responsive Design"],
+    "data": ["Machine Learning", "Deep Learning", "PyTorch", "TensorFlow", "Pandas", "NumPy", "scikit-learn",
+             "Data Analysis", "SQL", "Spark", "Airflow", "NLP", "Computer Vision", "Statistics", "Tableau"],
+    "devops": ["AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "Ansible", "CI/CD", "Jenkins",
+               "GitHub Actions", "Linux", "Prometheus", "Grafana", "Helm", "Bash"],
+    "qa": ["Selenium", "Cypress", "Playwright", "Test Automation", "Manual Testing", "JMeter", "Postman",
+           "API Testing", "Regression Testing", "TestNG", "Appium", "BDD", "Cucumber"],
+    "mobile": ["Android", "Kotlin", "Swift", "iOS", "Flutter", "Dart", "React Native", "Xcode", "Firebase",
+               "Mobile UI", "Jetpack Compose", "SwiftUI"],
+    "sales": ["Lead Generation", "CRM", "Salesforce", "Cold Calling", "Negotiation", "B2B Sales", "Account Management",
+              "Business Development", "HubSpot", "Pipeline Management", "Customer Success"],
+    "hospitality": ["Cooking", "Menu Planning", "Food Safety", "Kitchen Management", "Catering", "Pastry",
+                    "Inventory Control", "Customer Service", "Front Desk", "Event Planning"],
+}
+SOFT_SKILLS = ["Communication", "Teamwork", "Leadership", "Problem Solving", "Time Management", "Mentoring"]
+# Surface variations that grow the raw vocabulary the way real tags do
+VARIANTS = ["{}", "{}", "{}", "{} Developer", "Advanced {}", "{} Expert", "{} Specialist", "Senior {}"]
+
+
+def _draw(rng: np.random.Generator, domain: str, size: int, variation: float) -> List[str]:
+    pool = DOMAINS[domain]
+    picks = rng.choice(len(pool), size=min(size, len(pool)), replace=False)
+    tags = []
+    for i in picks:
+        template = VARIANTS[rng.integers(len(VARIANTS))] if rng.random() < variation else "{}"
+        tags.append(template.format(pool[i]))
+    return tags
+
+
+def synthetic_corpus(
+    n_jobs: int,
+    n_candidates: int,
+    job_tag_count: int = 8,
+    candidate_tag_count: int = 12,
+    variation: float = 0.3,
+    seed: int = 0
+) -> Tuple[List[List[str]], List[List[str]]]:
+    """
+    Deterministic job and candidate tag lists. Each side has a primary
+    domain, some tags from a second domain and a few soft skills, so pairs
+    range from strong matches to out-of-domain.
+    """
+
+    rng = np.random.default_rng(seed)
+    domains = list(DOMAINS)
+
+    def profile(tag_count: int) -> List[str]:
+        primary, secondary = rng.choice(len(domains), size=2, replace=False)
+        n_primary = max(1, int(tag_count * 0.6))
+        n_soft = max(1, tag_count // 6)
+        tags = _draw(rng, domains[primary], n_primary, variation)
+        tags += _draw(rng, domains[secondary], tag_count - n_primary - n_soft, variation)
+        tags += list(rng.choice(SOFT_SKILLS, size=n_soft, replace=False))
+        return tags
+
+    return [profile(job_tag_count) for _ in range(n_jobs)], [profile(candidate_tag_count) for _ in range(n_candidates)]
@@ -12,15 +12,60 @@ class QuotaLimitError(Exception):
 
 class Settings(BaseSettings):
     openai_api_key: str | None = Field(default=None, env="OPENAI_API_KEY")
+    openai_api_keys: str = Field(default="", env="OPENAI_API_KEYS")
+    openai_key_cooldown: float = Field(default=30.0, env="OPENAI_KEY_COOLDOWN")
+    openai_key_quota_cooldown: float = Field(default=3600.0, env="OPENAI_KEY_QUOTA_COOLDOWN")
     model: str = Field(default="gpt-4o-mini", env="MODEL")
     max_output_tokens: int = Field(default=2000, env="MAX_OUTPUT_TOKENS")
     temperature: float = Field(default=0.2, env="TEMPERATURE")
+    llm_json_mode: bool = Field(default=True, env="LLM_JSON_MODE")
+    llm_http_max_connections: int = Field(default=100, env="LLM_HTTP_MAX_CONNECTIONS")
+    llm_http_max_keepalive: int = Field(default=20, env="LLM_HTTP_MAX_KEEPALIVE")
+    llm_http_keepalive_expiry: float = Field(default=60.0, env="LLM_HTTP_KEEPALIVE_EXPIRY")
+    llm_http_timeout: float = Field(default=120.0, env="LLM_HTTP_TIMEOUT")
+    llm_rate_limit_backend: str = Field(default="sqlite", env="LLM_RATE_LIMIT_BACKEND")
+    llm_requests_per_minute: int = Field(default=500, env="LLM_REQUESTS_PER_MINUTE")
+    llm_tokens_per_minute: int = Field(default=200_000, env="LLM_TOKENS_PER_MINUTE")
+    llm_rate_limit_max_wait: float = Field(default=60.0, env="LLM_RATE_LIMIT_MAX_WAIT")
+    llm_rate_limit_file: str = Field(default="embedding_store/llm_rate_limit.sqlite", env="LLM_RATE_LIMIT_FILE")
+    llm_rate_limit_redis_url: str = Field(default="redis://localhost:6379/0", env="LLM_RATE_LIMIT_REDIS_URL")
+    llm_metrics_window: float = Field(default=300.0, env="LLM_METRICS_WINDOW")
+    prompt_input_token_budget: int = Field(default=6000, env="PROMPT_INPUT_TOKEN_BUDGET")
+    prompt_input_token_budgets: str = Field(default="", env="PROMPT_INPUT_TOKEN_BUDGETS")
 
     save_dir: str = Field(default="downloaded_files", env="SAVE_DIR")
     max_file_size: int = Field(default=10 * 1024 * 1024, env="MAX_FILE_SIZE")
     max_files_per_request: int = Field(default=10, env="MAX_FILES_PER_REQUEST")
     minimum_eligible_score: int = Field(default=60, env="MINIMUM_ELIGIBLE_SCORE")
+    eligibility_gates: str = Field(default="", env="ELIGIBILITY_GATES")
     batch_concurrent_limit: int = Field(default=10, env="BATCH_CONCURRENT_LIMIT")
+    max_llm_candidates_per_job: int | None = Field(default=None, env="MAX_LLM_CANDIDATES_PER_JOB")
+    unscored_candidates_use_llm_budget: bool = Field(default=True, env="UNSCORED_CANDIDATES_USE_LLM_BUDGET")
+    local_skill_alignment: bool = Field(default=False, env="LOCAL_SKILL_ALIGNMENT")
+
+    embedding_backend: str = Field(default="openai", env="EMBEDDING_BACKEND")
+    embedding_model: str = Field(default="text-embedding-3-small", env="EMBEDDING_MODEL")
+    embedding_chunk_size: int = Field(default=512, env="EMBEDDING_CHUNK_SIZE")
+    embedding_concurrent_limit: int = Field(default=4, env="EMBEDDING_CONCURRENT_LIMIT")
+    embedding_dimensions: int | None = Field(default=None, env="EMBEDDING_DIMENSIONS")
+    embedding_storage_dtype: str = Field(default="float32", env="EMBEDDING_STORAGE_DTYPE")
+    embedding_store_dir: str = Field(default="embedding_store", env="EMBEDDING_STORE_DIR")
+    embedding_store_max_entries: int = Field(default=100_000, env="EMBEDDING_STORE_MAX_ENTRIES")
+    embedding_hot_cache_size: int = Field(default=20_000, env="EMBEDDING_HOT_CACHE_SIZE")
+    embed_tags_on_ingest: bool = Field(default=True, env="EMBED_TAGS_ON_INGEST")
+    tag_registry_file: str = Field(default="embedding_store/tag_registry.sqlite", env="TAG_REGISTRY_FILE")
+    local_embedding_features: int = Field(default=2048, env="LOCAL_EMBEDDING_FEATURES")
+    tag_synonyms_file: str = Field(default="config/tag_synonyms.json", env="TAG_SYNONYMS_FILE")
+    tag_canonicalization: bool = Field(default=False, env="TAG_CANONICALIZATION")
+    hybrid_borderline_margin: float = Field(default=10.0, env="HYBRID_BORDERLINE_MARGIN")
+    lexical_prefilter: bool = Field(default=False, env="LEXICAL_PREFILTER")
+    lexical_fuzzy_threshold: float = Field(default=0.5, env="LEXICAL_FUZZY_THRESHOLD")
+    incremental_matching: bool = Field(default=False, env="INCREMENTAL_MATCHING")
+    pair_score_cache_file: str = Field(default="embedding_store/pair_scores.sqlite", env="PAIR_SCORE_CACHE_FILE")
+    pair_score_cache_max_entries: int = Field(default=5_000_000, env="PAIR_SCORE_CACHE_MAX_ENTRIES")
+
+    candidate_index_dir: str = Field(default="candidate_index", env="CANDIDATE_INDEX_DIR")
+    candidate_index_n_probe: int = Field(default=8, env="CANDIDATE_INDEX_N_PROBE")
 
     allowed_file_types: str = Field(
         default=(
@@ -38,6 +83,12 @@ class Settings(BaseSettings):
     api_port: int = Field(default=8000, env="API_PORT")
     debug_mode: bool = Field(default=False, env="DEBUG_MODE")
 
+    @property
+    def openai_api_key_list(self) -> list:
+        """OPENAI_API_KEYS (comma separated), falling back to OPENAI_API_KEY"""
+        keys = [key.strip() for key in self.openai_api_keys.split(",") if key.strip()]
+        return keys or ([self.openai_api_key] if self.openai_api_key else [])
+
     @property
     def allowed_mime_types(self) -> set:
         return set(self.allowed_file_types.split(","))
@@ -46,6 +97,50 @@ class Settings(BaseSettings):
     def save_directory(self) -> Path:
         return Path(self.save_dir)
 
+    @property
+    def embedding_store_directory(self) -> Path:
+        return Path(self.embedding_store_dir)
+
+    @property
+    def tag_registry_path(self) -> Path:
+        return Path(self.tag_registry_file)
+
+    @property
+    def pair_score_cache_path(self) -> Path:
+        return Path(self.pair_score_cache_file)
+
+    @property
+    def llm_rate_limit_path(self) -> Path:
+        return Path(self.llm_rate_limit_file)
+
+    @property
+    def tag_synonyms_path(self) -> Path:
+        return Path(self.tag_synonyms_file)
+
+    @property
+    def candidate_index_directory(self) -> Path:
+        return Path(self.candidate_index_dir)
+
+    @property
+    def eligibility_gate_thresholds(self) -> dict:
+        """Parse "metric:minimum,..." gates; defaults to weighted coverage >= minimum_eligible_score"""
+        gates = {}
+        for item in self.eligibility_gates.split(","):
+            if item.strip():
+                metric, minimum = item.split(":", 1)
+                gates[metric.strip()] = float(minimum)
+        return gates or {"weighted_coverage": float(self.minimum_eligible_score)}
+
+    @property
+    def prompt_input_token_budget_map(self) -> dict:
+        """Parse "agent:tokens,..." per-agent prompt input budgets"""
+        budgets = {}
+        for item in self.prompt_input_token_budgets.split(","):
+            if item.strip():
+                agent, tokens = item.split(":", 1)
+                budgets[agent.strip()] = int(tokens)
+        return budgets
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+
+import numpy as np
+import pytest
+
+from app.models.batch_analyze_model import JobCandidateData
+from app.services.ai_match_score import (
+    abuild_tag_matrix,
+    align_tags,
+    build_tag_matrix,
+    calculate_relevance_and_score_combined,
+    calculate_weighted_coverage_score,
+    check_domain_relevance,
+    check_domain_relevance_strict,
+    eligibility_mask,
+    pair_metrics,
+    score_all_pairs,
+    score_tag_match,
+    tag_lookup,
+    tag_rows,
+)
+
+
+class FakeEmbeddings:
+    """Deterministic embedder: one seeded random vector per string."""
+
+    def __init__(self, dim: int = 32):
+        self.dim = dim
+        self.calls = []
+
+    def _vector(self, text: str):
+        seed = int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).normal(size=self.dim).tolist()
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [self._vector(t) for t in texts]
+
+    async def aembed_documents(self, texts):
+        self.in_flight = getattr(self, "in_flight", 0) + 1
+        self.peak_in_flight = max(getattr(self, "peak_in_flight", 0), self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.embed_documents(texts)
+
+
+JOBS = [
+    ["Python", "Django", "AWS", "Backend Developer"],
+    ["Selenium", "QA Engineer", "Python"],
+]
+CANDIDATES = [
+    ["Python", "FastAPI", "AWS"],
+    ["Selenium", "Postman", "QA Engineer", "Manual Tester"],
+    ["Chef", "Cooking"],
+]
+
+
+def test_build_tag_matrix_embeds_each_unique_tag_once():
+    embeddings = FakeEmbeddings()
+    tag_index, tag_matrix = build_tag_matrix(JOBS + CANDIDATES, embeddings, chunk_size=4)
+
+    embedded = [tag for call in embeddings.calls for tag in call]
+    assert sorted(embedded) == sorted(set(t for tags in JOBS + CANDIDATES for t in tags))
+    assert all(len(call) <= 4 for call in embeddings.calls)
+    assert tag_matrix.shape == (len(tag_index), embeddings.dim)
+
+
+def test_async_tag_matrix_bounds_concurrency():
+    embeddings = FakeEmbeddings()
+    tag_index, tag_matrix = asyncio.run(
+        abuild_tag_matrix(JOBS + CANDIDATES, embeddings, chunk_size=2, max_concurrency=2)
+    )
+    sync_index, sync_matrix = build_tag_matrix(JOBS + CANDIDATES, FakeEmbeddings())
+
+    assert embeddings.peak_in_flight == 2
+    assert tag_index == sync_index
+    assert np.array_equal(tag_matrix, sync_matrix)
+
+
+@pytest.mark.parametrize("job_tags", JOBS)
+@pytest.mark.parametrize("candidate_tags", CANDIDATES)
+def test_fused_metrics_match_legacy_scores(candidate_tags, job_tags):
+    embeddings = FakeEmbeddings()
+    tag_index, tag_matrix = build_tag_matrix(JOBS + CANDIDATES, embeddings)
+
+    metrics = score_tag_match(
+        tag_matrix[tag_rows(candidate_tags, tag_index)],
+        tag_matrix[tag_rows(job_tags, tag_index)]
+    )
+
+    assert metrics.domain_relevance == pytest.approx(check_domain_relevance(candidate_tags, job_tags, embeddings))
+    assert metrics.strict_relevance == pytest.approx(check_domain_relevance_strict(candidate_tags, job_tags, embeddings))
+    assert metrics.weighted_coverage == pytest.approx(calculate_weighted_coverage_score(candidate_tags, job_tags, embeddings))
+    is_relevant, _ = calculate_relevance_and_score_combined(candidate_tags, job_tags, embeddings)
+    assert is_relevant == (metrics.max_similarity >= 0.65 and metrics.top_k_mean >= 0.65 * 0.8)
+
+
+def test_eligibility_gates():
+    embeddings = FakeEmbeddings()
+    tag_index, tag_matrix = build_tag_matrix(JOBS + CANDIDATES, embeddings)
+    rows = tag_rows(JOBS[0], tag_index)
+    matrices = score_all_pairs(tag_matrix, [rows], [rows])
+
+    assert matrices["weighted_coverage"][0, 0] == pytest.approx(100.0)
+    assert eligibility_mask(matrices, {"weighted_coverage": 99, "strict_relevance": 99})[0, 0]
+    assert not eligibility_mask(matrices, {"max_similarity": 1.01})[0, 0]
+
+    with pytest.raises(ValueError):
+        JobCandidateData(jobs=[], candidates=[], eligibility_gates={"not_a_metric": 1})
+
+
+def test_all_pairs_kernel_matches_per_pair_scoring():
+    embeddings = FakeEmbeddings()
+    candidates = CANDIDATES + [[], ["Python"] * 3]
+    jobs = JOBS + [[]]
+    tag_index, tag_matrix = build_tag_matrix(jobs + candidates, embeddings)
+    candidate_rows = [tag_rows(tags, tag_index) for tags in candidates]
+    job_rows = [tag_rows(tags, tag_index) for tags in jobs]
+
+    # A tiny block size forces the candidate axis to be split across several matmuls
+    for max_block_elements in (8_000_000, 5):
+        matrices = score_all_pairs(tag_matrix, candidate_rows, job_rows, max_block_elements=max_block_elements)
+
+        for j, job_tags in enumerate(jobs):
+            for c, candidate_tags in enumerate(candidates):
+                if not job_tags or not candidate_tags:
+                    assert np.isnan(matrices["weighted_coverage"][j, c])
+                    continue
+                expected = score_tag_match(tag_matrix[candidate_rows[c]], tag_matrix[job_rows[j]])
+                assert pair_metrics(matrices, j, c).model_dump() == pytest.approx(expected.model_dump())
+                assert matrices["weighted_coverage"][j, c] == pytest.approx(
+                    calculate_weighted_coverage_score(candidate_tags, job_tags, embeddings)
+                )
+
+    mask = eligibility_mask(matrices, {"weighted_coverage": 0})
+    assert not mask[:, len(CANDIDATES)].any()
+    assert not mask[len(JOBS), :].any()
+
+
+def test_align_tags_reports_best_match_per_job_tag_and_gaps():
+    embeddings = FakeEmbeddings()
+    tag_index, tag_matrix = build_tag_matrix(JOBS + CANDIDATES, embeddings)
+    lookup = tag_lookup(tag_index, tag_matrix)
+    job_tags, job_vectors = lookup(JOBS[0])
+    candidate_tags, candidate_vectors = lookup(CANDIDATES[0] + ["not embedded"])
+
+    matches, gaps = align_tags(candidate_tags, candidate_vectors, job_tags, job_vectors)
+
+    assert candidate_tags == CANDIDATES[0]
+    assert [(m.jobRequirement, m.candidateSkill, m.matchStrength) for m in matches] == [
+        ("Python", "Python", "Exact"), ("AWS", "AWS", "Exact")
+    ]
+    assert matches[0].confidenceScore == pytest.approx(100.0)
+    # random fake vectors: unrelated tags fall below the decent threshold
+    assert gaps == ["Django", "Backend Developer"]
+    assert align_tags([], [], job_tags, job_vectors) == ([], job_tags)
@@ -0,0 +1,17 @@
+import asyncio
+import threading
+
+import agents.ask_ai as ask_ai
+
+
+def test_aask_ai_reads_candidate_data_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def read_file():
+        threads.append(threading.current_thread())
+        return None, None
+
+    monkeypatch.setattr(ask_ai, "parse_candidate_data_from_file", read_file)
+
+    assert asyncio.run(ask_ai.aask_ai("Who is this?")) == ask_ai.NO_CANDIDATE_MESSAGE
+    assert threads and threads[0] is not threading.main_thread()
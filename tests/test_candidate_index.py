@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from app.services.ai_match_score import calculate_weighted_coverage_score
+import app.services.candidate_index as candidate_index
+from app.services.candidate_index import CURRENT_FILE, CandidateIndex, build_candidate_index
+from config.Settings import settings
+from tests.test_ai_match_score import FakeEmbeddings
+
+
+def _pool(size: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    vocab = [f"skill-{i}" for i in range(300)]
+    ids = [f"cand-{i}" for i in range(size)]
+    tags = [list(rng.choice(vocab, rng.integers(1, 12))) for _ in range(size)]
+    tags[3] = []
+    return ids, tags, vocab
+
+
+def test_exhaustive_search_matches_weighted_coverage(tmp_path, monkeypatch):
+    # Compared against the legacy scorer on raw tags, so embed the raw tags too
+    monkeypatch.setattr(settings, "tag_canonicalization", False)
+    embeddings = FakeEmbeddings()
+    ids, tags, vocab = _pool(400)
+    index = build_candidate_index(tmp_path / "index", ids, tags, embeddings, n_lists=16)
+    job_tags = vocab[:6]
+
+    hits, stats = index.search(embeddings.embed_documents(job_tags), top_k=10, n_probe=index.n_lists)
+
+    expected = sorted(
+        ((cid, calculate_weighted_coverage_score(t, job_tags, embeddings)) for cid, t in zip(ids, tags) if t),
+        key=lambda item: -item[1]
+    )[:10]
+    assert [cid for cid, _ in hits] == [cid for cid, _ in expected]
+    assert [score for _, score in hits] == pytest.approx([score for _, score in expected], abs=1e-4)
+    assert stats["scanned_candidates"] == len(ids) - 1
+    assert len(CandidateIndex(tmp_path / "index")) == len(ids) - 1
+
+
+def test_n_probe_limits_scanned_candidates(tmp_path):
+    embeddings = FakeEmbeddings()
+    ids, tags, vocab = _pool(400)
+    index = build_candidate_index(tmp_path / "index", ids, tags, embeddings, n_lists=16)
+
+    _, narrow = index.search(embeddings.embed_documents(vocab[:4]), top_k=5, n_probe=2)
+    _, wide = index.search(embeddings.embed_documents(vocab[:4]), top_k=5, n_probe=16)
+
+    assert 0 < narrow["scanned_candidates"] < wide["scanned_candidates"]
+
+
+def test_rebuild_publishes_a_new_build_without_removing_the_live_one(tmp_path, monkeypatch):
+    embeddings = FakeEmbeddings()
+    ids, tags, vocab = _pool(60)
+    directory = tmp_path / "index"
+    monkeypatch.setattr(settings, "candidate_index_dir", str(directory))
+
+    first = build_candidate_index(directory, ids, tags, embeddings, n_lists=4)
+    assert candidate_index.get_candidate_index().directory == first.directory
+    second = build_candidate_index(directory, ids[:30], tags[:30], embeddings, n_lists=4)
+    third = build_candidate_index(directory, ids[:20], tags[:20], embeddings, n_lists=4)
+
+    assert (directory / CURRENT_FILE).read_text() == third.directory.name
+    assert len(CandidateIndex(directory)) == len(third)
+    assert candidate_index.get_candidate_index().directory == third.directory
+    # The build published just before stays readable for workers that resolved it; older ones go
+    assert sorted(p.name for p in directory.glob("build-*")) == [second.directory.name, third.directory.name]
+    hits, _ = second.search(embeddings.embed_documents(vocab[:3]), top_k=3, n_probe=4)
+    assert len(hits) == 3
+
+
+def test_search_rejects_jobs_without_usable_tags(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    ids, tags, _ = _pool(20)
+    monkeypatch.setattr(settings, "candidate_index_dir", str(tmp_path / "index"))
+    build_candidate_index(tmp_path / "index", ids, tags, FakeEmbeddings(), n_lists=2)
+
+    job = {"job_id": "j", "title": None, "description": None, "experience_level": None, "technical_skills": None,
+           "responsibilities": None, "softSkills": None, "qualification": None, "job_tag": ["  ", ""]}
+    response = TestClient(app).post("/api/v1/ai/search-candidates", json={"job": job})
+
+    assert response.status_code == 400
@@ -0,0 +1,92 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from app.services.embedding_store import CachedEmbeddings, EmbeddingStore
+
+
+class CountingEmbeddings:
+    def __init__(self, dim: int = 8):
+        self.dim = dim
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(t))] + [float(i) for i in range(self.dim - 1)] for t in texts]
+
+
+def _read_from_other_process(directory, queue):
+    store = EmbeddingStore(directory, model="test-model", max_entries=16)
+    queue.put([None if v is None else v.tolist() for v in store.get_many(["Python", "Go"])])
+
+
+def test_hot_and_disk_tiers_count_hits_and_misses(tmp_path):
+    embeddings = CountingEmbeddings()
+    cached = CachedEmbeddings(embeddings, EmbeddingStore(tmp_path, model="test-model", max_entries=16))
+
+    first = cached.embed_documents(["Python", "AWS", " python "])
+    second = cached.embed_documents(["PYTHON", "AWS"])
+
+    assert embeddings.embedded == ["Python", "AWS"]
+    assert first[0] == first[2] == second[0]
+    stats = cached.store.stats()
+    assert stats["misses"] == 2
+    assert stats["hot_hits"] == 2
+
+    # A fresh store (another worker) only sees the disk tier
+    other = EmbeddingStore(tmp_path, model="test-model", max_entries=16)
+    assert np.allclose(other.get_many(["aws"])[0], first[1])
+    assert other.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_is_shared_across_processes(tmp_path):
+    EmbeddingStore(tmp_path, model="test-model", max_entries=16).put_many(["Python"], [[1.0, 2.0, 3.0]])
+
+    queue = multiprocessing.get_context("fork").Queue()
+    process = multiprocessing.get_context("fork").Process(target=_read_from_other_process, args=(tmp_path, queue))
+    process.start()
+    process.join(timeout=30)
+
+    assert queue.get(timeout=5) == [[1.0, 2.0, 3.0], None]
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    store = EmbeddingStore(tmp_path, model="test-model", max_entries=3, hot_entries=1)
+    store.put_many(["a", "b", "c"], np.eye(3))
+    store.get_many(["a"])
+    store.put_many(["d"], [[0.0, 0.0, 5.0]])
+
+    reopened = EmbeddingStore(tmp_path, model="test-model", max_entries=3)
+    a, b, c, d = reopened.get_many(["a", "b", "c", "d"])
+    assert b is None
+    assert np.allclose(a, [1, 0, 0]) and np.allclose(c, [0, 0, 1]) and np.allclose(d, [0, 0, 5])
+    assert store.stats()["evictions"] == 1
+    assert reopened.stats()["disk_entries"] == 3
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_capacity_survives_a_change_of_max_entries(tmp_path, caplog, dtype):
+    EmbeddingStore(tmp_path, model="test-model", max_entries=3, dtype=dtype).put_many(["a", "b", "c"], np.eye(3))
+
+    # Raised: the files grow on the next write and the old vectors stay readable
+    grown = EmbeddingStore(tmp_path, model="test-model", max_entries=5, dtype=dtype)
+    assert np.allclose(grown.get_many(["b"])[0], [0.0, 1.0, 0.0], atol=0.01)
+    grown.put_many(["d", "e"], [[1.0, 1.0, 0.0], [0.0, 1.0, 1.0]])
+    assert grown.stats()["evictions"] == 0
+    assert all(v is not None for v in EmbeddingStore(tmp_path, model="test-model", max_entries=5, dtype=dtype)
+               .get_many(["a", "b", "c", "d", "e"]))
+
+    # Lowered: the stored capacity is kept, with an error instead of a failed open
+    shrunk = EmbeddingStore(tmp_path, model="test-model", max_entries=2, dtype=dtype)
+    assert np.allclose(shrunk.get_many(["e"])[0], [0.0, 1.0, 1.0], atol=0.01)
+    assert "EMBEDDING_STORE_MAX_ENTRIES is 2; keeping 5" in caplog.text
+    shrunk.put_many(["f"], [[1.0, 0.0, 1.0]])
+    assert shrunk.capacity == 5 and shrunk.stats()["disk_entries"] == 5
+
+
+def test_stores_are_keyed_by_model_and_dimensions(tmp_path):
+    EmbeddingStore(tmp_path, model="test-model", dimensions=256).put_many(["Python"], [[1.0, 0.0]])
+
+    assert EmbeddingStore(tmp_path, model="test-model").get_many(["Python"]) == [None]
+    assert EmbeddingStore(tmp_path, model="other-model", dimensions=256).get_many(["Python"]) == [None]
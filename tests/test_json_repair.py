@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from langchain_core.exceptions import OutputParserException
+
+import app.services.json_repair as json_repair
+from app.models.evaluation_model import EvaluationResponse
+from app.services.json_repair import RepairingOutputParser, parse_json, repair_json
+from app.services.llm_metrics import LLMMetrics
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = LLMMetrics()
+    monkeypatch.setattr(json_repair, "get_llm_metrics", lambda: metrics)
+    return metrics
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('Here you go:\n```json\n{"a": [1, 2,], "b": {"c": "x",},}\n```\nHope it helps!', {"a": [1, 2], "b": {"c": "x"}}),
+    ('{"tags": ["python", "fast', {"tags": ["python", "fast"]}),
+    ('{"summary": "ends with \\', {"summary": "ends with "}),
+    ('{"score": 80, "notes": [{"a": 1}, {"b":', {"score": 80, "notes": [{"a": 1}, {"b": None}]}),
+    ('{"score": 80, "ok": tr', {"score": 80}),
+    ('{"score": 80, "tags": ["a", "b"], "next', {"score": 80, "tags": ["a", "b"]}),
+    ('[{"name": "Python"}, {"name": "SQL"}] and that is all', [{"name": "Python"}, {"name": "SQL"}]),
+])
+def test_repair_fixes_prose_trailing_commas_and_truncation(text, expected):
+    assert json.loads(repair_json(text), strict=False) == expected
+
+
+def test_parse_json_counts_repairs_and_failures(metrics):
+    assert parse_json('{"a": 1}', "ask_ai") == {"a": 1}
+    assert parse_json('```json\n{"a": 1,}\n```', "resume_analyze") == {"a": 1}
+    with pytest.raises(OutputParserException):
+        parse_json("I cannot help with that.", "resume_analyze")
+
+    text = metrics.render()
+    assert 'llm_json_repairs_total{agent="resume_analyze",outcome="repaired"} 1' in text
+    assert 'llm_json_repairs_total{agent="resume_analyze",outcome="failed"} 1' in text
+    assert 'agent="ask_ai"' not in text
+
+
+def test_parser_validates_repaired_output(metrics):
+    parser = RepairingOutputParser(pydantic_object=EvaluationResponse, agent="evaluation_agent")
+
+    result = parser.parse('Sure! {"recommendation": "hire", "confidenceScore": 85,}')
+
+    assert result == EvaluationResponse(recommendation="hire", confidenceScore=85)
+    assert 'llm_json_repairs_total{agent="evaluation_agent",outcome="repaired"} 1' in metrics.render()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.key_pool import APIKeyPool, parse_reset_duration
+from app.services.llm_clients import LLMClientRegistry
+from config.Settings import QuotaLimitError
+
+
+class _FakeOpenAI(BaseHTTPRequestHandler):
+    """Chat completions endpoint that rate limits the keys listed in ``server.limited``."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        key = self.headers["Authorization"].removeprefix("Bearer ")
+        self.server.seen.append(key)
+        limited = self.server.limited.get(key)
+        if limited:
+            status, headers = 429, limited
+            body = {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+        else:
+            status = 200
+            headers = {"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "99",
+                       "x-ratelimit-reset-requests": "600ms"}
+            body = {"id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": key}}]}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAI)
+    httpd.seen, httpd.limited = [], {}
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OPENAI_API_BASE", f"http://127.0.0.1:{httpd.server_address[1]}/v1")
+    yield httpd
+    httpd.shutdown()
+
+
+def test_rate_limited_key_cools_down_and_calls_move_to_the_next(fake_openai):
+    pool = APIKeyPool(["sk-first", "sk-second"], cooldown=30)
+    llm = LLMClientRegistry(key_pool=pool).chat("gpt-4o-mini", 0.2, 50)
+    fake_openai.limited["sk-first"] = {"retry-after": "20"}
+
+    assert llm.invoke("hi").content == "sk-second"
+    assert fake_openai.seen == ["sk-first", "sk-second"]
+
+    # The cooling key is skipped without another round trip
+    assert llm.invoke("hi").content == "sk-second"
+    assert fake_openai.seen[2:] == ["sk-second"]
+    first, second = pool.stats()
+    assert 19 < first["cooling_for"] <= 20 and first["rate_limited"] == 1
+    assert second["cooling_for"] == 0 and second["headroom"] == 0.99
+
+
+def test_quota_error_only_when_every_key_is_cooling(fake_openai):
+    registry = LLMClientRegistry(key_pool=APIKeyPool(["sk-first", "sk-second"]))
+    fake_openai.limited.update({
+        "sk-first": {"x-ratelimit-reset-requests": "1m30s"},
+        "sk-second": {"retry-after-ms": "45000"},
+    })
+
+    with pytest.raises(QuotaLimitError, match="All 2 API keys are cooling down"):
+        registry.chat("gpt-4o-mini", 0.2, 50).invoke("hi")
+
+    async def ainvoke():
+        return await registry.chat("gpt-4o-mini", 0.2, 50).ainvoke("hi")
+
+    with pytest.raises(QuotaLimitError):
+        asyncio.run(ainvoke())
+    # No key was retried once both were cooling
+    assert fake_openai.seen == ["sk-first", "sk-second"]
+
+
+def test_healthiest_key_wins_and_exhausted_billing_cools_longest():
+    pool = APIKeyPool(["sk-first", "sk-second", "sk-third"], cooldown=5, quota_cooldown=3600)
+    pool.record("sk-first", 200, {"x-ratelimit-limit-tokens": "1000", "x-ratelimit-remaining-tokens": "50",
+                                  "x-ratelimit-reset-tokens": "30s"})
+    pool.record("sk-third", 429, {}, b'{"error": {"code": "insufficient_quota"}}')
+
+    assert [pool.choose() for _ in range(2)] == ["sk-second", "sk-second"]
+    assert pool.stats()[2]["cooling_for"] > 3500
+    assert parse_reset_duration("6m0s") == 360 and parse_reset_duration("20ms") == 0.02
@@ -0,0 +1,68 @@
+import asyncio
+
+import numpy as np
+
+import app.routes.resume_data as resume_data
+from app.models.batch_analyze_model import CandidateRequest, JobCandidateData, JobRequest
+from app.services.lexical_prefilter import TagInvertedIndex, lexical_overlap_mask
+from app.services.tag_canonicalizer import get_tag_canonicalizer
+from tests.test_ai_match_score import FakeEmbeddings
+
+JOBS = [["Python", "Django"], ["Selenium", "QA Engineer"], []]
+CANDIDATES = [["Python Developer"], ["ReactJS"], ["Postgre"], ["Selenium WebDriver"], []]
+
+
+def test_overlap_uses_canonical_ids_and_non_generic_words():
+    index = TagInvertedIndex(get_tag_canonicalizer().canonicalize)
+    assert index.keys(["Senior Python Developer", "React.js"]) == {"senior python developer", "python", "react"}
+
+    mask = lexical_overlap_mask(JOBS + [["React"]], CANDIDATES, get_tag_canonicalizer().canonicalize)
+    assert mask.tolist() == [
+        [True, False, False, False, False],
+        [False, False, False, True, False],
+        [False, False, False, False, False],
+        [False, True, False, False, False],
+    ]
+
+
+def test_fuzzy_threshold_admits_near_spellings():
+    exact = lexical_overlap_mask([["PostgreSQL"]], CANDIDATES)
+    fuzzy = lexical_overlap_mask([["PostgreSQL"]], CANDIDATES, fuzzy_threshold=0.5)
+
+    assert not exact.any()
+    assert fuzzy.tolist() == [[False, False, True, False, False]]
+
+
+def _request():
+    def job(i, tags):
+        return JobRequest(job_id=f"j{i}", title=None, description=None, experience_level=None, technical_skills=None,
+                          responsibilities=None, softSkills=None, qualification=None, job_tag=tags)
+
+    def candidate(i, tags):
+        return CandidateRequest(candidateId=f"c{i}", currentTitle=None, name=None, phone=None, email=None,
+                                location=None, experience_level=None, technical_skills=None, softSkills=None,
+                                qualification=None, candidate_tag=tags)
+
+    return JobCandidateData(jobs=[job(i, t) for i, t in enumerate(JOBS)],
+                            candidates=[candidate(i, t) for i, t in enumerate(CANDIDATES)])
+
+
+def test_prefilter_skips_disjoint_pairs_without_embedding_them(monkeypatch):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(resume_data.settings, "lexical_prefilter", True)
+    monkeypatch.setattr(resume_data.settings, "lexical_fuzzy_threshold", 0.0)
+
+    matrices, _, _, _ = asyncio.run(resume_data.score_pairs_with(embeddings, _request().jobs, _request().candidates))
+
+    embedded = {tag for call in embeddings.calls for tag in call}
+    assert "react" not in embedded and "postgre" not in embedded
+    skipped = matrices["lexical_skip"]
+    assert skipped.tolist() == [
+        [False, True, True, True, False],
+        [True, True, True, False, False],
+        [False, False, False, False, False],
+    ]
+    assert (matrices["weighted_coverage"][skipped] == 0).all()
+    # pairs where a side has no tags stay unscored (auto-included by batch analysis)
+    assert np.isnan(matrices["weighted_coverage"][2]).all() and np.isnan(matrices["weighted_coverage"][:, 4]).all()
+    assert matrices["weighted_coverage"][0, 0] > 0
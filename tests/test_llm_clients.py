@@ -0,0 +1,130 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.llm_clients import LLMClientRegistry
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status = 500 if self.path == "/fail" else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_clients_are_shared_per_parameters_across_threads():
+    registry = LLMClientRegistry()
+
+    with ThreadPoolExecutor(8) as pool:
+        clients = list(pool.map(lambda _: registry.chat("gpt-4o-mini", 0.4, 100), range(32)))
+
+    assert all(client is clients[0] for client in clients)
+    assert registry.chat("gpt-4o-mini", 0.2, 100) is not clients[0]
+    stats = registry.stats()
+    assert stats["clients_created"] == 2 and stats["client_reuses"] == 31
+
+
+def test_each_event_loop_gets_its_own_async_pool():
+    registry = LLMClientRegistry()
+
+    async def chat():
+        return registry.chat("gpt-4o-mini", 0.2, 100)
+
+    first, second = asyncio.run(chat()), asyncio.run(chat())
+    outside = registry.chat("gpt-4o-mini", 0.2, 100)
+
+    assert first is not second and outside not in (first, second)
+    assert first.http_async_client is not second.http_async_client
+    assert first.http_client is second.http_client is outside.http_client
+
+
+def test_pool_keeps_connections_alive_and_counts_requests(server):
+    registry = LLMClientRegistry(max_connections=4, max_keepalive=2)
+    client = registry.http_client()
+
+    for _ in range(5):
+        assert client.get(f"{server}/").status_code == 200
+    client.get(f"{server}/fail")
+
+    stats = registry.stats()
+    assert stats["requests"] == 6 and stats["failed_requests"] == 1 and stats["in_flight"] == 0
+    assert stats["pools"] == [{"kind": "sync", "connections": 1, "idle": 1, "active": 0}]
+
+
+def test_ainvoke_chain_runs_the_chain_prompt_on_the_pooled_model(monkeypatch):
+    from langchain.chains import LLMChain
+    from langchain.prompts import PromptTemplate
+    from langchain_core.language_models import FakeListChatModel
+
+    import app.services.llm_clients as llm_clients
+
+    requested = []
+
+    def fake_chat_model(model=None, temperature=None, max_tokens=None, agent=None, json_mode=False):
+        requested.append((model, temperature, max_tokens, agent))
+        return FakeListChatModel(responses=["refined"])
+
+    registry = LLMClientRegistry()
+    llm = registry.chat("gpt-4o-mini", 0.3, 50, agent="jd_enhance")
+    chain = LLMChain(llm=llm, prompt=PromptTemplate.from_template("{field}"))
+    monkeypatch.setattr(registry, "chat", fake_chat_model)
+    monkeypatch.setattr(llm_clients, "get_client_registry", lambda: registry)
+
+    async def refine_twice():
+        return [await llm_clients.ainvoke_chain(chain, {"field": "title"}) for _ in range(2)]
+
+    assert asyncio.run(refine_twice()) == ["refined", "refined"]
+    # The runnable is built once per loop and reused
+    assert requested == [("gpt-4o-mini", 0.3, 50, "jd_enhance")]
+
+
+def test_chains_are_built_once_per_loop_and_name():
+    registry = LLMClientRegistry()
+    built = []
+
+    def build(llm):
+        built.append(llm)
+        return ("chain", llm)
+
+    first = registry.chain("agent", build, "gpt-4o-mini", 0.2, 50)
+    assert registry.chain("agent", build, "gpt-4o-mini", 0.2, 50) is first
+    assert first[1] is registry.chat("gpt-4o-mini", 0.2, 50)
+
+    async def in_loop():
+        return registry.chain("agent", build, "gpt-4o-mini", 0.2, 50)
+
+    assert asyncio.run(in_loop()) is not first
+    assert len(built) == 2
+    # Chains do not count as clients (the finished loop's went with it)
+    assert registry.stats()["clients"] == 1
+
+
+def test_json_mode_models_request_a_json_object(monkeypatch):
+    from config.Settings import settings
+
+    registry = LLMClientRegistry()
+    structured = registry.chat("gpt-4o-mini", 0.2, 50, agent="job_taging", json_mode=True)
+
+    assert structured.model_kwargs == {"response_format": {"type": "json_object"}}
+    assert registry.chat("gpt-4o-mini", 0.2, 50, agent="job_taging").model_kwargs == {}
+    monkeypatch.setattr(settings, "llm_json_mode", False)
+    assert registry.chat("gpt-4o-mini", 0.2, 50, agent="ask_ai", json_mode=True).model_kwargs == {}
@@ -0,0 +1,78 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.llm_clients import LLMClientRegistry
+from app.services.llm_metrics import LLMMetrics, call_cost
+
+
+class _FakeOpenAI(BaseHTTPRequestHandler):
+    """Chat completions endpoint failing the first ``server.failures`` requests with a 500."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.headers.append(dict(self.headers))
+        if self.server.failures:
+            self.server.failures -= 1
+            status, body = 500, {"error": {"message": "boom", "type": "server_error"}}
+        else:
+            status = 200
+            body = {"id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini-2024-07-18",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "twelve chars"}}]}
+            if self.server.usage:
+                body["usage"] = {"prompt_tokens": 1200, "completion_tokens": 300, "total_tokens": 1500}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAI)
+    httpd.headers, httpd.failures, httpd.usage = [], 0, True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OPENAI_API_BASE", f"http://127.0.0.1:{httpd.server_address[1]}/v1")
+    yield httpd
+    httpd.shutdown()
+
+
+def test_agent_calls_record_usage_cost_and_retries(fake_openai):
+    metrics = LLMMetrics()
+    registry = LLMClientRegistry(metrics=metrics)
+    fake_openai.failures = 1
+
+    registry.chat("gpt-4o-mini", 0.2, 50, agent="resume_analyze").invoke("hi")
+    text = metrics.render()
+
+    labels = 'agent="resume_analyze",model="gpt-4o-mini-2024-07-18"'
+    assert f'llm_calls_total{{{labels},status="ok"}} 1' in text
+    assert 'llm_tokens_total{agent="resume_analyze",kind="prompt",model="gpt-4o-mini-2024-07-18",source="usage"} 1200' in text
+    assert f'llm_retries_total{{agent="resume_analyze",model="gpt-4o-mini"}} 1' in text
+    assert 'llm_call_tokens_bucket{agent="resume_analyze",kind="completion",model="gpt-4o-mini-2024-07-18",le="500"} 1' in text
+    assert f'llm_call_latency_recent_seconds{{{labels},quantile="0.5"}}' in text
+    assert f"llm_cost_usd_total{{{labels}}} {call_cost('gpt-4o-mini', 1200, 300)!r}" in text
+    # The agent header never reaches the provider
+    assert all("x-llm-agent" not in {k.lower() for k in h} for h in fake_openai.headers)
+
+
+def test_missing_usage_falls_back_to_estimates(fake_openai):
+    metrics = LLMMetrics()
+    fake_openai.usage = False
+
+    LLMClientRegistry(metrics=metrics).chat("gpt-4o-mini", 0.2, 50, agent="ask_ai").invoke("x" * 400)
+
+    text = metrics.render()
+    # 400 characters at 4 per token when tiktoken cannot load its encoding here, a bit more with it
+    prompt = next(line for line in text.splitlines() if line.startswith('llm_tokens_total{agent="ask_ai",kind="prompt"'))
+    assert 'source="estimate"' in prompt and 50 <= float(prompt.rsplit(" ", 1)[1]) <= 110
+    assert "llm_retries_total" not in text
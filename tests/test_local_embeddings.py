@@ -0,0 +1,69 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import app.routes.resume_data as resume_data
+from app.models.batch_analyze_model import CandidateRequest, JobCandidateData, JobRequest
+from app.services.ai_match_score import score_tag_match
+from app.services.local_embeddings import get_local_embeddings
+from tests.test_ai_match_score import FakeEmbeddings
+
+
+def _similarity(embeddings, a, b):
+    va, vb = embeddings.embed_array([a, b])
+    return float(va @ vb)
+
+
+def test_local_embeddings_are_offline_and_synonym_aware(monkeypatch):
+    monkeypatch.setattr(resume_data.settings, "tag_canonicalization", True)
+    embeddings = get_local_embeddings()
+    vectors = np.asarray(embeddings.embed_documents(["Kubernetes", "K8s", "PostgreSQL"]))
+
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert np.allclose(vectors[0], vectors[1])
+    assert _similarity(embeddings, "Postgres", "PostgreSQL") == pytest.approx(1.0)
+    assert _similarity(embeddings, "Selenium Testing", "Selenium") > _similarity(embeddings, "Selenium", "Cooking")
+
+    metrics = score_tag_match(embeddings.embed_documents(["ReactJS", "Node"]), embeddings.embed_documents(["React", "Node.js"]))
+    assert metrics.weighted_coverage > 99
+
+
+def test_local_embeddings_skip_the_alias_table_without_canonicalization(monkeypatch):
+    monkeypatch.setattr(resume_data.settings, "tag_canonicalization", False)
+    embeddings = get_local_embeddings()
+
+    assert _similarity(embeddings, "K8s", "Kubernetes") < 0.5
+    assert _similarity(embeddings, "Go-to-market strategy", "go to market strategy") == pytest.approx(1.0)
+    assert _similarity(embeddings, "React.JS", "reactjs") == pytest.approx(1.0)
+
+
+def test_hybrid_backend_only_rescores_borderline_pairs(monkeypatch):
+    jobs = [JobRequest(job_id="j", title=None, description=None, experience_level=None, technical_skills=None,
+                       responsibilities=None, softSkills=None, qualification=None, job_tag=["Python", "Django"])]
+    candidates = [
+        CandidateRequest(candidateId=cid, currentTitle=None, name=None, phone=None, email=None, location=None,
+                         experience_level=None, technical_skills=None, softSkills=None, qualification=None,
+                         candidate_tag=tags)
+        for cid, tags in [("same", ["Python", "Django"]), ("near", ["Python"]), ("far", ["Cooking"])]
+    ]
+    remote = FakeEmbeddings()
+    monkeypatch.setattr(resume_data.settings, "embedding_backend", "hybrid")
+    monkeypatch.setattr(resume_data.settings, "tag_canonicalization", True)
+    monkeypatch.setattr(resume_data.settings, "hybrid_borderline_margin", 10.0)
+    monkeypatch.setattr(resume_data, "get_embeddings", lambda: remote)
+
+    request = JobCandidateData(jobs=jobs, candidates=candidates)
+    local = get_local_embeddings()
+    local_scores = [score_tag_match(local.embed_documents(c.candidate_tag), local.embed_documents(["Python", "Django"]))
+                    for c in candidates]
+    # "near" covers one of two job tags exactly: weighted coverage ~50, right at the gate
+    matrices, _, _, _ = asyncio.run(resume_data.compute_match_matrices(request, {"weighted_coverage": 50}))
+
+    embedded = {tag for call in remote.calls for tag in call}
+    # Only the borderline pair's tags go to the remote model, as canonical IDs
+    assert embedded == {"python", "django"}
+    expected_near = score_tag_match(remote.embed_documents(["python"]), remote.embed_documents(["python", "django"]))
+    assert matrices["weighted_coverage"][0, 1] == pytest.approx(expected_near.weighted_coverage)
+    assert matrices["weighted_coverage"][0, 0] == pytest.approx(local_scores[0].weighted_coverage)
+    assert matrices["weighted_coverage"][0, 2] == pytest.approx(local_scores[2].weighted_coverage)
@@ -0,0 +1,113 @@
+import asyncio
+
+import numpy as np
+
+import app.routes.resume_data as resume_data
+from app.models.batch_analyze_model import CandidateRequest, JobCandidateData, JobRequest
+from app.services.pair_score_cache import PairScoreCache
+from tests.test_ai_match_score import FakeEmbeddings
+
+JOBS = [["Python", "Django", "AWS"], ["Selenium", "QA Engineer"], []]
+CANDIDATES = [["Python", "Flask"], ["Selenium", "Java"], ["Cooking"], []]
+
+
+def _request(jobs, candidates):
+    def job(i, tags):
+        return JobRequest(job_id=f"j{i}", title=None, description=None, experience_level=None, technical_skills=None,
+                          responsibilities=None, softSkills=None, qualification=None, job_tag=tags)
+
+    def candidate(i, tags):
+        return CandidateRequest(candidateId=f"c{i}", currentTitle=None, name=None, phone=None, email=None,
+                                location=None, experience_level=None, technical_skills=None, softSkills=None,
+                                qualification=None, candidate_tag=tags)
+
+    return JobCandidateData(jobs=[job(i, t) for i, t in enumerate(jobs)],
+                            candidates=[candidate(i, t) for i, t in enumerate(candidates)])
+
+
+def _setup(tmp_path, monkeypatch):
+    embeddings = FakeEmbeddings()
+    cache = PairScoreCache(tmp_path / "pairs.sqlite")
+    monkeypatch.setattr(resume_data.settings, "incremental_matching", True)
+    monkeypatch.setattr(resume_data.settings, "tag_canonicalization", True)
+    monkeypatch.setattr(resume_data, "get_pair_score_cache", lambda: cache)
+    monkeypatch.setattr(resume_data, "backend_embeddings", lambda: embeddings)
+    return embeddings
+
+
+def _match(request):
+    matrices, _, _, _ = asyncio.run(resume_data.compute_match_matrices(request, {"weighted_coverage": 40}))
+    return matrices
+
+
+def test_only_new_candidates_and_edited_jobs_are_rescored(tmp_path, monkeypatch):
+    embeddings = _setup(tmp_path, monkeypatch)
+    first = _match(_request(JOBS, CANDIDATES))
+    assert np.isnan(first["weighted_coverage"][2]).all() and np.isnan(first["weighted_coverage"][:, 3]).all()
+
+    embeddings.calls.clear()
+    again = _match(_request(JOBS, CANDIDATES))
+    assert embeddings.calls == []
+    np.testing.assert_array_equal(again["weighted_coverage"], first["weighted_coverage"])
+
+    # New candidate: embedded with the jobs, scored against them only
+    grown = _match(_request(JOBS, CANDIDATES + [["AWS", "Django"]]))
+    embedded = {tag for call in embeddings.calls for tag in call}
+    assert "amazon web services" in embedded and "cooking" not in embedded and "java" not in embedded
+    np.testing.assert_array_equal(grown["weighted_coverage"][:, :4], first["weighted_coverage"])
+
+    # Edited job: rescored against the pool, the other job is served from the cache
+    embeddings.calls.clear()
+    edited = _match(_request([["Python", "Flask"]] + JOBS[1:], CANDIDATES))
+    embedded = {tag for call in embeddings.calls for tag in call}
+    assert "qa engineer" not in embedded and "django" not in embedded
+    assert edited["weighted_coverage"][0, 0] > first["weighted_coverage"][0, 0]
+    np.testing.assert_array_equal(edited["weighted_coverage"][1], first["weighted_coverage"][1])
+
+
+def test_duplicate_tags_are_not_served_each_others_scores(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    # A repeated job tag weighs more in the coverage metrics
+    jobs = [["Python", "Kubernetes"], ["Python", "Python", "Kubernetes"]]
+    candidates = [["Python", "AWS"]]
+    monkeypatch.setattr(resume_data.settings, "incremental_matching", False)
+    fresh = _match(_request(jobs, candidates))
+    assert fresh["weighted_coverage"][0, 0] != fresh["weighted_coverage"][1, 0]
+
+    monkeypatch.setattr(resume_data.settings, "incremental_matching", True)
+    _match(_request(jobs[:1], candidates))
+    cached = _match(_request(jobs, candidates))
+
+    for name in fresh:
+        np.testing.assert_allclose(cached[name], fresh[name])
+
+
+def test_missing_blocks_split_new_jobs_from_new_candidates():
+    missing = np.zeros((3, 5), dtype=bool)
+    missing[0] = True
+    missing[:, 4] = True
+
+    blocks = resume_data._missing_blocks(missing)
+
+    assert [(j.tolist(), c.tolist()) for j, c in blocks] == [([0], [0, 1, 2, 3, 4]), ([1, 2], [4])]
+
+
+def test_scope_changes_with_the_alias_table(monkeypatch):
+    from app.services import pair_score_cache
+    from app.services.pair_score_cache import scoring_scope
+    from app.services.tag_canonicalizer import TagCanonicalizer
+
+    canonicalizer = TagCanonicalizer({"python": ["py"]})
+    monkeypatch.setattr(pair_score_cache, "get_tag_canonicalizer", lambda: canonicalizer)
+    monkeypatch.setattr(resume_data.settings, "tag_canonicalization", True)
+    before = scoring_scope({})
+
+    canonicalizer.add("javascript", ["js"])
+    assert scoring_scope({}) != before
+    assert TagCanonicalizer({"python": ["py"]}).fingerprint() == TagCanonicalizer({"Python": ["PY"]}).fingerprint()
+
+    # Without canonicalization the alias table does not affect scores
+    monkeypatch.setattr(resume_data.settings, "tag_canonicalization", False)
+    off = scoring_scope({})
+    canonicalizer.add("golang", ["go lang"])
+    assert scoring_scope({}) == off
@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+import agents.ai_question_generate as ai_question_generate
+from app.models.evaluation_model import EvaluationResponse
+from app.models.resume_analyze_model import AIQuestionRequest, CandidateAiQuestion, JobAiQuestion
+from app.services.llm_metrics import estimate_tokens
+from app.services.prompt_payload import compact_prompt, format_hint, render_inputs, render_payload
+from config.Settings import settings
+
+
+def test_payload_drops_empty_fields_and_whitespace():
+    payload = {"title": "Backend Engineer", "description": None, "skills": ["Python", "", None],
+               "softSkills": [], "meta": {"notes": [], "level": "Mid"}}
+
+    assert render_payload(payload) == '{"title":"Backend Engineer","skills":["Python"],"meta":{"level":"Mid"}}'
+    assert render_payload("plain text stays as it is") == "plain text stays as it is"
+    assert compact_prompt("\n    Title: {title}\n      - nested\n    ") == "Title: {title}\n  - nested\n"
+
+
+def test_format_hint_is_a_one_line_example_of_the_model():
+    hint = format_hint(EvaluationResponse)
+
+    assert "\n" not in hint and "properties" not in hint
+    assert json.loads(hint.split(": ", 1)[1]) == {
+        "recommendation": "strong_hire|hire|maybe|no_hire",
+        "confidenceScore": "integer 1-100",
+    }
+
+
+def test_inputs_over_budget_are_trimmed_largest_first(monkeypatch):
+    monkeypatch.setattr(settings, "prompt_input_token_budget", 100)
+    monkeypatch.setattr(settings, "prompt_input_token_budgets", "short_agent:10")
+    job = {"title": "Data Engineer", "skills": [f"skill-{i}" for i in range(60)]}
+    resume = "Worked on pipelines. " * 20
+
+    rendered = render_inputs("resume_analyze", {"job_json": job, "text": resume}, model="gpt-4o-mini")
+
+    assert sum(estimate_tokens(text, "gpt-4o-mini") for text in rendered.values()) <= 100
+    trimmed_job = json.loads(rendered["job_json"])
+    assert trimmed_job["title"] == "Data Engineer" and trimmed_job["skills"][0] == "skill-0"
+    assert len(trimmed_job["skills"]) < 60
+    # Within budget nothing changes; per-agent budgets override the default
+    assert render_inputs("other", {"text": "short"}, model="gpt-4o-mini") == {"text": "short"}
+    assert render_inputs("short_agent", {"text": resume})["text"].endswith("…")
+
+
+def test_resume_text_is_only_trimmed_with_its_own_budget(monkeypatch):
+    monkeypatch.setattr(settings, "prompt_input_token_budget", 10)
+    monkeypatch.setattr(settings, "prompt_input_token_budgets", "")
+    resume = "Led the data platform team. " * 50
+
+    assert render_inputs("resume_extractor", {"text": resume})["text"] == resume
+    monkeypatch.setattr(settings, "prompt_input_token_budgets", "resume_extractor:20")
+    assert render_inputs("resume_extractor", {"text": resume})["text"].endswith("…")
+
+
+def test_question_generator_wraps_rendering_errors(monkeypatch):
+    def broken(agent, payloads):
+        raise TypeError("not serializable")
+
+    monkeypatch.setattr(ai_question_generate, "render_inputs", broken)
+    request = AIQuestionRequest(jobs=JobAiQuestion(job_id="j", title="Dev", technical_skills=["Python"]),
+                                candidates=CandidateAiQuestion(candidateId="c", technical_skills=["Python"]))
+
+    with pytest.raises(ValueError, match="not serializable"):
+        ai_question_generate.generate_interview_questions(request)
+    with pytest.raises(ValueError, match="not serializable"):
+        asyncio.run(ai_question_generate.agenerate_interview_questions(request))
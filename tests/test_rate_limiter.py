@@ -0,0 +1,175 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+from langchain_openai import ChatOpenAI
+
+from app.services.llm_clients import LLMClientRegistry, _PooledOpenAIEmbeddings
+from app.services.rate_limiter import (
+    LLMRateLimiter,
+    MemoryBucketBackend,
+    RateLimitTimeout,
+    SQLiteBucketBackend,
+    _take,
+    estimate_request_tokens,
+    quota_http_exception,
+)
+from config.Settings import QuotaLimitError
+
+
+def test_buckets_refill_per_minute_and_queue_reservations():
+    limits = (60.0, 1000.0)
+    state, wait = _take(None, 0.0, (1, 400), limits, max_wait=10)
+    assert wait == 0 and state == (59.0, 600.0, 0.0)
+
+    # 900 tokens needed, 600 left: 300 more refill in 18s at 1000/min
+    assert _take(state, 0.0, (1, 900), limits, max_wait=10) == (None, pytest.approx(18.0))
+    state, wait = _take(state, 0.0, (1, 900), limits, max_wait=30)
+    assert wait == pytest.approx(18.0)
+    # The next caller queues behind the reservation
+    assert _take(state, 6.0, (1, 100), limits, max_wait=60)[1] == pytest.approx(18.0)
+
+
+def test_sqlite_backend_shares_one_budget_between_workers(tmp_path):
+    workers = [SQLiteBucketBackend(tmp_path / "limits.sqlite") for _ in range(2)]
+    waits = [workers[i % 2].reserve("gpt-4o-mini", (1, 0), (4.0, 0.0), 60) for i in range(6)]
+
+    assert waits[:4] == [0, 0, 0, 0]
+    assert waits[4] == pytest.approx(15.0, abs=0.1) and waits[5] == pytest.approx(30.0, abs=0.1)
+
+
+def test_rejected_calls_do_not_spend_the_budget():
+    limiter = LLMRateLimiter(MemoryBucketBackend(), requests_per_minute=1, tokens_per_minute=0, max_wait=5)
+    limiter.acquire("gpt-4o-mini", 100)
+    for _ in range(3):
+        with pytest.raises(RateLimitTimeout):
+            limiter.acquire("gpt-4o-mini", 100)
+
+    assert limiter.acquire("other-model", 100) == 0
+    assert limiter.stats()["granted"] == 2 and limiter.stats()["rejected"] == 3
+
+
+def test_estimate_counts_prompt_and_completion_allowance():
+    body = json.dumps({"model": "gpt-4o-mini", "max_tokens": 100,
+                       "messages": [{"role": "user", "content": "x" * 384}]}).encode()
+    assert estimate_request_tokens(body) == ("gpt-4o-mini", 200)
+
+
+def test_estimate_counts_embedding_inputs():
+    texts = json.dumps({"model": "text-embedding-3-small", "input": ["x" * 40, "y" * 8]}).encode()
+    token_ids = json.dumps({"model": "text-embedding-3-small", "input": [[1, 2, 3], [4, 5]]}).encode()
+
+    assert estimate_request_tokens(texts) == ("text-embedding-3-small", 12)
+    assert estimate_request_tokens(token_ids) == ("text-embedding-3-small", 5)
+
+
+def test_rate_limit_timeouts_are_not_reported_as_key_quota():
+    timeout = quota_http_exception(RateLimitTimeout("wait", retry_after=12.2))
+    assert timeout.status_code == 429 and timeout.headers == {"Retry-After": "13"}
+    assert "rate limit" in timeout.detail and "API keys" not in timeout.detail
+
+    quota = quota_http_exception(QuotaLimitError("all keys cooling"))
+    assert quota.status_code == 429 and quota.headers is None and "API keys" in quota.detail
+
+
+class _OpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path.endswith("/embeddings"):
+            return self._reply({"object": "list", "model": "text-embedding-3-small",
+                                "data": [{"object": "embedding", "index": 0, "embedding": [0.1, 0.2]}],
+                                "usage": {"prompt_tokens": 1, "total_tokens": 1}})
+        self._reply({
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_chat_calls_through_the_registry_pool_are_limited():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _OpenAIHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        limiter = LLMRateLimiter(MemoryBucketBackend(), requests_per_minute=2, tokens_per_minute=0, max_wait=1)
+        registry = LLMClientRegistry(limiter=limiter)
+        llm = ChatOpenAI(model="gpt-4o-mini", api_key="sk-test", max_retries=0, http_client=registry.http_client(),
+                         base_url=f"http://127.0.0.1:{httpd.server_address[1]}/v1")
+
+        assert [llm.invoke("hi").content for _ in range(2)] == ["ok", "ok"]
+        with pytest.raises(openai.RateLimitError):
+            llm.invoke("hi")
+        assert registry.stats()["requests"] == 2 and registry.stats()["rate_limit"]["rejected"] == 1
+    finally:
+        httpd.shutdown()
+
+
+def test_embedding_calls_share_the_limiter_and_raise_rate_limit_timeout():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _OpenAIHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        limiter = LLMRateLimiter(MemoryBucketBackend(), requests_per_minute=1, tokens_per_minute=0, max_wait=1)
+        registry = LLMClientRegistry(limiter=limiter)
+        embeddings = _PooledOpenAIEmbeddings(
+            model="text-embedding-3-small", api_key="sk-test", max_retries=0, check_embedding_ctx_length=False,
+            http_client=registry.http_client(), base_url=f"http://127.0.0.1:{httpd.server_address[1]}/v1"
+        )
+
+        assert embeddings.embed_documents(["Python"]) == [[0.1, 0.2]]
+        with pytest.raises(RateLimitTimeout) as error:
+            embeddings.embed_documents(["AWS"])
+        assert error.value.retry_after == pytest.approx(60, abs=1)
+        assert registry.stats()["requests"] == 1 and registry.stats()["rate_limit"]["rejected"] == 1
+    finally:
+        httpd.shutdown()
+
+
+def test_redis_script_matches_take():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis runs EVAL scripts with lupa
+    from app.services.rate_limiter import RedisBucketBackend
+
+    client = fakeredis.FakeRedis()
+    backend = RedisBucketBackend(client)
+    key, limits = "llm-rate-limit:gpt-4o-mini", (60.0, 6000.0)
+
+    def state():
+        values = client.hmget(key, "requests", "tokens", "updated_at")
+        return tuple(float(v) for v in values)
+
+    assert backend.reserve("gpt-4o-mini", (1, 3000), limits, 60) == 0
+    assert state()[:2] == (59.0, 3000.0)
+    # A call larger than the whole budget is charged the budget: 6000 short, 60s at 100 tokens/s
+    before = state()
+    wait = backend.reserve("gpt-4o-mini", (1, 9000), limits, 90)
+    expected, expected_wait = _take(before, state()[2], (1, 9000), limits, 90)
+    assert wait == pytest.approx(expected_wait) and wait == pytest.approx(30.0, abs=0.1)
+    assert state()[:2] == pytest.approx(expected[:2])
+
+    # Denied: waiting longer than max_wait reports the wait and spends nothing
+    before = state()
+    assert backend.reserve("gpt-4o-mini", (1, 1000), limits, 10) == pytest.approx(40.0, abs=0.1)
+    assert state() == before
+    with pytest.raises(RateLimitTimeout):
+        LLMRateLimiter(backend, 60, 6000, max_wait=10).acquire("gpt-4o-mini", 1000)
+
+    # Refill: 45s later the tokens are back to 1500
+    client.hset(key, "updated_at", before[2] - 45)
+    refilled = (before[0], before[1], before[2] - 45)
+    assert backend.reserve("gpt-4o-mini", (1, 1000), limits, 10) == 0
+    expected, _ = _take(refilled, state()[2], (1, 1000), limits, 10)
+    assert state()[:2] == pytest.approx(expected[:2], abs=0.5) and state()[1] == pytest.approx(500.0, abs=5)
@@ -0,0 +1,63 @@
+import asyncio
+
+import agents.resume_analyze as resume_analyze
+from app.models.batch_analyze_model import CandidateAnalysisResponse, CandidateRequest, JobRequest, SkillMatch
+
+
+def _job(job_id):
+    return JobRequest(job_id=job_id, title=None, description=None, experience_level=None, technical_skills=None,
+                      responsibilities=None, softSkills=None, qualification=None, job_tag=None)
+
+
+def _candidate(candidate_id):
+    return CandidateRequest(candidateId=candidate_id, currentTitle=None, name=None, phone=None, email=None,
+                            location=None, experience_level=None, technical_skills=None, softSkills=None,
+                            qualification=None, candidate_tag=None)
+
+
+def test_pipeline_shares_one_limit_across_jobs_and_groups_results(monkeypatch):
+    active, peak = [0], [0]
+
+    async def fake_analyze(job, candidate, prompt_template):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        # later jobs finish first, so ordering must come from the queue sequence
+        await asyncio.sleep(0.05 if job.job_id == "j1" else 0.01)
+        active[0] -= 1
+        if candidate.candidateId == "bad":
+            raise ValueError("LLM returned garbage")
+        return CandidateAnalysisResponse(id=f"{job.job_id}:{candidate.candidateId}", matchScore=70)
+
+    monkeypatch.setattr(resume_analyze, "_aanalyze_candidate_for_job", fake_analyze)
+
+    batches = [
+        (_job("j1"), [_candidate("a"), _candidate("b")]),
+        (_job("j2"), [_candidate("a"), _candidate("bad"), _candidate("c")]),
+    ]
+    results = asyncio.run(resume_analyze.generate_pipeline_analysis_async(batches, threshold=50, max_concurrent=3))
+
+    assert [r.id for r in results] == ["j1:a", "j1:b", "j2:a", "j2:c"]
+    assert peak[0] == 3
+
+
+def test_local_alignment_replaces_llm_skill_sections(monkeypatch):
+    prompts = {}
+
+    async def fake_analyze(job, candidate, prompt_template):
+        prompts[candidate.candidateId] = prompt_template.format(job_json="{}", candidate_json="{}")
+        return CandidateAnalysisResponse(id=candidate.candidateId, matchScore=70)
+
+    def local_alignment(job, candidate):
+        if candidate.candidateId == "untagged":
+            return None
+        return [SkillMatch(jobRequirement="Python", candidateSkill="Python", matchStrength="Exact")], ["AWS"]
+
+    monkeypatch.setattr(resume_analyze, "_aanalyze_candidate_for_job", fake_analyze)
+    results = asyncio.run(resume_analyze.generate_pipeline_analysis_async(
+        [(_job("j1"), [_candidate("tagged"), _candidate("untagged")])], local_alignment=local_alignment
+    ))
+
+    assert "skillMatches" not in prompts["tagged"] and "skillMatches" in prompts["untagged"]
+    assert results[0].aiInsights.skillGaps == ["AWS"]
+    assert results[0].aiInsights.skillMatches[0].candidateSkill == "Python"
+    assert results[1].aiInsights.skillGaps == []
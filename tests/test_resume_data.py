@@ -0,0 +1,157 @@
+import asyncio
+import logging
+
+import app.routes.resume_data as resume_data
+from app.routes.resume_data import select_llm_candidates
+from app.services.pair_score_cache import PairScoreCache
+from tests.test_ai_match_score import FakeEmbeddings
+from tests.test_pair_score_cache import _request
+
+JOB = ["Python", "Django", "AWS"]
+
+
+def _batch_setup(monkeypatch):
+    """Fake embeddings, no ingest registry; returns the job batches sent to the LLM pipeline."""
+    sent = []
+
+    async def fake_pipeline(job_batches, local_alignment=None, **kwargs):
+        sent.extend((job, candidates, local_alignment) for job, candidates in job_batches)
+        return []
+
+    monkeypatch.setattr(resume_data, "backend_embeddings", lambda: FakeEmbeddings())
+    monkeypatch.setattr(resume_data, "generate_pipeline_analysis_async", fake_pipeline)
+    monkeypatch.setattr(resume_data.settings, "embed_tags_on_ingest", False)
+    monkeypatch.setattr(resume_data.settings, "incremental_matching", False)
+    monkeypatch.setattr(resume_data.settings, "lexical_prefilter", False)
+    monkeypatch.setattr(resume_data.settings, "embedding_backend", "openai")
+    return sent
+
+
+def test_top_k_ranks_by_score_with_ties_in_request_order():
+    eligible = [("a", 50.0), ("b", None), ("c", 80.0), ("d", 80.0), ("e", 20.0)]
+
+    assert select_llm_candidates(eligible, 3) == (["c", "d", "a"], [("e", 20.0), ("b", None)])
+    assert select_llm_candidates(eligible, None) == (["a", "b", "c", "d", "e"], [])
+    assert select_llm_candidates(eligible, 5) == (["a", "b", "c", "d", "e"], [])
+    # Unscored candidates take a slot when there is room, and lose it to any scored one
+    assert select_llm_candidates([("a", 10.0), ("u", None)], 2) == (["a", "u"], [])
+    assert select_llm_candidates([("u", None), ("a", 10.0)], 1) == (["a"], [("u", None)])
+
+
+def test_unscored_candidates_can_bypass_the_budget():
+    eligible = [("a", 50.0), ("b", None), ("c", 80.0), ("e", 20.0)]
+
+    assert select_llm_candidates(eligible, 2, unscored_use_budget=False) == (["c", "a", "b"], [("e", 20.0)])
+    assert select_llm_candidates([("b", None)], 1, unscored_use_budget=False) == (["b"], [])
+
+
+def test_batch_analyze_caps_llm_candidates_and_screens_out_the_rest(monkeypatch, caplog):
+    sent = _batch_setup(monkeypatch)
+    monkeypatch.setattr(resume_data.settings, "max_llm_candidates_per_job", 1)
+    request = _request([JOB], [JOB, ["Python"], ["  "], JOB])
+    request.eligibility_gates = {"weighted_coverage": 0}
+
+    with caplog.at_level(logging.INFO, logger=resume_data.__name__):
+        results = asyncio.run(resume_data.batch_analyze_resumes_api(request))
+
+    # MAX_LLM_CANDIDATES_PER_JOB: the best match only; the tie with c3 goes to the earlier candidate
+    assert [c.candidateId for c in sent[0][1]] == ["c0"]
+    assert [(r["id"], r["applicationStatus"]) for r in results] == [
+        ("c3", "screened_out"), ("c1", "screened_out"), ("c2", "screened_out")
+    ]
+    assert results[0]["prefilterScore"] == 100.0 and "matchScore" not in results[0]
+    # Blank tags count as no tags: unscored, so ranked last
+    assert "prefilterScore" not in results[2]
+    assert "j0 - Candidate c2: No candidate tags" in caplog.text
+
+    # The request's max_llm_candidates_per_job overrides the setting
+    sent.clear()
+    request.max_llm_candidates_per_job = 3
+    results = asyncio.run(resume_data.batch_analyze_resumes_api(request))
+    assert [c.candidateId for c in sent[0][1]] == ["c0", "c3", "c1"]
+    assert [r["id"] for r in results] == ["c2"]
+
+
+def test_incremental_alignment_embeds_only_pairs_sent_to_the_llm(tmp_path, monkeypatch):
+    sent = _batch_setup(monkeypatch)
+    embeddings = FakeEmbeddings()
+    cache = PairScoreCache(tmp_path / "pairs.sqlite")
+    monkeypatch.setattr(resume_data, "backend_embeddings", lambda: embeddings)
+    monkeypatch.setattr(resume_data, "get_pair_score_cache", lambda: cache)
+    monkeypatch.setattr(resume_data.settings, "incremental_matching", True)
+    request = _request([JOB], [JOB, ["Selenium", "Java"], ["Cooking"]])
+    request.eligibility_gates = {"weighted_coverage": 0}
+    request.local_skill_alignment = True
+    request.max_llm_candidates_per_job = 1
+    asyncio.run(resume_data.batch_analyze_resumes_api(request))
+
+    # Every pair is now cached: only the job and the one candidate sent to the LLM are embedded
+    sent.clear()
+    embeddings.calls.clear()
+    asyncio.run(resume_data.batch_analyze_resumes_api(request))
+
+    assert {tag for call in embeddings.calls for tag in call} == set(JOB)
+    job, candidates, local_alignment = sent[0]
+    assert [c.candidateId for c in candidates] == ["c0"]
+    assert local_alignment(job, candidates[0])[1] == []
+
+
+def _screen(payload, min_score=None):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    params = {} if min_score is None else {"min_score": min_score}
+    return TestClient(app).post("/api/v1/ai/screen-candidates", json=payload, params=params)
+
+
+def test_screen_candidates_lists_pairs_above_min_score(monkeypatch):
+    _batch_setup(monkeypatch)
+    payload = _request([JOB, []], [JOB, ["Python"], ["Cooking"], []]).model_dump()
+    payload["eligibility_gates"] = {"weighted_coverage": 90}
+
+    response = _screen(payload, min_score=0)
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["job_ids"] == ["j0", "j1"] and body["candidate_ids"] == ["c0", "c1", "c2", "c3"]
+    assert body["eligibility_gates"] == {"weighted_coverage": 90} and body["min_score"] == 0
+    # The untagged job and candidate leave 5 of 8 pairs unscored
+    assert (body["scored_pairs"], body["unscored_pairs"], body["lexically_skipped_pairs"]) == (3, 5, 0)
+    assert body["eligible_pairs"] == 1
+    assert [(m["job_id"], m["candidateId"]) for m in body["matches"]] == [("j0", "c0"), ("j0", "c1"), ("j0", "c2")]
+    best = body["matches"][0]
+    assert best["eligible"] and best["metrics"]["weighted_coverage"] == 100.0
+    assert set(best["metrics"]) == {"max_similarity", "top_k_mean", "coverage_ratio", "avg_quality",
+                                    "domain_relevance", "strict_relevance", "weighted_coverage"}
+
+    # min_score filters the listed pairs, not the counts
+    strict = _screen(payload, min_score=99).json()
+    assert [m["candidateId"] for m in strict["matches"]] == ["c0"] and strict["scored_pairs"] == 3
+
+
+def test_screen_candidates_counts_lexically_skipped_pairs(monkeypatch):
+    _batch_setup(monkeypatch)
+    monkeypatch.setattr(resume_data.settings, "lexical_prefilter", True)
+    monkeypatch.setattr(resume_data.settings, "lexical_fuzzy_threshold", 0.0)
+
+    body = _screen(_request([JOB], [JOB, ["Cooking"], []]).model_dump(), min_score=0).json()
+
+    assert (body["scored_pairs"], body["unscored_pairs"], body["lexically_skipped_pairs"]) == (2, 1, 1)
+    skipped = next(m for m in body["matches"] if m["candidateId"] == "c1")
+    assert skipped["metrics"]["weighted_coverage"] == 0.0 and not skipped["eligible"]
+
+
+def test_screen_candidates_rejects_unknown_gates_and_handles_empty_input(monkeypatch):
+    _batch_setup(monkeypatch)
+    payload = _request([JOB], [JOB]).model_dump()
+
+    assert _screen({**payload, "eligibility_gates": {"not_a_metric": 1}}).status_code == 422
+
+    empty = _screen({**payload, "candidates": []})
+    assert empty.status_code == 200
+    body = empty.json()
+    assert body["job_ids"] == ["j0"] and body["candidate_ids"] == []
+    assert body["matches"] == [] and body["scored_pairs"] == 0
+    # Defaults: MINIMUM_ELIGIBLE_SCORE and ELIGIBILITY_GATES
+    assert body["min_score"] == resume_data.settings.minimum_eligible_score
+    assert body["eligibility_gates"] == resume_data.settings.eligibility_gate_thresholds
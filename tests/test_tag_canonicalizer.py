@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from app.services.ai_match_score import build_tag_matrix, score_all_pairs, tag_rows
+from app.services.tag_canonicalizer import TagCanonicalizer, fold_tag, get_tag_canonicalizer
+from tests.test_ai_match_score import FakeEmbeddings
+
+
+def test_fold_tag_keeps_meaningful_symbols():
+    assert fold_tag(" React.JS ") == "reactjs"
+    assert fold_tag("CI/CD") == "ci cd"
+    assert fold_tag("Full-Stack_Developer.") == "full stack developer"
+    assert [fold_tag(t) for t in ("C++", "C#", ".NET")] == ["c++", "c#", ".net"]
+
+
+def test_aliases_fold_whole_tags_and_phrases_and_extend_at_runtime(tmp_path):
+    path = tmp_path / "aliases.json"
+    path.write_text('{"react": ["reactjs", "react.js", "react js"]}')
+    canonicalizer = TagCanonicalizer.from_file(path)
+
+    assert canonicalizer.canonicalize("React.js") == canonicalizer.canonicalize("ReactJS") == "react"
+    assert canonicalizer.canonicalize("React JS Developer") == "react developer"
+    # One-word aliases only match a whole tag
+    assert canonicalizer.canonicalize("ReactJS Developer") == "reactjs developer"
+    assert canonicalizer.canonicalize("K8s") == "k8s"
+
+    canonicalizer.add("Kubernetes", ["k8s", "kube"])
+    assert canonicalizer.canonicalize("K8s") == "kubernetes"
+
+
+@pytest.mark.parametrize("tag, expected", [
+    ("Go-to-market strategy", "go to market strategy"),
+    ("Data Engineer", "data engineer"),
+    ("Civil Engineer", "civil engineer"),
+    ("Continuous Delivery", "continuous delivery"),
+    ("Software Testing", "software testing"),
+    ("Node Manager", "node manager"),
+    ("Go", "golang"),
+    ("CI/CD", "continuous integration"),
+    ("CI/CD pipelines", "continuous integration pipelines"),
+    ("Google Cloud Platform", "google cloud platform"),
+    ("Google Cloud Functions", "google cloud platform functions"),
+])
+def test_aliases_do_not_rewrite_the_meaning_of_longer_tags(tag, expected):
+    assert get_tag_canonicalizer().canonicalize(tag) == expected
+
+
+def test_canonical_tags_share_one_row_and_match_exactly():
+    canonicalize = get_tag_canonicalizer().canonicalize
+    job_tags = [["React", "Node.js", "AWS"]]
+    candidate_tags = [["ReactJS", "nodejs", "Amazon Web Services"], ["react.js", "Python"]]
+    embeddings = FakeEmbeddings()
+
+    tag_index, tag_matrix = build_tag_matrix(job_tags + candidate_tags, embeddings, canonicalize=canonicalize)
+    matrices = score_all_pairs(
+        tag_matrix,
+        [tag_rows(tags, tag_index, canonicalize) for tags in candidate_tags],
+        [tag_rows(tags, tag_index, canonicalize) for tags in job_tags]
+    )
+
+    assert sorted(tag_index) == ["amazon web services", "nodejs", "python", "react"]
+    assert matrices["weighted_coverage"][0, 0] == 100.0
+    assert matrices["max_similarity"][0, 1] == 1.0
+
+    report = get_tag_canonicalizer().vocabulary_reduction(job_tags + candidate_tags)
+    assert report == {"raw_tags": 8, "canonical_tags": 4, "reduction": pytest.approx(0.5)}
@@ -0,0 +1,54 @@
+import app.services.tag_registry as tag_registry
+from app.services.embedding_store import CachedEmbeddings, EmbeddingStore
+from app.services.tag_registry import TagRegistry, embed_ingested_tags, tags_fingerprint
+from config.Settings import settings
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_fingerprint_ignores_order_and_case_but_counts_duplicates():
+    assert tags_fingerprint(["Python", "AWS"]) == tags_fingerprint([" aws", "python", ""])
+    assert tags_fingerprint(["Python", "AWS"]) != tags_fingerprint(["Python", "Python", "AWS"])
+    assert tags_fingerprint(["Python"]) != tags_fingerprint(["Python", "AWS"])
+
+
+def test_ingest_warms_store_and_registers_handle(tmp_path, monkeypatch):
+    embeddings = CountingEmbeddings()
+    cached = CachedEmbeddings(embeddings, EmbeddingStore(tmp_path / "store", model=settings.embedding_model))
+    registry = TagRegistry(tmp_path / "registry.sqlite")
+    monkeypatch.setattr(tag_registry, "get_embeddings", lambda: cached)
+    monkeypatch.setattr(tag_registry, "get_tag_registry", lambda: registry)
+    monkeypatch.setattr(settings, "embed_tags_on_ingest", True)
+    monkeypatch.setattr(settings, "embedding_backend", "openai")
+    monkeypatch.setattr(settings, "tag_canonicalization", False)
+
+    handle = embed_ingested_tags("candidate", ["Python", "AWS"], key="c1")
+
+    assert handle == f"candidate:c1@{tags_fingerprint(['Python', 'AWS'])[:16]}"
+    assert embeddings.embedded == ["Python", "AWS"]
+    assert registry.current_keys("candidate", [("c1", ["AWS", "python"]), ("c2", ["AWS"])]) == ["c1"]
+    assert registry.current_keys("candidate", [("c1", ["AWS", "Go"])]) == []
+
+    # Matching later embeds the same texts, all served by the store
+    cached.embed_documents(["python", "aws"])
+    assert embeddings.embedded == ["Python", "AWS"]
+
+
+def test_ingest_failure_returns_none(tmp_path, monkeypatch):
+    class FailingEmbeddings:
+        def embed_documents(self, texts):
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(tag_registry, "get_embeddings", lambda: FailingEmbeddings())
+    monkeypatch.setattr(settings, "embed_tags_on_ingest", True)
+    monkeypatch.setattr(settings, "embedding_backend", "openai")
+
+    assert embed_ingested_tags("job", ["Python"], key="j1") is None
+    assert embed_ingested_tags("job", [], key="j1") is None
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from app.services.embedding_store import CachedEmbeddings, EmbeddingStore
+from app.services.vector_quantization import bytes_per_vector, dequantize, quantize, roundtrip, truncate_dimensions
+from tests.test_ai_match_score import FakeEmbeddings
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float32", 1e-5), ("float16", 1e-3), ("int8", 1e-2)])
+def test_roundtrip_preserves_cosine_similarity(dtype, tolerance):
+    vectors = np.random.default_rng(0).normal(size=(20, 256))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    data, scales = quantize(vectors, dtype)
+    restored = dequantize(data, scales)
+
+    assert data.dtype == np.dtype(dtype)
+    assert (scales is not None) == (dtype == "int8")
+    assert np.abs(restored @ restored.T - vectors @ vectors.T).max() < tolerance
+    assert np.allclose(dequantize(data[3], None if scales is None else scales[3]), restored[3])
+
+
+def test_truncate_dimensions_renormalizes():
+    vectors = truncate_dimensions(np.random.default_rng(1).normal(size=(4, 64)), 16)
+
+    assert vectors.shape == (4, 16)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert bytes_per_vector(256, "int8") == 256 + 4 and bytes_per_vector(256, "float16") == 512
+
+
+def test_int8_store_serves_consistent_vectors(tmp_path):
+    embeddings = FakeEmbeddings()
+    store = EmbeddingStore(tmp_path, model="test-model", max_entries=16, dtype="int8")
+    cached = CachedEmbeddings(embeddings, store)
+
+    fresh = cached.embed_documents(["Python", "AWS"])
+    hot = cached.embed_documents(["Python"])
+    disk = EmbeddingStore(tmp_path, model="test-model", max_entries=16, dtype="int8").get_many(["python"])
+
+    # A miss, a hot hit and a disk hit all return the same dequantized vector
+    assert fresh[0] == hot[0] == disk[0].tolist()
+    assert np.allclose(fresh[0], roundtrip(embeddings.embed_documents(["Python"]), "int8")[0])
+    assert EmbeddingStore(tmp_path, model="test-model", max_entries=16).get_many(["Python"]) == [None]